@@ -0,0 +1,11 @@
+"""Headless benchmarks of synthetic layouts, run with ``python -m benchmarks --help``.
+
+Runs headless unless CONSTRAINT_GUI_HEADLESS=0 is set, which benchmarks with a visible window instead. The option
+has to be set before pyglet.window is imported, which importing constraint_gui does."""
+import os
+
+import pyglet
+
+os.environ.setdefault("CONSTRAINT_GUI_HEADLESS", "1")
+if os.environ["CONSTRAINT_GUI_HEADLESS"] != "0":
+    pyglet.options["shadow_window"] = False
@@ -0,0 +1,39 @@
+import argparse
+import sys
+
+from .generators import GENERATORS
+from .run import run, compare, load, save
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description="Measures solve, compile, update, hit test and render times of "
+                                                 "synthetic layouts.")
+    parser.add_argument("--layouts", nargs="+", choices=GENERATORS, default=list(GENERATORS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10, 100],
+                        help="widgets per layout, building takes about 10 ms per widget")
+    parser.add_argument("--repeat", type=int, default=20, help="runs of each per-frame measurement")
+    parser.add_argument("--solver", choices=("linear", "sympy", "cassowary"), default="linear")
+    parser.add_argument("--retained", action="store_true")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare against results written by --output before")
+    parser.add_argument("--tolerance", type=float, default=1.5,
+                        help="fail if a metric got more than this many times slower than the baseline")
+    args = parser.parse_args()
+
+    results = run({name: GENERATORS[name] for name in args.layouts}, args.sizes, args.repeat,
+                  solver=args.solver, retained=args.retained)
+
+    if args.output:
+        save(results, args.output)
+
+    if args.baseline:
+        regressions = compare(results, load(args.baseline), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Synthetic layouts of roughly ``count`` widgets, built with the usual constraint helpers."""
+import math
+
+from constraint_gui import Window, Label, CheckBox
+from constraint_gui.colors import get_color_from_2d
+from constraint_gui.constraints import *
+
+
+def grid(win: Window, count: int):
+    """A wide grid of labels positioned in percent of the window, like constraint_gui.test.aligntest."""
+    columns = math.ceil(math.sqrt(count))
+    rows = math.ceil(count / columns)
+
+    for i in range(count):
+        row, column = divmod(i, columns)
+        label = Label(win, win, bg=get_color_from_2d(row, column, rows, columns), text=str(i), font_size=8)
+        label.constraints = [
+            width_percent(1 / columns),
+            height_percent(1 / rows),
+            x_percent(column / columns),
+            y_percent(row / rows)
+        ]
+
+
+def nested(win: Window, count: int, depth: int = 50):
+    """Columns of labels that each sit inside the previous one, ``depth`` levels deep."""
+    columns = math.ceil(count / depth)
+
+    for i in range(count):
+        column, level = divmod(i, depth)
+        if level == 0:
+            master = Label(win, win, bg=get_color_from_2d(0, column, 1, columns))
+            master.constraints = [
+                width_percent(1 / columns),
+                x_percent(column / columns),
+                top_inside(0),
+                bottom_inside(0)
+            ]
+            continue
+
+        label = Label(win, master, bg=get_color_from_2d(level, column, depth, columns))
+        label.constraints = [
+            left_inside(1),
+            right_inside(1),
+            top_inside(1),
+            bottom_inside(1)
+        ]
+        master = label
+
+
+def chain(win: Window, count: int, length: int = 1000):
+    """Columns of labels that are stacked with under(), each column ``length`` labels long."""
+    columns = math.ceil(count / length)
+
+    previous = None
+    for i in range(count):
+        column, position = divmod(i, length)
+        label = Label(win, win, text=str(i), font_size=8)
+        label.constraints = [
+            width_percent(1 / columns),
+            x_percent(column / columns),
+            under(previous, 2) if position else top_inside(0),
+            Eq(WIDGET_HEIGHT, 20)
+        ]
+        previous = label
+
+
+def checkboxes(win: Window, count: int):
+    """A list of CheckBoxes, each made of three widgets."""
+    previous = None
+    for i in range(math.ceil(count / 3)):
+        checkbox = CheckBox(win, win, text=f"Option {i}", font_size=8)
+        checkbox.constraints = [
+            left_inside(10),
+            right_inside(10),
+            under(previous, 2) if previous else top_inside(10),
+            Eq(WIDGET_HEIGHT, 20)
+        ]
+        previous = checkbox
+
+
+GENERATORS = {
+    "grid": grid,
+    "nested": nested,
+    "chain": chain,
+    "checkboxes": checkboxes,
+}
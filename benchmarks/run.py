@@ -0,0 +1,142 @@
+import contextlib
+import io
+import json
+import platform
+import random
+import statistics
+import time
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pyglet
+import sympy
+from pyglet.gl import glFinish
+
+from constraint_gui import Window
+
+# seconds, lower is better
+METRICS = ("build", "solve", "compile", "update", "hit_index", "hit_test", "render")
+
+
+def timed(func: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def median_time(func: Callable[[], object], repeat: int) -> float:
+    return statistics.median(timed(func) for _ in range(repeat))
+
+
+def run_benchmark(generator: Callable[[Window, int], None], count: int, repeat: int = 20, **window_options) -> dict:
+    """Builds a layout with ``generator`` and measures every phase of getting it on screen. Per-frame metrics are the
+    median of ``repeat`` runs."""
+    win = Window(**window_options)
+    win.window.set_size(800, 450)
+    win.window.switch_to()
+
+    try:
+        # cassowary adds the constraints of each widget while it is built
+        result = {"build": timed(lambda: generator(win, count)), "widgets": len(win.widgets)}
+
+        if win.cassowary is not None:
+            result["solve"] = timed(win.update_cassowary)
+        else:
+            # solving prints the solutions of every widget
+            with contextlib.redirect_stdout(io.StringIO()):
+                result["solve"] = timed(win.solve_constraints)
+        win.resolve_constraints_on_next_frame = False
+
+        result["compile"] = timed(win.compile_layout) if win.vectorized and win.cassowary is None else 0.
+
+        def update():
+            # alternate the window width so the whole layout is re-evaluated
+            win.width = 800 if win.width != 800 else 801
+            win.register_constraint_reeval()
+            if win.cassowary is not None:
+                win.update_cassowary()
+            elif win.vectorized:
+                win.evaluate_layout()
+                return
+
+            for widget in win.widgets:
+                widget.update_self()
+
+        result["update"] = median_time(update, repeat)
+        win.width = 800
+        update()
+
+        result["hit_index"] = median_time(win.update_hit_index, repeat)
+
+        points = [(random.uniform(0, 800), random.uniform(0, 450)) for _ in range(1000)]
+        result["hit_test"] = timed(lambda: [win.get_affected_widget(x, y) for x, y in points]) / len(points)
+
+        def render():
+            win.register_redraw()
+            win.draw_()
+            glFinish()
+
+        render()
+        result["render"] = median_time(render, max(repeat // 4, 1))
+    finally:
+        win.window.close()
+
+    return result
+
+
+def run(generators: dict[str, Callable[[Window, int], None]], sizes: list[int], repeat: int = 20,
+        log: Callable[[str], None] = print, **window_options) -> dict:
+    random.seed(0)
+
+    results = []
+    for name, generator in generators.items():
+        for size in sizes:
+            result = {"layout": name, "size": size, **run_benchmark(generator, size, repeat, **window_options)}
+            log(" ".join([f"{name:>10} {size:>6} ({result['widgets']} widgets)",
+                          *(f"{metric}={result[metric] * 1000:.3f}ms" for metric in METRICS)]))
+            results.append(result)
+
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "pyglet": pyglet.version,
+            "sympy": sympy.__version__,
+            "numpy": np.__version__,
+            "window_options": window_options,
+        },
+        "results": results,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float = 1.5, min_seconds: float = 1e-4) -> list[str]:
+    """Every metric that got more than ``tolerance`` times slower than in ``baseline``. Metrics faster than
+    ``min_seconds`` in both are too noisy to compare."""
+    previous = {(result["layout"], result["size"]): result for result in baseline["results"]}
+
+    regressions = []
+    for result in results["results"]:
+        old = previous.get((result["layout"], result["size"]))
+        if old is None:
+            continue
+
+        for metric in METRICS:
+            if metric not in old or max(result[metric], old[metric]) < min_seconds:
+                continue
+
+            if result[metric] > tolerance * old[metric]:
+                regressions.append(f"{result['layout']} {result['size']} {metric}: {old[metric] * 1000:.3f}ms -> "
+                                   f"{result[metric] * 1000:.3f}ms ({result[metric] / old[metric]:.1f}x)")
+
+    return regressions
+
+
+def load(path: str | Path) -> dict:
+    with open(path) as file:
+        return json.load(file)
+
+
+def save(results: dict, path: str | Path):
+    with open(path, "w") as file:
+        json.dump(results, file, indent=2)
@@ -1,26 +1,91 @@
+# sympy and the modules that need it (linear, cassowary, partition, cache, evaluator, constraints) are only imported
+# once constraints are used, so that an app with a precompiled layout (see compiler.py) starts without them. The
+# annotations are not evaluated for the same reason.
+from __future__ import annotations
+
+import contextlib
+import functools
+import importlib
+import importlib.util
 import itertools
+import math
+import os
 import time
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, wait
+from types import ModuleType
+
+import pyglet
+
+if os.environ.get("CONSTRAINT_GUI_HEADLESS", "0") != "0":
+    # e.g. for python -m constraint_gui.compiler on a machine without a display, has to be set before pyglet.window
+    # is imported
+    pyglet.options["headless"] = True
 
 from pyglet.window.mouse import LEFT
 
-from .colors import color, random_color
+from .colors import ColorTweens, color, random_color
+from .store import GeometryStore, X, Y, WIDTH, HEIGHT
+from .spatial import GridIndex
+from .damage import Region, merge_damage
+from .profiler import FrameProfiler
+from .precompiled import PrecompiledLayout
+from .text import CachedLabel
+from .items import ItemSource
 from typing import Iterable, Callable, Optional
 
-import pyglet
-from pyglet.gl import glClearColor
+from pyglet.gl import glClearColor, glDisable, glEnable, glScissor, GL_SCISSOR_TEST
 from pyglet.graphics import OrderedGroup
-from sympy.solvers import solve
-from sympy import Symbol, Eq, lambdify
+import numpy as np
+
+SYMBOLS = {
+    "WIDGET_WIDTH": "Ww",
+    "WIDGET_HEIGHT": "Wh",
+    "WIDGET_X": "Wx",
+    "WIDGET_Y": "Wy",
+
+    "RELATIVE_X": "Px",
+    "RELATIVE_Y": "Py",
+    "RELATIVE_WIDTH": "Pw",
+    "RELATIVE_HEIGHT": "Ph",
+}
+
+# names this module used to import from sympy, still available as constraint_gui.Symbol etc.
+SYMPY_NAMES = {"S": "sympy", "Symbol": "sympy", "Eq": "sympy", "Expr": "sympy", "lambdify": "sympy",
+               "solve": "sympy.solvers"}
+
+
+def __getattr__(name: str):
+    if name in SYMBOLS:
+        from sympy import Symbol
+        globals()[name] = Symbol(SYMBOLS[name])
+        return globals()[name]
+
+    if name in SYMPY_NAMES:
+        return getattr(importlib.import_module(SYMPY_NAMES[name]), name)
 
-WIDGET_WIDTH = Symbol("Ww")
-WIDGET_HEIGHT = Symbol("Wh")
-WIDGET_X = Symbol("Wx")
-WIDGET_Y = Symbol("Wy")
+    if name == "__all__":
+        # from constraint_gui import * also exports the constraint helpers, like it always did
+        from . import constraints
+        return sorted({*(name_ for name_ in globals() if not name_.startswith("_")), *SYMBOLS, *SYMPY_NAMES,
+                       *(name_ for name_ in vars(constraints) if not name_.startswith("_"))})
 
-RELATIVE_X = Symbol("Px")
-RELATIVE_Y = Symbol("Py")
-RELATIVE_WIDTH = Symbol("Pw")
-RELATIVE_HEIGHT = Symbol("Ph")
+    # submodules are looked up here before they are imported
+    if not name.startswith("__") and importlib.util.find_spec(f"{__name__}.{name}") is None:
+        from . import constraints
+        if hasattr(constraints, name):
+            return getattr(constraints, name)
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@functools.cache
+def ordered_group(order: int) -> OrderedGroup:
+    # groups are compared by order anyway, sharing them saves creating new ones on every draw
+    return OrderedGroup(order)
+
+
+# what Window.phase returns without a profiler
+NO_PHASE = contextlib.nullcontext()
 
 
 class ConstraintResolutionException(Exception): ...
@@ -30,11 +95,19 @@ class RenderException(Exception): ...
 
 
 class Widget:
+    __slots__ = ("store", "index", "_x", "_y", "_width", "_height", "last_mouse_x", "last_mouse_y", "is_destroyed",
+                 "master", "widget_id", "window_", "_constraints", "animated_vars", "_solutions", "children",
+                 "_expr_params", "_dependencies", "template_children", "subtree_cache",
+                 # attributes set by the app, e.g. handlers like label.on_mouse_press = ..., only allocated when used
+                 "__dict__", "__weakref__")
+
+    # the children of such a widget are positioned by its place_children() instead of by constraints, see VirtualList
+    places_children = False
+
     def __init__(self, window: "Window", master: Optional["Widget"] = None):
-        self.x = 0
-        self.y = 0
-        self.width = 0
-        self.height = 0
+        # geometry and flags are views into a row of the window's store
+        self.store: GeometryStore = window.store if window else self.store
+        self.index = self.store.allocate()
 
         self._x: Callable[[int, int], int] | None = None
         self._y: Callable[[int, int], int] | None = None
@@ -45,27 +118,93 @@ class Widget:
         self.last_mouse_y = 0
 
         self.is_destroyed = False
-        self.is_mouse_inside = False
 
         self.master = master
         if self.master:
             self.master.register_child(self)
 
+        # stable across runs as long as the layout is built in the same order, see LayoutCache
+        self.widget_id = window.new_widget_id() if window else "window"
+        self._expr_params: tuple[Symbol, Symbol, Symbol, Symbol] | None = None
+        self._dependencies: frozenset[Symbol] | None = None
+
         self.window_: Window = window
         if self.window_:
             self.window_.register_widget(self)
 
-        self.constraints = []
         self.animated_vars: dict[Symbol, Callable[[], float]] = {}
+        self.constraints = []
         self._solutions = {}
         self.children: set[Widget] = set()
+        self.template_children: tuple[Widget, ...] = ()
+        self.subtree_cache: SubtreeTexture | None = None
 
-        self.needs_update = True
-        self.needs_redraw = True
+    @property
+    def x(self) -> float:
+        return self.store.view[self.index, X]
+
+    @x.setter
+    def x(self, value: float):
+        self.store.view[self.index, X] = value
+
+    @property
+    def y(self) -> float:
+        return self.store.view[self.index, Y]
+
+    @y.setter
+    def y(self, value: float):
+        self.store.view[self.index, Y] = value
+
+    @property
+    def width(self) -> float:
+        return self.store.view[self.index, WIDTH]
+
+    @width.setter
+    def width(self, value: float):
+        self.store.view[self.index, WIDTH] = value
+
+    @property
+    def height(self) -> float:
+        return self.store.view[self.index, HEIGHT]
+
+    @height.setter
+    def height(self, value: float):
+        self.store.view[self.index, HEIGHT] = value
+
+    @property
+    def needs_update(self) -> bool:
+        return self.store.needs_update[self.index]
+
+    @needs_update.setter
+    def needs_update(self, value: bool):
+        self.store.needs_update[self.index] = value
+
+    @property
+    def needs_redraw(self) -> bool:
+        return self.store.needs_redraw[self.index]
+
+    @needs_redraw.setter
+    def needs_redraw(self, value: bool):
+        self.store.needs_redraw[self.index] = value
+
+    @property
+    def is_mouse_inside(self) -> bool:
+        return self.store.hover[self.index]
+
+    @is_mouse_inside.setter
+    def is_mouse_inside(self, value: bool):
+        self.store.hover[self.index] = value
 
     def register_child(self, widget: "Widget"):
         self.children.add(widget)
 
+    def subtree(self) -> list["Widget"]:
+        """This widget and all of its descendants, masters before their children."""
+        widgets = [self]
+        for widget in widgets:
+            widgets.extend(sorted(widget.children, key=lambda child: child.widget_id))
+        return widgets
+
     def register_constraint_reeval(self):
         self.needs_update = True
 
@@ -81,7 +220,7 @@ class Widget:
 
     @property
     def group(self):
-        return OrderedGroup(self.z)
+        return ordered_group(self.z)
 
     @property
     def constraints(self):
@@ -90,6 +229,10 @@ class Widget:
     @constraints.setter
     def constraints(self, constraints_: Iterable[Eq]):
         """This is very expensive since it needs to solve a system of equations. Ideally, only invoke once."""
+        if self.window_ and (self.window_.precompiled is not None or self.placed):
+            # the solutions are already known or not needed
+            self._constraints = list(constraints_)
+            return
 
         self._constraints = []
         for constraint in constraints_:
@@ -97,14 +240,74 @@ class Widget:
             self._constraints.append(self.get_expr(constraint))
 
         if self.window_:
+            self.window_.constraints_changed(self)
+
+    @property
+    def placed(self) -> bool:
+        """Whether the master positions this widget, which is left out of solving and evaluating the layout."""
+        return self.master is not None and self.master.places_children
+
+    def place_children(self):
+        """Sets the geometry of the children with set_geometry, called every frame after the layout was evaluated if
+        places_children is set."""
+        ...
+
+    def use_template(self, *children: "Widget"):
+        """Solves the constraints of ``children`` once for all widgets with the same internal layout instead of in
+        the window's system, see template.py. Their constraints may only refer to this widget and each other."""
+        self.template_children = children
+
+        # cassowary adds the constraints of every widget incrementally anyway
+        if self.window_ and self.window_.solves_constraints and self.window_.cassowary is None:
             self.window_.resolve_constraints_on_next_frame = True
 
-    def animate(self, var: Symbol, func: Callable[[], int | float]):
+    def cache_subtree(self, enabled=True):
+        """Draws this widget and its descendants from a texture that is only rendered again when one of them changes
+        its geometry or appearance, see texture.py. Meant for static parts of the window with many widgets. This widget
+        needs an opaque background."""
+        if (self.subtree_cache is not None) == enabled:
+            return
+
+        if enabled:
+            from .texture import SubtreeTexture
+            self.subtree_cache = SubtreeTexture(self)
+        else:
+            self.subtree_cache.delete()
+            self.subtree_cache = None
+
+        # the shapes move between the window's batch and the texture's
+        for widget in self.subtree():
+            widget.release_shapes()
+
+        if self.window_:
+            self.window_.cache_roots = None
+        self.register_redraw()
+
+    def animate(self, var: Symbol | str, func: Callable[[], int | float], active: Callable[[], bool] | None = None):
+        """:arg var the symbol used in the constraints, or its name
+        :arg active whether the animation is running, an on_demand Window only draws frames for it then. None if it
+        always is
+        """
+        if isinstance(var, str) and (self.window_ is None or self.window_.solves_constraints):
+            from sympy import Symbol
+            var = Symbol(var)
+
         # sym_animated = Symbol(f"{self.get_expr(var).name}_animated")
 
+        new = var not in self.animated_vars
         self.animated_vars.update({var: func})
         # self._constraints.append(Eq(self.get_expr(var), sym_animated))
 
+        if self.window_:
+            self.window_.animations.setdefault(self, []).append(active)
+
+            if new and self.window_.cassowary is not None and self._constraints:
+                # the variable gets this widget's own value in its constraints
+                self.window_.constraints_changed(self)
+
+            # the animated variables are parameters of the compiled layout
+            self.window_.evaluator = None
+
     @property
     def solutions(self):
         return self._solutions
@@ -112,8 +315,30 @@ class Widget:
     @solutions.setter
     def solutions(self, solutions):
         self._solutions = solutions
+        self._dependencies = None
+        self.needs_update = True
 
-        args = self.window_.expr_params + tuple(self.animated_vars.keys())
+        # compiled lazily, a vectorized Window never needs the per-widget functions
+        self._x = self._y = self._width = self._height = None
+
+    @property
+    def dependencies(self) -> frozenset[Symbol] | None:
+        """The window parameters and animated variables the geometry depends on, None if unknown (cassowary)."""
+        if self._dependencies is None and self._solutions:
+            from sympy import S
+            self._dependencies = frozenset().union(*(S(self._solutions[expr]).free_symbols
+                                                     for expr in self.expr_params))
+        return self._dependencies
+
+    def depends_on(self, symbols: set[Symbol]) -> bool:
+        dependencies = self.dependencies
+        return dependencies is None or not dependencies.isdisjoint(symbols)
+
+    def compile(self):
+        from sympy import lambdify
+
+        solutions = self.solutions
+        args = self.window_.parameter_symbols + tuple(self.animated_vars.keys())
 
         self._x = lambdify(args, solutions[self.x_expr])
         self._y = lambdify(args, solutions[self.y_expr])
@@ -121,26 +346,56 @@ class Widget:
         self._height = lambdify(args, solutions[self.height_expr])
 
     def update_self(self):
+        if self.window_.cassowary is not None:
+            self.set_geometry(*map(self.window_.cassowary.value, self.expr_params))
+            return
+
+        if self._x is None:
+            with self.window_.phase("compile"):
+                self.compile()
+
         animated_args = [func() for func in self.animated_vars.values()]
 
         try:
-            self.x = float(self._x(*self.window_.params, *animated_args))
-            self.y = float(self._y(*self.window_.params, *animated_args))
-            self.width = float(self._width(*self.window_.params, *animated_args))
-            self.height = float(self._height(*self.window_.params, *animated_args))
+            params = self.window_.parameters
+            self.set_geometry(float(self._x(*params, *animated_args)),
+                              float(self._y(*params, *animated_args)),
+                              float(self._width(*params, *animated_args)),
+                              float(self._height(*params, *animated_args)))
         except TypeError as e:
-            raise ConstraintResolutionException("Constraints to lax! One or more variables is still loose/undefined!") \
-                from e
+            raise ConstraintResolutionException(
+                "Constraints to lax! One or more variables is still loose/undefined!") from e
+
+    def set_geometry(self, x: float, y: float, width: float, height: float):
+        if (x, y, width, height) != (self.x, self.y, self.width, self.height):
+            self.x = x
+            self.y = y
+            self.width = width
+            self.height = height
+            self.window_.hit_index_dirty = True
+
+            if self.window_.damage_tracking:
+                # whatever overlaps the old or new position is repainted as well
+                self.needs_redraw = True
+            else:
+                self.window_.register_redraw()
 
         if self.animated_vars:
-            # all widgets need to redraw
-            self.window_.register_redraw()
-
             self.needs_update = True
 
+    def drop_symbolic_state(self):
+        """Frees the solutions and compiled functions once the window evaluates the layout on its own."""
+        self._solutions = {}
+        self._x = self._y = self._width = self._height = None
+        self._expr_params = None
+        self._dependencies = None
+
     def get_expr(self, expr):
         """Converts a relative expression, e. g. Eq(WIDGET_WIDTH, WIDGET_HEIGHT) to an absolute expression, e. g.
         Eq(Symbol(Ww_<widget_id>), Symbol(Wh_<widget_id>))"""
+        from . import WIDGET_X, WIDGET_Y, WIDGET_WIDTH, WIDGET_HEIGHT, \
+            RELATIVE_X, RELATIVE_Y, RELATIVE_WIDTH, RELATIVE_HEIGHT
+
         expr = expr.subs({
             WIDGET_X: self.x_expr,
             WIDGET_Y: self.y_expr,
@@ -159,7 +414,10 @@ class Widget:
 
     @property
     def expr_params(self):
-        return self.x_expr, self.y_expr, self.width_expr, self.height_expr
+        if self._expr_params is None:
+            from sympy import Symbol
+            self._expr_params = tuple(Symbol(f"W{name}_{self.widget_id}") for name in "xywh")
+        return self._expr_params
 
     @property
     def params(self):
@@ -167,19 +425,19 @@ class Widget:
 
     @property
     def x_expr(self):
-        return Symbol(f"Wx_{id(self)}")
+        return self.expr_params[0]
 
     @property
     def y_expr(self):
-        return Symbol(f"Wy_{id(self)}")
+        return self.expr_params[1]
 
     @property
     def width_expr(self):
-        return Symbol(f"Ww_{id(self)}")
+        return self.expr_params[2]
 
     @property
     def height_expr(self):
-        return Symbol(f"Wh_{id(self)}")
+        return self.expr_params[3]
 
     @property
     def right_edge_expr(self):
@@ -211,9 +469,19 @@ class Widget:
     def draw(self, batch: pyglet.graphics.Batch):
         self.draw_self(batch)
 
+    def appearance(self) -> tuple:
+        """Everything besides the geometry that draw_self depends on, a cached subtree is rendered again when it
+        changes. Widgets that draw something have to override it."""
+        return ()
+
+    def release_shapes(self):
+        """Deletes the shapes that draw_self created, the next draw creates new ones."""
+        ...
+
     def get_affected_widget(self, x, y):
-        # only invoke event on most top widgets, we don't want covered widgets to also fire
-        for child in self.children:
+        # only invoke event on most top widgets, we don't want covered widgets to also fire. Of overlapping siblings
+        # the last created one is on top, as in Window.get_affected_widget
+        for child in sorted(self.children, key=lambda child_: child_.widget_id, reverse=True):
             # check if cursor is in child
             if child.x < x < child.right_edge and child.y < y < child.top_edge:
                 return child.get_affected_widget(x, y)
@@ -226,34 +494,180 @@ class Widget:
     def on_mouse_press(self, x, y, button, modifiers):
         ...
 
+    def on_mouse_release(self, x, y, button, modifiers):
+        ...
+
+    def on_mouse_enter(self):
+        """The mouse entered this widget or one of its children, see Window.update_hover."""
+        ...
+
+    def on_mouse_leave(self):
+        ...
+
+    def on_mouse_scroll(self, x, y, scroll_x, scroll_y):
+        # handled by the closest scrollable master
+        if self.master is not None:
+            self.master.on_mouse_scroll(x, y, scroll_x, scroll_y)
+
     def destroy(self):
-        self.is_destroyed = True
+        """Removes this widget and its descendants from the window: from its registry, the constraint system, the
+        evaluated layout, the drawn shapes and all lookups. The other widgets keep their layout without solving again,
+        so none of their constraints may refer to the destroyed ones."""
+        if self.is_destroyed:
+            return
+
+        if self.window_:
+            self.window_.unregister_widgets(self)
+        else:
+            self.is_destroyed = True
 
     def get_debug_str(self):
-        return f"Wx={self.solutions[self.x_expr]}={self.x:.0f}\n" \
-               f"Wy={self.solutions[self.y_expr]}={self.y:.0f}\n" \
-               f"Ww={self.solutions[self.width_expr]}={self.width:.0f}\n" \
-               f"Wh={self.solutions[self.height_expr]}={self.height:.0f}\n" \
+        return f"Wx={self.solutions.get(self.x_expr, '?')}={self.x:.0f}\n" \
+               f"Wy={self.solutions.get(self.y_expr, '?')}={self.y:.0f}\n" \
+               f"Ww={self.solutions.get(self.width_expr, '?')}={self.width:.0f}\n" \
+               f"Wh={self.solutions.get(self.height_expr, '?')}={self.height:.0f}\n" \
                f"Mx={self.last_mouse_x}\n" \
                f"My={self.last_mouse_y}"
 
 
 class Window(Widget):
-    def __init__(self, bg=color("dark grey")):
+    def __init__(self, bg=color("dark grey"), solver="linear", partition_constraints=True,
+                 layout_cache: LayoutCache | None = None, vectorized=True, compact=False, retained=False,
+                 damage_tracking=True, profiler: FrameProfiler | None = None,
+                 background_solve: bool | Executor = False, precompiled: str | ModuleType | None = None,
+                 on_demand=False, live_resize=0.):
+        """
+
+        :arg solver "linear" solves linear constraint systems numerically and only falls back to sympy for nonlinear
+        ones, "sympy" always solves symbolically, "cassowary" maintains an incremental solver that supports
+        inequalities and non-required strengths and only touches the constraints of widgets that changed
+        :arg partition_constraints split the system into independent blocks that are solved one after another, see
+        Window.blocks and Window.block_report()
+        :arg layout_cache reuse solutions of an identical constraint system, and of the templates of composites, from a
+        previous run
+        :arg vectorized evaluate the layout of all widgets with a single LayoutEvaluator instead of per-widget
+        functions
+        :arg compact drop the symbolic solutions once the layout is compiled to save memory. Needs vectorized.
+        :arg retained keep all shapes and texts in one long-lived batch and update them in place instead of creating
+        new ones on every redraw
+        :arg damage_tracking only repaint the parts of the window that changed, see Window.draw_damage. Relies on the
+        framebuffer keeping its content between frames, like the rest of the drawing code
+        :arg profiler records how long the phases of each frame take
+        :arg background_solve solve on a worker thread, or on the given executor, e.g. a ProcessPoolExecutor, and keep
+        drawing the last layout until the new one is ready. Changes that come in while solving are coalesced. Use
+        on_layout to get notified and wait_for_layout to wait for it. Not used with the cassowary solver, which is
+        incremental anyway.
+        :arg precompiled a layout module written by ``python -m constraint_gui.compiler``, or its name. The layout is
+        evaluated from it instead of solving the constraints, widgets must be created in the same order as when it
+        was compiled. Needs vectorized and no cassowary.
+        :arg on_demand mainloop only draws a frame if something changed (see needs_frame) and sleeps otherwise,
+        instead of drawing at the frame rate all the time. Pass ``active`` to Widget.animate, otherwise animations
+        keep requesting frames forever
+        :arg live_resize while the window is being resized, only move and stretch the widgets every frame. Re-wrapping
+        texts, rendering cached subtrees again and rebuilding the hit index wait until the size has been stable for
+        this many seconds, then one full quality frame is drawn. 0 does everything on every frame
+        """
+        if precompiled is not None and (not vectorized or solver == "cassowary"):
+            raise ValueError("Precompiled layouts are evaluated vectorized and can't be used with cassowary")
+
         self.window = pyglet.window.Window(800, 450, resizable=True)
 
+        self.precompiled: ModuleType | None = importlib.import_module(precompiled) \
+            if isinstance(precompiled, str) else precompiled
+
+        self.store = GeometryStore()
+
         self.widgets: set[Widget] = set()
+        self._widget_ids = itertools.count()
+        self.placing_widgets: list[Widget] = []
+
+        self.solver = solver
+        self.cassowary = None
+        if solver == "cassowary":
+            from .cassowary import CassowaryLayout
+            self.cassowary = CassowaryLayout()
+
+        self.partition_constraints = partition_constraints
+        self.blocks: list[Block] | None = None
+        self.templates: dict[Widget, dict[Symbol, Expr]] = {}
+
+        self.layout_cache = layout_cache
+
+        self.vectorized = vectorized
+        self.compact = compact
+        self.evaluator: LayoutEvaluator | None = None
+        self.evaluated_indices = np.zeros(0, dtype=np.intp)
+        # the parameters of the last evaluation, None if everything needs to be evaluated
+        self.evaluated_inputs: np.ndarray | None = None
+        # the rows of the evaluator that are still used, None if all are, see unregister_widgets
+        self.evaluated_rows: np.ndarray | None = None
+        self.parameter_values: dict[Symbol, float] = {}
+        # named values that stay symbolic when solving, see Window.parameter
+        self.layout_parameters: dict[str, float] = {}
+        self._parameter_symbols: tuple[Symbol, ...] | None = None
+        self.animated_widgets: list[Widget] = []
+        # the animated values of every widget, by variable (or its name if precompiled) and widget id
+        self.animated_funcs: dict[tuple[Symbol | str, int], Callable[[], float]] = {}
+
+        self.widgets_by_index: dict[int, Widget] = {}
+        self.hit_index = GridIndex()
+        self.hit_index_dirty = True
+        self.hit_order: tuple[np.ndarray, np.ndarray] | None = None
+        self.hovered: Widget | None = None
+        # the hovered widget and its masters up to the window
+        self.hovered_path: list[Widget] = []
+        # the latest mouse motion since the last frame, see process_motion
+        self.pending_motion: tuple[int, int, int, int] | None = None
+        # the widget whose subtree_cache draws each widget, built on the next draw, see Widget.cache_subtree
+        self.cache_roots: dict[Widget, Widget] | None = None
 
         # Window has no parent Window
         # noinspection PyTypeChecker
         Widget.__init__(self, None)
 
-        self.constraints = [Eq(WIDGET_X, 0),
-                            Eq(WIDGET_Y, 0),
-                            Eq(WIDGET_WIDTH, self.window.width),
-                            Eq(WIDGET_HEIGHT, self.window.height)]
+        if self.precompiled is None:
+            from sympy import Eq
+            from . import WIDGET_X, WIDGET_Y, WIDGET_WIDTH, WIDGET_HEIGHT
+
+            self.constraints = [Eq(WIDGET_X, 0),
+                                Eq(WIDGET_Y, 0),
+                                Eq(WIDGET_WIDTH, self.window.width),
+                                Eq(WIDGET_HEIGHT, self.window.height)]
+
+        self.resolve_constraints_on_next_frame = self.precompiled is None
+
+        self.retained = retained
+        self.batch = pyglet.graphics.Batch()
+
+        self.damage_tracking = damage_tracking
+        self.damaged_regions: list[Region] = []
+        # where destroyed widgets were drawn, repainted by the next draw_damage
+        self.pending_damage: list[np.ndarray] = []
+
+        self.profiler = profiler
+
+        if background_solve is True:
+            background_solve = ThreadPoolExecutor(max_workers=1, thread_name_prefix="constraint_gui_solve")
+        self.executor: Executor | None = background_solve or None
+        self.solve_future: Future | None = None
+        self.solve_key: str | None = None
+        # the widgets in the order the running solve_templated_layout got them, None for a plain solve_layout
+        self.solve_widgets: list[Widget] | None = None
+        self.layout_callbacks: list[Callable[[], None]] = []
 
-        self.resolve_constraints_on_next_frame = True
+        self.color_tweens = ColorTweens()
+
+        self.on_demand = on_demand
+        self.frame_requested = False
+
+        self.live_resize = live_resize
+        # when the window was last resized, None once the full quality frame after it was drawn
+        self.resize_time: float | None = None
+        # whether each animation of a widget is running, None if always, see Widget.animate
+        self.animations: dict[Widget, list[Callable[[], bool] | None]] = {}
+        self.frame_rate = 60
+        self.frames_rendered = 0
+        self.loop_started: float | None = None
 
         self.bg = bg
 
@@ -261,14 +675,21 @@ class Window(Widget):
         self.window.event("on_mouse_motion")(self._on_mouse_motion)
         # BaseWindow.register_event_type('on_mouse_drag')
         self.window.event("on_mouse_press")(self._on_mouse_press)
-        # BaseWindow.register_event_type('on_mouse_release')
-        # BaseWindow.register_event_type('on_mouse_scroll')
+        self.window.event("on_mouse_release")(self._on_mouse_release)
+        self.window.event("on_mouse_scroll")(self._on_mouse_scroll)
         self.window.event("on_resize")(self.on_resize)
+        self.window.event("on_expose")(self.on_expose)
 
     @property
     def z(self):
         return 0
 
+    @property
+    def solves_constraints(self) -> bool:
+        """False for a precompiled layout. Layout code can skip creating its constraints then, which avoids importing
+        sympy at all."""
+        return self.precompiled is None
+
     @property
     def bg(self):
         return self._bg
@@ -286,76 +707,449 @@ class Window(Widget):
         # need to reevaluate the constraints
         self.register_constraint_reeval()
 
+        if self.live_resize:
+            self.resize_time = time.perf_counter()
+            # draws all widgets as well, without flagging each of them on every event of the drag
+            self.needs_redraw = True
+            return
+
         # need to redraw all the widgets
         self.register_redraw()
 
+    @property
+    def resizing(self) -> bool:
+        """Whether expensive work is deferred because the window is being resized, see live_resize."""
+        return self.resize_time is not None
+
+    def on_expose(self):
+        # the content of the window was lost
+        self.needs_redraw = True
+
+    def parameter(self, name: str, value: float | None = None) -> Symbol | str:
+        """A named layout parameter, e.g. a spacing unit or the ratio of a splitter, to use in constraints instead of
+        a number: ``left_inside(win.parameter("spacing", 8))``. It stays symbolic when solving, so set_parameter only
+        evaluates the widgets that depend on it again. Returns the name if the layout is precompiled.
+
+        :arg value the initial value, needed when the parameter is new. Parameters should be created before the
+        constraints that use them, a new one compiles the layout again
+        """
+        if name not in self.layout_parameters:
+            if value is None:
+                raise ValueError(f"The layout parameter {name!r} needs a value")
+
+            self.layout_parameters[name] = value
+            self._parameter_symbols = None
+
+            # the compiled layout takes all parameters
+            self.evaluator = None
+            for widget in self.widgets:
+                widget._x = widget._y = widget._width = widget._height = None
+        elif value is not None:
+            self.set_parameter(name, value)
+
+        if not self.solves_constraints:
+            return name
+
+        from sympy import Symbol
+        return Symbol(name)
+
+    def set_parameter(self, name: str, value: float):
+        """Changes a layout parameter, e.g. while dragging a splitter, without solving again."""
+        if name not in self.layout_parameters:
+            raise KeyError(f"There is no layout parameter {name!r}, create it with Window.parameter")
+
+        if self.layout_parameters[name] != value:
+            self.layout_parameters[name] = value
+            self.register_constraint_reeval()
+
+    @property
+    def parameter_symbols(self) -> tuple[Symbol, ...]:
+        """What the solutions are in terms of, besides animated variables: the window geometry, then the layout
+        parameters."""
+        if self._parameter_symbols is None:
+            from sympy import Symbol
+            self._parameter_symbols = self.expr_params + tuple(map(Symbol, self.layout_parameters))
+        return self._parameter_symbols
+
+    @property
+    def parameters(self) -> tuple[float, ...]:
+        """The values of parameter_symbols."""
+        return *self.params, *self.layout_parameters.values()
+
+    def needs_frame(self) -> bool:
+        """Whether drawing a frame would change anything: a pending solve, an update or redraw, mouse motion, an
+        active animation or color fade or invalidate()."""
+        return (self.frame_requested or self.layout_pending or self.pending_motion is not None
+                or self.needs_update or self.needs_redraw or self.store.needs_redraw.any() or self.resizing
+                or self.color_tweens.active
+                or any(active is None or active() for actives in self.animations.values() for active in actives))
+
+    def invalidate(self):
+        """Requests a frame with on_demand, e.g. after changing something that doesn't register a redraw itself."""
+        self.frame_requested = True
+
+    def frame_stats(self) -> tuple[int, int]:
+        """The frames rendered since mainloop started and the frames skipped compared to drawing at the frame rate
+        all the time."""
+        if self.loop_started is None:
+            return self.frames_rendered, 0
+
+        frames = int((time.perf_counter() - self.loop_started) * self.frame_rate)
+        return self.frames_rendered, max(frames - self.frames_rendered, 0)
+
+    def phase(self, name: str) -> contextlib.AbstractContextManager:
+        return self.profiler.phase(name) if self.profiler is not None else NO_PHASE
+
     def loopiter(self):
         t = time.perf_counter()
 
-        self.window.switch_to()
+        self.frames_rendered += 1
+        self.frame_requested = False
 
-        self.width = self.window.width
-        self.height = self.window.height
-        self.draw_()
+        with self.phase("frame"):
+            self.window.switch_to()
+            self.process_motion()
+
+            self.width = self.window.width
+            self.height = self.window.height
+            self.draw_()
 
         self.window.set_caption(f"{time.perf_counter() - t:.5f} s")
 
     def draw_(self):
-        if self.resolve_constraints_on_next_frame:
-            self.solve_constraints()
+        if self.resizing and time.perf_counter() - self.resize_time >= self.live_resize:
+            # the size is stable, redraw everything in full quality once
+            self.resize_time = None
+            self.needs_redraw = True
+            self.hit_index_dirty = True
+
+        if self.cassowary is not None:
+            with self.phase("solve"):
+                self.update_cassowary()
+        elif self.executor is not None:
+            with self.phase("solve"):
+                self.poll_solve()
+        elif self.resolve_constraints_on_next_frame:
+            with self.phase("solve"):
+                self.solve_constraints()
 
             self.resolve_constraints_on_next_frame = False
 
-        batch = pyglet.graphics.Batch()
+        batch = self.batch if self.retained else pyglet.graphics.Batch()
+
+        # widgets without solutions wait for a background solve, the others keep their last layout
+        waiting = self.executor is not None and self.cassowary is None and self.layout_pending
+
+        with self.phase("update"):
+            if self.vectorized and self.cassowary is None:
+                if not (waiting and self.evaluator is None and any(not widget.solutions for widget in self.widgets
+                                                                    if not widget.placed)):
+                    self.evaluate_layout()
+            else:
+                changed = self.changed_parameters()
+                for widget in self.widgets:
+                    if widget.placed or waiting and not widget.solutions:
+                        continue
+
+                    if widget.needs_update or self.needs_update and widget.depends_on(changed):
+                        widget.needs_update = False
+                        widget.update_self()
+
+            for widget in self.placing_widgets:
+                widget.place_children()
+
+        if self.color_tweens.active:
+            with self.phase("colors"):
+                for widget in self.color_tweens.advance():
+                    widget.register_redraw()
+
+        if self.hit_index_dirty and self.hovered is not None and not self.resizing:
+            # widgets moved, the mouse pointer might not be inside the hovered one anymore
+            with self.phase("events"):
+                self.update_hover(self.get_affected_widget(self.last_mouse_x, self.last_mouse_y))
+
+        if self.damage_tracking and not self.needs_redraw:
+            self.draw_damage(batch)
+        else:
+            self.draw_all(batch)
 
-        for widget in self.widgets:
-            if widget.needs_update or self.needs_update:
-                widget.needs_update = False
-                widget.update_self()
+        self.needs_update = False
+        self.needs_redraw = False
 
+    def draw_all(self, batch: pyglet.graphics.Batch):
         if self.needs_redraw:
+            if not self.retained:
+                self.window.clear()
+
+        widgets = [widget for widget in self.widgets if widget.needs_redraw or self.needs_redraw]
+        for widget in widgets:
+            widget.needs_redraw = False
+        self.draw_widgets(widgets, batch)
+
+        if self.retained:
+            # the batch holds the whole scene
             self.window.clear()
 
-            # if the position of widgets changed, the mouse pointer might not be inside them anymore
-            self._on_mouse_motion(self.last_mouse_x, self.last_mouse_y, 0, 0)
+        with self.phase("batch.draw"):
+            batch.draw()
 
-        for widget in self.widgets:
-            if widget.needs_redraw or self.needs_redraw:
-                widget.needs_redraw = False
-                widget.draw(batch)
+        self.store.drawn[:] = self.store.geometry
+        self.damaged_regions = [(0, 0, self.window.width, self.window.height)]
 
-        batch.draw()
+    def draw_damage(self, batch: pyglet.graphics.Batch):
+        """Repaints the screen area that the widgets needing a redraw covered before and cover now. Everything that
+        overlaps that area is drawn again, clipped to it, the rest of the window is kept."""
+        indices = self.store.needs_redraw.indices()
+        self.damaged_regions = []
+        if not len(indices) and not self.pending_damage:
+            return
 
-        self.needs_update = False
-        self.needs_redraw = False
+        damage = np.concatenate((self.store.drawn[indices], self.store.geometry[indices], *self.pending_damage))
+        self.store.drawn[indices] = self.store.geometry[indices]
+        self.pending_damage = []
+        self.damaged_regions = merge_damage(damage, self.window.width, self.window.height)
 
-    def solve_constraints(self):
-        all_constraints = []
+        if self.retained:
+            self.draw_widgets([self.widgets_by_index[index] for index in indices], batch)
+        else:
+            if self.hit_index_dirty:
+                self.update_hit_index()
 
-        if not self.widgets:
-            # nothing to solve
+            overlapping = set(itertools.chain(*(self.hit_index.overlapping(*region)
+                                                for region in self.damaged_regions)))
+            self.draw_widgets([self.widgets_by_index[index] for index in overlapping], batch)
+
+        self.store.needs_redraw.clear()
+
+        # the framebuffer can be larger than the window on high dpi screens
+        scale_x = self.window.get_framebuffer_size()[0] / self.window.width
+        scale_y = self.window.get_framebuffer_size()[1] / self.window.height
+
+        glEnable(GL_SCISSOR_TEST)
+        try:
+            with self.phase("batch.draw"):
+                for x0, y0, x1, y1 in self.damaged_regions:
+                    glScissor(int(x0 * scale_x), int(y0 * scale_y),
+                              int(math.ceil((x1 - x0) * scale_x)), int(math.ceil((y1 - y0) * scale_y)))
+                    self.window.clear()
+                    batch.draw()
+        finally:
+            glDisable(GL_SCISSOR_TEST)
+
+    def draw_widgets(self, widgets: list[Widget], batch: pyglet.graphics.Batch):
+        if self.cache_roots is None:
+            # the outermost cached master wins
+            roots = sorted((widget for widget in self.widgets if widget.subtree_cache is not None),
+                           key=lambda widget: widget.z, reverse=True)
+            self.cache_roots = {member: root for root in roots for member in root.subtree()}
+
+        if self.cache_roots:
+            # a changed descendant renders the texture of its root again
+            widgets = list(dict.fromkeys(self.cache_roots.get(widget, widget) for widget in widgets))
+
+        with self.phase("draw"):
+            if self.profiler is None:
+                for widget in widgets:
+                    (widget.subtree_cache or widget).draw(batch)
+                return
+
+            for widget in widgets:
+                start = time.perf_counter()
+                (widget.subtree_cache or widget).draw(batch)
+                self.profiler.accumulate(f"draw_self {type(widget).__name__}", start)
+
+    def compile_layout(self):
+        if self.precompiled is not None:
+            self.load_precompiled()
             return
 
-        # add constraints of all widgets
-        for widget in self.widgets:
-            all_constraints += widget.constraints
+        from .evaluator import LayoutEvaluator
 
-        _solutions: list[dict[Symbol, Expr]] = solve(
-            all_constraints,
-            itertools.chain(*[widget.expr_params for widget in self.widgets]),
-            dict=True
-        )
+        widgets = [widget for widget in self.widgets if not widget.placed]
+
+        if any(not widget.solutions for widget in widgets):
+            # dropped by a compact window
+            self.solve_constraints()
+
+        self.evaluated_indices = np.array([widget.index for widget in widgets], dtype=np.intp)
+        self.evaluated_inputs = None
+        self.evaluated_rows = None
+        self.animated_widgets = [widget for widget in widgets if widget.animated_vars]
+
+        expressions, animated = animated_solutions(widgets)
+        self.animated_funcs = {(var, widget.widget_id): widget.animated_vars[var] for var, widget in animated}
+        self.evaluator = LayoutEvaluator(expressions, self.parameter_symbols + tuple(animated.values()))
+
+        if self.compact:
+            for widget in widgets:
+                widget.drop_symbolic_state()
+            self.evaluator.terms = None
+
+    def load_precompiled(self):
+        widgets = {widget.widget_id: widget for widget in self.widgets if not widget.placed}
+        if set(widgets) != set(self.precompiled.WIDGET_IDS):
+            raise ConstraintResolutionException(
+                f"The widgets don't match the precompiled layout {self.precompiled.__name__}, it needs to be "
+                "compiled again")
+        if tuple(self.precompiled.PARAMETERS[4:]) != tuple(self.layout_parameters):
+            raise ConstraintResolutionException(
+                f"The layout parameters don't match the precompiled layout {self.precompiled.__name__}, it has "
+                f"{self.precompiled.PARAMETERS[4:]}")
+
+        # animated variables can be given by name, so that no sympy Symbol is needed
+        animated_funcs = {(getattr(var, "name", var), widget.widget_id): func
+                          for widget in self.widgets for var, func in widget.animated_vars.items()}
 
         try:
-            solutions = _solutions[0]
-        except IndexError as e:
+            self.animated_funcs = {(name, widget_id): animated_funcs[name, widget_id]
+                                   for name, widget_id in self.precompiled.ANIMATED}
+        except KeyError as e:
             raise ConstraintResolutionException(
-                "Got no solutions from sympy.solve :(. This is caused by conflicting constraints that can't be "
-                "fulfilled at the same time. For example: [..., top_inside(10), top_inside(20)] or "
-                "[..., top_inside(10), under(..., 10)]"
-            ) from e
+                f"The precompiled layout animates {e.args[0][0]} of widget {e.args[0][1]}, but it doesn't") from e
+
+        self.evaluated_indices = np.array([widgets[widget_id].index for widget_id in self.precompiled.WIDGET_IDS],
+                                          dtype=np.intp)
+        self.evaluated_inputs = None
+        self.evaluated_rows = None
+        self.animated_widgets = [widget for widget in self.widgets if widget.animated_vars]
+        self.evaluator = PrecompiledLayout(self.precompiled)
+
+    def evaluate_layout(self):
+        if (self.evaluator is not None and not self.animated_funcs and not self.needs_update
+                and not self.store.needs_update.any()):
+            return
+
+        if self.evaluator is None:
+            with self.phase("compile"):
+                self.compile_layout()
+
+        try:
+            inputs = np.array([*self.parameters, *[func() for func in self.animated_funcs.values()]], dtype=float)
+            geometry = self.evaluator(*inputs)
+        except (NameError, TypeError) as e:
+            raise ConstraintResolutionException(
+                "Constraints to lax! One or more variables is still loose/undefined!") from e
+
+        if self.evaluated_rows is not None:
+            # widgets were destroyed since the layout was compiled
+            geometry = geometry[self.evaluated_rows]
+
+        # only widgets whose inputs changed or that were flagged get new geometry
+        if self.evaluated_inputs is None:
+            affected = np.ones(len(self.evaluated_indices), dtype=bool)
+        else:
+            affected = self.evaluator.affected(inputs != self.evaluated_inputs)
+            if self.evaluated_rows is not None:
+                affected = affected[self.evaluated_rows]
+            affected |= self.store.needs_update.mask()[self.evaluated_indices]
+        self.evaluated_inputs = inputs
+
+        indices = self.evaluated_indices[affected]
+        moved = indices[(self.store.geometry[indices] != geometry[affected]).any(axis=1)]
+
+        # the window's own row isn't part of the evaluator
+        window_update = self.needs_update
+        self.store.geometry[indices] = geometry[affected]
+        self.store.needs_update.clear()
+        self.needs_update = window_update
+
+        if len(moved):
+            self.hit_index_dirty = True
+
+            if self.damage_tracking:
+                self.store.needs_redraw.set_many(moved)
+            else:
+                self.register_redraw()
+
+    def changed_parameters(self) -> set[Symbol]:
+        """The window parameters whose value changed since the last call."""
+        values = dict(zip(self.parameter_symbols, self.parameters))
+        changed = {symbol for symbol, value in values.items() if self.parameter_values.get(symbol) != value}
+        self.parameter_values = values
+        return changed
+
+    def template_requests(self) -> dict[Widget, TemplateRequest]:
+        """The template of each composite, see Widget.use_template. Composites come before their children."""
+        from .template import template_cache
+
+        return {widget: template_cache.request(widget.expr_params,
+                                               [child.expr_params for child in widget.template_children],
+                                               [child.constraints for child in widget.template_children])
+                for widget in sorted(self.widgets, key=lambda widget_: widget_.widget_id) if widget.template_children}
+
+    def collect_templates(self, requests: dict[Widget, TemplateRequest] | None = None) \
+            -> dict[Widget, dict[Symbol, Expr]]:
+        """The solutions of the children of each composite that uses a template, see TemplateCache.solve. Composites
+        whose children can't be solved on their own or are referred to from outside are left to the window's
+        system."""
+        from .template import drop_referenced, template_cache
+
+        templates = {}
+        for widget, request in (self.template_requests() if requests is None else requests).items():
+            solutions = template_cache.solve_request(request, self.solve_system, self.layout_cache)
+            if solutions is not None:
+                templates[widget] = solutions
+
+        return drop_referenced(templates, {widget: widget.template_children for widget in templates},
+                               {widget: widget.constraints for widget in self.widgets})
+
+    def collect_constraints(self, requests: dict[Widget, TemplateRequest] | None = None) \
+            -> tuple[list[Eq], list[Symbol]]:
+        """The constraints and unknowns of the window's system. Also updates Window.templates, whose children are
+        left out."""
+        self.templates = self.collect_templates(requests)
+        templated = {child for widget in self.templates for child in widget.template_children}
+        widgets = [widget for widget in self.widgets if widget not in templated and not widget.placed]
+
+        return collect_system([widget.constraints for widget in widgets], [widget.expr_params for widget in widgets])
+
+    def solve_constraints(self):
+        if not self.widgets:
+            # nothing to solve
+            return
+
+        all_constraints, unknowns = self.collect_constraints()
+
+        key = self.layout_key(all_constraints, unknowns)
+        solutions = self.layout_cache.get(key) if key is not None else None
+
+        blocks = None
+        if solutions is None:
+            from .diagnose import widget_names
+            solutions, blocks = solve_layout(all_constraints, unknowns, self.solver, self.partition_constraints,
+                                             widget_names(self.widgets))
+
+            if key is not None:
+                self.layout_cache.put(key, solutions)
+
+        self.apply_solutions(solutions, blocks)
+
+    def layout_key(self, constraints: list[Eq], unknowns: list[Symbol]) -> str | None:
+        if self.layout_cache is None:
+            return None
+
+        from .cache import constraint_hash
+        return constraint_hash(constraints, unknowns, self.solver)
+
+    def apply_solutions(self, solutions: dict[Symbol, Expr], blocks: list[Block] | None = None):
+        self.blocks = blocks
+
+        self.evaluator = None
+
+        # composites come before their children, so nested templates get the solutions of their parent first
+        if self.templates:
+            from .template import TEMPLATE_PARENT
+
+            solutions = dict(solutions)
+            for composite, template in self.templates.items():
+                if all(symbol in solutions for symbol in composite.expr_params):
+                    parent = dict(zip(TEMPLATE_PARENT, (solutions[symbol] for symbol in composite.expr_params)))
+                    solutions.update((symbol, expr.xreplace(parent)) for symbol, expr in template.items())
 
         for widget in self.widgets:
+            if widget.placed:
+                continue
+
             print(f"*** {widget!r} ***")
             try:
                 widget.solutions = {expr: solutions[expr] for expr in widget.expr_params}
@@ -366,38 +1160,527 @@ class Window(Widget):
                     f"Solutions invalid/insufficient. Couldn't resolve the above variable for widget {widget!r}. "
                     "Either constraints are to lax or conflict each other.") from e
 
+        for callback in self.layout_callbacks:
+            callback()
+
+    def solve_system(self, constraints: list[Eq], unknowns: list[Symbol]) -> dict[Symbol, Expr]:
+        return solve_system(constraints, unknowns, self.solver)
+
+    @property
+    def layout_pending(self) -> bool:
+        return self.resolve_constraints_on_next_frame or self.solve_future is not None
+
+    def submit_solve(self):
+        """Starts solving the current constraints on the executor, see poll_solve."""
+        self.resolve_constraints_on_next_frame = False
+        self.solve_widgets = None
+        if not self.widgets:
+            return
+
+        from .template import template_cache
+
+        requests = self.template_requests()
+        if any(request.key not in template_cache.templates for request in requests.values()):
+            # new templates are solved as part of the job instead of on this thread
+            self.submit_templated_solve(requests)
+            return
+
+        all_constraints, unknowns = self.collect_constraints(requests)
+
+        key = self.layout_key(all_constraints, unknowns)
+        solutions = self.layout_cache.get(key) if key is not None else None
+        if solutions is not None:
+            self.apply_solutions(solutions)
+            return
+
+        self.solve_key = key
+        from .diagnose import widget_names
+        self.solve_future = self.executor.submit(solve_layout, all_constraints, unknowns, self.solver,
+                                                 self.partition_constraints, widget_names(self.widgets))
+
+    def submit_templated_solve(self, requests: dict[Widget, TemplateRequest]):
+        """Starts solve_templated_layout on the executor with a snapshot of the widgets' constraints."""
+        from .diagnose import widget_names
+        from .template import template_cache
+
+        widgets = sorted(self.widgets, key=lambda widget_: widget_.widget_id)
+        index = {widget: i for i, widget in enumerate(widgets)}
+
+        cached = {request.key: template_cache.templates[request.key] for request in requests.values()
+                  if request.key in template_cache.templates}
+        missing = len({request.key for request in requests.values()} - cached.keys())
+        template_cache.misses += missing
+        template_cache.hits += len(requests) - missing
+
+        self.solve_widgets = widgets
+        self.solve_future = self.executor.submit(
+            solve_templated_layout,
+            [list(widget.constraints) for widget in widgets],
+            [() if widget.placed else widget.expr_params for widget in widgets],
+            {index[composite]: ([index[child] for child in composite.template_children], request)
+             for composite, request in requests.items()},
+            cached, self.solver, self.partition_constraints, self.layout_cache, widget_names(widgets))
+
+    def poll_solve(self):
+        """Applies a finished background solve and starts the next one. Called at the start of every frame, so the
+        layout only ever changes between frames."""
+        if self.solve_future is not None and self.solve_future.done():
+            future, self.solve_future = self.solve_future, None
+            # not kept around, they may be destroyed by now
+            widgets, self.solve_widgets = self.solve_widgets, None
+
+            # if the constraints changed in the meantime the result is outdated, only the newest layout is solved
+            if not self.resolve_constraints_on_next_frame:
+                # raises the exception of the solve, if any
+                if widgets is None:
+                    solutions, blocks = future.result()
+                else:
+                    solutions, blocks, self.solve_key, solved, templates = future.result()
+
+                    from .template import template_cache
+                    template_cache.templates.update(solved)
+                    self.templates = {widgets[composite]: solutions_ for composite, solutions_ in templates.items()
+                                      if widgets[composite] in self.widgets}
+
+                if self.solve_key is not None:
+                    self.layout_cache.put(self.solve_key, solutions)
+
+                self.apply_solutions(solutions, blocks)
+
+        if self.resolve_constraints_on_next_frame and self.solve_future is None:
+            self.submit_solve()
+
+    def wait_for_layout(self, timeout: float | None = None) -> bool:
+        """Blocks until the newest constraints are solved and applied. Returns False if that took longer than
+        ``timeout`` seconds. Meant for tests and scripts."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while self.layout_pending:
+            if self.executor is None:
+                self.solve_constraints()
+                self.resolve_constraints_on_next_frame = False
+                continue
+
+            if self.solve_future is not None:
+                done, _ = wait([self.solve_future],
+                               None if deadline is None else max(deadline - time.monotonic(), 0))
+                if not done:
+                    return False
+
+            self.poll_solve()
+
+        return True
+
+    def on_layout(self, callback: Callable[[], None]):
+        """Calls ``callback`` whenever new solutions were applied to the widgets."""
+        self.layout_callbacks.append(callback)
+        return callback
+
+    def diagnose(self) -> Diagnosis:
+        """Checks the current constraints for underdetermined widgets and conflicts without solving them, see
+        Diagnosis.report."""
+        from .diagnose import diagnose
+
+        return diagnose(*self.collect_constraints())
+
+    def block_report(self) -> str:
+        """Describes how the last solve was split up, to find out which part of a layout is expensive."""
+        if self.blocks is None:
+            return "The constraints were solved as a single system."
+
+        from .partition import format_blocks
+        return format_blocks(self.blocks)
+
+    @staticmethod
+    def solve_symbolically(constraints: list[Eq], unknowns: list[Symbol]) -> dict[Symbol, Expr]:
+        from sympy.solvers import solve
+
+        _solutions: list[dict[Symbol, Expr]] = solve(constraints, unknowns, dict=True)
+
+        try:
+            return _solutions[0]
+        except IndexError as e:
+            raise ConstraintResolutionException(
+                "Got no solutions from sympy.solve :(. This is caused by conflicting constraints that can't be "
+                "fulfilled at the same time. For example: [..., top_inside(10), top_inside(20)] or "
+                "[..., top_inside(10), under(..., 10)]"
+            ) from e
+
+    def update_cassowary(self):
+        from .cassowary import SolverException
+
+        values = dict(zip(self.parameter_symbols, self.parameters))
+        # every widget's constraints get its own animated values, like in Widget.update_self
+        animated = {}
+        for widget in self.widgets:
+            if widget.animated_vars:
+                animated[widget] = {var: func() for var, func in widget.animated_vars.items()}
+                # constraints that use a variable without animating it get the value of a widget that does
+                for var, value in animated[widget].items():
+                    values.setdefault(var, value)
+
+        try:
+            changed = self.cassowary.update(values, animated)
+        except SolverException as e:
+            raise ConstraintResolutionException(f"Constraints conflict for the current parameters: {e}") from e
+
+        if changed:
+            self.register_constraint_reeval()
+
+    def constraints_changed(self, widget: Widget):
+        if self.cassowary is None:
+            self.resolve_constraints_on_next_frame = True
+            return
+
+        from .cassowary import SolverException
+
+        try:
+            self.cassowary.set_constraints(widget, widget.constraints, widget.animated_vars)
+        except SolverException as e:
+            raise ConstraintResolutionException(f"Couldn't add the constraints of {widget!r}: {e}") from e
+
+    def new_widget_id(self) -> int:
+        return next(self._widget_ids)
+
     def register_widget(self, widget: Widget):
         self.widgets.add(widget)
+        self.widgets_by_index[widget.index] = widget
+        self.hit_order = None
+        self.hit_index_dirty = True
+        self.cache_roots = None
+
+        if self.cassowary is not None:
+            self.cassowary.add_unknowns(widget.expr_params)
+
+    def unregister_widgets(self, root: Widget):
+        """Removes ``root`` and its descendants, see Widget.destroy. Only the structures that refer to them are
+        updated, the layout of the remaining widgets stays as it is."""
+        removed = root.subtree()
+        removed_set = set(removed)
+        symbols = {symbol for widget in removed for symbol in widget.expr_params}
+
+        if self.solves_constraints:
+            dependents = [widget for widget in self.widgets - removed_set
+                          if any(not symbols.isdisjoint(getattr(constraint, "constraint", constraint).free_symbols)
+                                 for constraint in widget.constraints)]
+            if dependents:
+                raise ConstraintResolutionException(
+                    f"Can't destroy {root!r}, the constraints of {', '.join(map(repr, dependents))} refer to it")
+
+        if root.master is not None:
+            root.master.children.discard(root)
+            if root in root.master.template_children:
+                root.master.template_children = tuple(child for child in root.master.template_children
+                                                      if child is not root)
+
+        indices = np.array([widget.index for widget in removed], dtype=np.intp)
+        if self.damage_tracking:
+            self.pending_damage.append(self.store.drawn[indices].copy())
+        else:
+            self.needs_redraw = True
+        self.frame_requested = True
+
+        for widget in removed:
+            if widget.subtree_cache is not None:
+                widget.subtree_cache.delete()
+                widget.subtree_cache = None
+            widget.release_shapes()
+
+            if self.cassowary is not None:
+                self.cassowary.remove(widget)
+                self.cassowary.remove_unknowns(widget.expr_params)
+
+            self.widgets.discard(widget)
+            del self.widgets_by_index[widget.index]
+            self.templates.pop(widget, None)
+            self.animations.pop(widget, None)
+            if widget in self.placing_widgets:
+                self.placing_widgets.remove(widget)
+
+            self.store.release(widget.index)
+            widget.is_destroyed = True
+
+        self.color_tweens.stop_targets(removed_set)
+        self.hit_order = None
+        self.hit_index_dirty = True
+        self.cache_roots = None
+
+        if self.evaluator is not None:
+            # the rows of the remaining widgets, compiling the layout again isn't needed
+            keep = ~np.isin(self.evaluated_indices, indices)
+            rows = np.arange(len(self.evaluated_indices)) if self.evaluated_rows is None else self.evaluated_rows
+            self.evaluated_rows = rows[keep]
+            self.evaluated_indices = self.evaluated_indices[keep]
+
+            self.animated_widgets = [widget for widget in self.animated_widgets if widget not in removed_set]
+            # the evaluator's parameters stay the same, the variables of removed widgets keep their last value
+            removed_ids = {widget.widget_id for widget in removed_set}
+            self.animated_funcs = {key: (lambda value=func(): value) if key[1] in removed_ids else func
+                                   for key, func in self.animated_funcs.items()}
+
+        if self.hovered in removed_set:
+            self.hovered_path = [widget for widget in self.hovered_path if widget not in removed_set]
+            self.hovered = None
+            self.update_hover(self.get_affected_widget(self.last_mouse_x, self.last_mouse_y))
+
+    def update_hit_index(self):
+        if self.hit_order is None:
+            widgets = list(self.widgets)
+            # topmost widget first: deepest, then last created
+            self.hit_order = (np.array([widget.index for widget in widgets], dtype=np.intp),
+                              np.array([widget.z << 32 | widget.widget_id for widget in widgets], dtype=np.int64))
+
+        indices, priority = self.hit_order
+        self.hit_index.rebuild(indices, self.store.geometry[indices], priority)
+        self.hit_index_dirty = False
+
+    def get_affected_widget(self, x, y):
+        if self.hit_index_dirty:
+            self.update_hit_index()
+
+        index = self.hit_index.query(x, y)
+        return self if index is None else self.widgets_by_index[index]
 
     def _on_mouse_motion(self, x, y, dx, dy):
+        # a fast mouse sends several motions per frame, only the latest position is hit tested
+        if self.pending_motion is not None:
+            dx += self.pending_motion[2]
+            dy += self.pending_motion[3]
+        self.pending_motion = (x, y, dx, dy)
+
+    def process_motion(self):
+        """Handles the motion queued since the last frame. Called at the start of every frame and before any other
+        mouse event, so that they are still handled in order."""
+        if self.pending_motion is None:
+            return
+
+        motion, self.pending_motion = self.pending_motion, None
+        with self.phase("events"):
+            self.mouse_motion(*motion)
+
+    def mouse_motion(self, x, y, dx, dy):
         self.last_mouse_x = x
         self.last_mouse_y = y
 
-        # this could be optimized... oh well
-        for widget_ in self.widgets:
-            if widget_.is_mouse_inside:
-                widget_.register_redraw()
+        widget = self.get_affected_widget(x, y)
+        self.update_hover(widget)
+        widget.on_mouse_motion(x, y, dx, dy)
 
-            widget_.is_mouse_inside = False
+        # the handler may have changed how the widget looks, e.g. its bg
+        if widget is not self:
+            widget.register_redraw()
 
-        widget = self.get_affected_widget(x, y)
+    def update_hover(self, widget: Widget):
+        """Makes ``widget`` the hovered one. Widgets that the hovered path leaves or enters get on_mouse_leave and
+        on_mouse_enter, innermost first and outermost first respectively. Nothing happens while the mouse stays inside
+        the same widget."""
+        if widget is self.hovered:
+            return
+
+        path = []
+        master = widget
+        while master is not None:
+            path.append(master)
+            master = master.master
+
+        # only the widgets that the mouse left or entered need to redraw. The window itself has no hover state to
+        # draw, redrawing it would redraw everything
+        if self.hovered is not None:
+            self.hovered.is_mouse_inside = False
+            if self.hovered is not self:
+                self.hovered.register_redraw()
 
-        widget.register_redraw()
         widget.is_mouse_inside = True
-        widget.on_mouse_motion(x, y, dx, dy)
+        if widget is not self:
+            widget.register_redraw()
+
+        left = [widget_ for widget_ in self.hovered_path if widget_ not in path]
+        entered = [widget_ for widget_ in reversed(path) if widget_ not in self.hovered_path]
+        self.hovered = widget
+        self.hovered_path = path
+
+        for widget_ in left:
+            widget_.on_mouse_leave()
+        for widget_ in entered:
+            widget_.on_mouse_enter()
 
     def _on_mouse_press(self, x, y, button, modifiers):
-        widget = self.get_affected_widget(x, y)
-        widget.register_redraw()
-        widget.on_mouse_press(x, y, button, modifiers)
+        self.process_motion()
+        with self.phase("events"):
+            widget = self.get_affected_widget(x, y)
+            widget.register_redraw()
+            widget.on_mouse_press(x, y, button, modifiers)
+
+    def _on_mouse_release(self, x, y, button, modifiers):
+        self.process_motion()
+        with self.phase("events"):
+            self.get_affected_widget(x, y).on_mouse_release(x, y, button, modifiers)
+
+    def _on_mouse_scroll(self, x, y, scroll_x, scroll_y):
+        self.process_motion()
+        with self.phase("events"):
+            self.get_affected_widget(x, y).on_mouse_scroll(x, y, scroll_x, scroll_y)
+
+    def mainloop(self, frame_rate: float = 60):
+        self.frame_rate = frame_rate
+        self.loop_started = time.perf_counter()
+
+        if not self.on_demand:
+            pyglet.clock.schedule_interval(lambda dt: ..., 1 / frame_rate)
+            pyglet.app.run()
+            return
 
-    def mainloop(self):
-        pyglet.clock.schedule_interval(lambda dt: ..., 1 / 60)
+        from .loop import DemandEventLoop
 
+        # windows that run on demand share one loop
+        if not isinstance(pyglet.app.event_loop, DemandEventLoop):
+            pyglet.app.event_loop = DemandEventLoop(frame_rate)
+        pyglet.app.event_loop.windows.append(self)
         pyglet.app.run()
 
 
+def solve_system(constraints: list[Eq], unknowns: list[Symbol], solver="linear") -> dict[Symbol, Expr]:
+    from .linear import solve_linear
+
+    solutions = solve_linear(constraints, unknowns) if solver == "linear" else None
+
+    if solutions is None:
+        solutions = Window.solve_symbolically(constraints, unknowns)
+
+    return solutions
+
+
+def solve_layout(constraints: list[Eq], unknowns: list[Symbol], solver="linear", partition_constraints=True,
+                 names: dict[str, str] | None = None) -> tuple[dict[Symbol, Expr], list[Block] | None]:
+    """Solves a whole layout, see Window.solve_constraints. Doesn't touch any widget, so it can run on another
+    thread or process. Raises a ConstraintResolutionException that names the underdetermined unknowns or the
+    conflicting constraints if there is no unique solution.
+
+    :arg names the names of the widgets in that exception, see diagnose.widget_names
+    """
+    from .diagnose import diagnose
+    from .partition import partition, solve_blocks
+
+    blocks = partition(constraints, unknowns) if partition_constraints else None
+
+    if blocks is None:
+        # structurally singular systems are diagnosed in milliseconds instead of letting sympy find out. A merely
+        # redundant system is still solved
+        diagnosis = diagnose(constraints, unknowns, numeric_blocks=False)
+        if diagnosis:
+            raise ConstraintResolutionException(diagnosis.report(names=names))
+
+    try:
+        if blocks is not None:
+            solutions = solve_blocks(blocks, functools.partial(solve_system, solver=solver))
+        else:
+            solutions = solve_system(constraints, unknowns, solver)
+    except ConstraintResolutionException as e:
+        # e.g. a numerically singular block
+        diagnosis = diagnose(constraints, unknowns)
+        if diagnosis:
+            raise ConstraintResolutionException(diagnosis.report(names=names)) from e
+        raise
+
+    if any(unknown not in solutions for unknown in unknowns):
+        diagnosis = diagnose(constraints, unknowns)
+        if diagnosis:
+            raise ConstraintResolutionException(diagnosis.report(names=names))
+
+    return solutions, blocks
+
+
+def collect_system(constraints: Iterable[Iterable[Eq]], unknowns: Iterable[Iterable[Symbol]]) \
+        -> tuple[list[Eq], list[Symbol]]:
+    """Joins the constraints and unknowns of the widgets in the window's system, see Window.collect_constraints."""
+    from sympy import Eq
+
+    all_constraints = list(itertools.chain(*constraints))
+    for constraint in all_constraints:
+        if not isinstance(constraint, Eq):
+            raise ConstraintResolutionException(
+                f"{constraint} is not an equation. Inequalities and strengths are only supported by "
+                f"Window(solver=\"cassowary\").")
+
+    return all_constraints, list(itertools.chain(*unknowns))
+
+
+def animated_solutions(widgets: list[Widget]) -> tuple[list[list[Expr]], dict[tuple[Symbol, Widget], Symbol]]:
+    """The x, y, width and height of ``widgets`` for a vectorized layout, in which every widget gets its own animated
+    values like in Widget.update_self, and the symbols that stand for them by variable and widget. A widget that
+    depends on a variable only through another widget gets the value of the first created widget that animates it."""
+    from sympy import Dummy, S
+
+    symbols, first = {}, {}
+    for widget in sorted(widgets, key=lambda widget_: widget_.widget_id):
+        for var in widget.animated_vars:
+            symbols[var, widget] = Dummy(f"{var}_{widget.widget_id}")
+            first.setdefault(var, symbols[var, widget])
+
+    expressions = []
+    for widget in widgets:
+        own = {var: symbols[var, widget] for var in widget.animated_vars}
+        expressions.append([S(widget.solutions[expr]).xreplace({**first, **own}) for expr in widget.expr_params])
+    return expressions, symbols
+
+
+def solve_templated_layout(constraints: list[list[Eq]], unknowns: list[Iterable[Symbol]],
+                           requests: dict[int, tuple[list[int], TemplateRequest]],
+                           templates: dict[tuple, dict[Symbol, Expr] | None], solver="linear",
+                           partition_constraints=True, layout_cache: LayoutCache | None = None,
+                           names: dict[str, str] | None = None) \
+        -> tuple[dict[Symbol, Expr], list[Block] | None, str | None, dict[tuple, dict[Symbol, Expr] | None],
+                 dict[int, dict[Symbol, Expr]]]:
+    """solve_layout for a window whose templates aren't all solved yet, see Window.submit_templated_solve. Solves the
+    missing templates first and then collects the window's system like Window.collect_constraints. Widgets are
+    referred to by index.
+
+    :arg constraints the constraints of every widget
+    :arg unknowns the symbols of every widget, empty for placed widgets
+    :arg requests the children and the template of each composite
+    :arg templates the templates that are solved already, by TemplateRequest.key
+    :arg names the names of the widgets for diagnostics, see solve_layout
+    :return the solutions and blocks like solve_layout, the layout cache key to store the solutions under, the
+    templates that were solved by key and the solutions of the templated children by composite
+    """
+    from .template import drop_referenced
+
+    solve = functools.partial(solve_system, solver=solver)
+    solved = {}
+    for _, request in requests.values():
+        if request.key not in templates and request.key not in solved:
+            solved[request.key] = request.solve(solve, layout_cache)
+
+    known = {**templates, **solved}
+    composites = {}
+    for composite, (_, request) in requests.items():
+        solutions = request.rename(known[request.key])
+        if solutions is not None:
+            composites[composite] = solutions
+
+    drop_referenced(composites, {composite: children for composite, (children, _) in requests.items()},
+                    dict(enumerate(constraints)))
+    templated = {child for composite in composites for child in requests[composite][0]}
+
+    included = [i for i, unknowns_ in enumerate(unknowns) if unknowns_ and i not in templated]
+    all_constraints, all_unknowns = collect_system([constraints[i] for i in included], [unknowns[i] for i in included])
+
+    key = None
+    if layout_cache is not None:
+        from .cache import constraint_hash
+
+        key = constraint_hash(all_constraints, all_unknowns, solver)
+        solutions = layout_cache.get(key)
+        if solutions is not None:
+            return solutions, None, None, solved, composites
+
+    return *solve_layout(all_constraints, all_unknowns, solver, partition_constraints, names), key, solved, composites
+
+
 class Label(Widget):
+    __slots__ = ("bg", "bg_on_hover", "_fg", "text", "font_name", "font_size", "bold", "italic", "underline", "align",
+                 "dpi", "transition", "faded_bg", "bg_rect", "text_label", "_batch", "_text_args")
+
     def __init__(self, window: Window, master: Widget | None = None,
                  bg=(255, 255, 255), bg_on_hover: tuple[int, int, int] | None = None,
                  fg=(22, 22, 22, 255),
@@ -408,10 +1691,12 @@ class Label(Widget):
                  italic=False,
                  underline=False,
                  align="CC",
-                 dpi=None):
+                 dpi=None,
+                 transition=0.):
         """
 
         :arg align in the format (North|Center|South)(West|Center|East)
+        :arg transition seconds that the background takes to fade to bg_on_hover and back
         """
         super().__init__(window, master)
 
@@ -431,6 +1716,16 @@ class Label(Widget):
         self.align = align
         self.dpi = dpi
 
+        self.transition = transition
+        # the background while fading, see Window.color_tweens
+        self.faded_bg: tuple[int, int, int] | None = None
+
+        # the batch the shapes were created in, the shapes are updated in place as long as it stays the same
+        self._batch: pyglet.graphics.Batch | None = None
+        self.bg_rect: pyglet.shapes.Rectangle | None = None
+        self.text_label: pyglet.text.Label | None = None
+        self._text_args: dict | None = None
+
     @property
     def fg(self):
         return self._fg
@@ -439,50 +1734,148 @@ class Label(Widget):
     def fg(self, value):
         self._fg = value + (255,) if len(value) == 3 else value
 
+    @property
+    def is_mouse_inside(self) -> bool:
+        return self.store.hover[self.index]
+
+    @is_mouse_inside.setter
+    def is_mouse_inside(self, value: bool):
+        shown = self.background
+        self.store.hover[self.index] = value
+        if not self.transition:
+            return
+
+        target = tuple(self.bg_on_hover if value and self.bg_on_hover is not None else self.bg)
+        fading_to = self.window_.color_tweens.end(self, "faded_bg")
+        if target != (shown if fading_to is None else fading_to):
+            # from the color shown right now, also if the last fade isn't done yet
+            self.window_.color_tweens.start(self, "faded_bg", target, start=shown, duration=self.transition)
+
     @property
     def background(self):
+        if self.faded_bg is not None and self.window_.color_tweens.is_active(self, "faded_bg"):
+            return self.faded_bg
         return self.bg_on_hover if self.is_mouse_inside and self.bg_on_hover is not None else self.bg
 
+    def text_args(self) -> dict:
+        return dict(text=self.text,
+                    x=self.x,
+                    y={"N": self.top_edge, "C": self.y_center, "S": self.y}[self.align[0]],
+                    width=1 if self.width == 0 else self.width,
+                    font_name=self.font_name,
+                    font_size=self.font_size,
+                    color=self.fg,
+                    dpi=self.dpi,
+                    anchor_y={"N": "top", "C": "center", "S": "bottom"}[self.align[0]],
+                    align={"W": "left", "C": "center", "E": "right"}[self.align[1]])
+
     def draw_self(self, batch: pyglet.graphics.Batch):
-        self.bg_rect = pyglet.shapes.Rectangle(self.x, self.y, self.width, self.height, color=self.background,
-                                               batch=batch, group=OrderedGroup(self.z))
-
-        self.text_label = pyglet.text.Label(text=self.text,
-                                            x=self.x,
-                                            y={"N": self.top_edge, "C": self.y_center, "S": self.y}[self.align[0]],
-                                            width=1 if self.width == 0 else self.width,
-                                            font_name=self.font_name,
-                                            font_size=self.font_size,
-                                            color=self.fg,
-                                            multiline=True,
-                                            dpi=self.dpi,
-                                            anchor_y={"N": "top", "C": "center", "S": "bottom"}[self.align[0]],
-                                            align={"W": "left", "C": "center", "E": "right"}[self.align[1]],
-                                            batch=batch, group=OrderedGroup(self.z + 1))
+        if self._batch is not batch:
+            self._batch = batch
+
+            self.bg_rect = pyglet.shapes.Rectangle(self.x, self.y, self.width, self.height, color=self.background,
+                                                   batch=batch, group=ordered_group(self.z))
+            self.create_text_label(self.resized_text_args())
+            return
+
+        rect = self.bg_rect
+        if (rect.x, rect.y, rect.width, rect.height) != (self.x, self.y, self.width, self.height):
+            rect.position = self.x, self.y
+            rect.width = self.width
+            rect.height = self.height
+
+        if tuple(rect.color) != tuple(self.background[:3]):
+            rect.color = self.background
+
+        self.update_text_label(self.resized_text_args())
+
+    def resized_text_args(self) -> dict:
+        """text_args, but while the window is being resized the text keeps its wrapping width and only moves along,
+        see Window(live_resize=...)."""
+        args = self.text_args()
+        if self._text_args is None or not self.window_.resizing or args["width"] == self._text_args["width"]:
+            return args
+
+        width = self._text_args["width"]
+        shift = {"W": 0, "C": .5, "E": 1}[self.align[1]] * (args["width"] - width)
+        return dict(args, width=width, x=args["x"] + shift)
+
+    def create_text_label(self, args: dict):
+        self._text_args = args
+        self.text_label = CachedLabel(**args, multiline=True, batch=self._batch, group=ordered_group(self.z + 1))
+
+    def appearance(self) -> tuple:
+        return (self.background, self.fg, self.text, self.font_name, self.font_size, self.bold, self.italic,
+                self.underline, self.align, self.dpi)
+
+    def release_shapes(self):
+        if self.bg_rect is not None:
+            self.bg_rect.delete()
+            self.text_label.delete()
+
+        self._batch = self.bg_rect = self.text_label = self._text_args = None
+
+    def update_text_label(self, args: dict):
+        changed = {key: value for key, value in args.items() if self._text_args[key] != value}
+        if not changed:
+            return
+
+        if "dpi" in changed:
+            self.text_label.delete()
+            self.create_text_label(args)
+            return
+
+        self._text_args = args
+
+        label = self.text_label
+        if changed.keys() <= {"x", "y"}:
+            # moves the vertices without laying the text out again
+            label.position = args["x"], args["y"]
+            return
+
+        label.begin_update()
+        # pyglet recolors the vertices of the old text right away, even between begin_update and end_update
+        for key, value in sorted(changed.items(), key=lambda item: item[0] != "color"):
+            if key == "align":
+                label.set_style("align", value)
+            elif key not in ("x", "y"):
+                setattr(label, key, value)
+        # laid out once at the new position, like a new label
+        label.position = args["x"], args["y"]
+        label.end_update()
 
 
 class CheckBox(Widget):
+    __slots__ = ("checkbox_label", "text_label", "on_color", "off_color", "_status")
+
     def __init__(self, window: "Window", master: Optional["Widget"] = None,
                  on_color=color("green"), off_color=color("dark red"),
                  font_size=20, align="CW", *label_args, **label_kwargs):
         Widget.__init__(self, window, master)
 
         self.checkbox_label = Label(window, self)
-        self.checkbox_label.constraints = [
-            aspect_constraint(1),
-            left_inside(0),
-            top_inside(0),
-            bottom_inside(0)
-        ]
         self.checkbox_label.on_mouse_press = self.on_mouse_press
-
         self.text_label = Label(window, self, font_size=font_size, align=align, *label_args, **label_kwargs)
-        self.text_label.constraints = [
-            top_inside(0),
-            bottom_inside(0),
-            right_to(self.checkbox_label, 0),
-            right_inside(0)
-        ]
+
+        if window.solves_constraints:
+            from .constraints import aspect_constraint, left_inside, top_inside, bottom_inside, right_to, right_inside
+
+            self.checkbox_label.constraints = [
+                aspect_constraint(1),
+                left_inside(0),
+                top_inside(0),
+                bottom_inside(0)
+            ]
+
+            self.text_label.constraints = [
+                top_inside(0),
+                bottom_inside(0),
+                right_to(self.checkbox_label, 0),
+                right_inside(0)
+            ]
+
+            # the same for every CheckBox, solved once
+            self.use_template(self.checkbox_label, self.text_label)
 
         self.on_color = on_color
         self.off_color = off_color
@@ -508,4 +1901,133 @@ class CheckBox(Widget):
         self.status = not self.status
 
 
-from .constraints import *
+class VirtualList(Label):
+    """Shows a long list of items with a fixed pool of row widgets, only as many as fit into the list. The rows are
+    positioned by the list instead of by constraints, and scrolling only binds other items to them, so the solve, the
+    memory and the frame time don't depend on the number of items. Scrolls by whole rows."""
+    __slots__ = ("source", "create_row", "bind_row", "row_height", "scroll_step", "rows", "first", "_bound",
+                 "_placed")
+
+    places_children = True
+
+    def __init__(self, window: Window, master: Widget | None = None, items: Iterable = (),
+                 create_row: Callable[[Window, Widget], Widget] | None = None,
+                 bind_row: Callable[[Widget, object], None] | None = None,
+                 row_height: float | None = 20, scroll_step=3, **label_kwargs):
+        """
+        :arg items a sequence, or any iterable, which is only consumed as far as it is shown. Only a bounded window of
+        the items pulled from an iterable is kept, see ItemSource
+        :arg create_row creates a row widget with the given window and master, a Label by default
+        :arg bind_row shows an item in a row created by create_row, gets None for rows without item. Sets the text of
+        a Label by default
+        :arg row_height the height of a row, None to measure it from the font of the first row, which needs to be a
+        Label then
+        :arg scroll_step rows per step of the mouse wheel
+        """
+        super().__init__(window, master, **label_kwargs)
+
+        self.source = ItemSource(items)
+        self.create_row = create_row or (lambda window_, master_: Label(window_, master_, bg=self.bg, font_size=12,
+                                                                        align="CW"))
+        self.bind_row = bind_row or self.bind_label
+        self.row_height = row_height
+        self.scroll_step = scroll_step
+
+        self.rows: list[Widget] = []
+        # the index of the item in the topmost row
+        self.first = 0
+        # the item index each row shows, None if none
+        self._bound: list[int | None] = []
+        # the state of the last place_children
+        self._placed = None
+
+        window.placing_widgets.append(self)
+
+    @staticmethod
+    def bind_label(row: Label, item):
+        row.text = "" if item is None else str(item)
+
+    @property
+    def items(self) -> ItemSource:
+        return self.source
+
+    @items.setter
+    def items(self, items: Iterable):
+        self.source = ItemSource(items)
+        self.first = 0
+        self.refresh()
+
+    def refresh(self):
+        """Binds the items again, e.g. after the sequence was changed in place."""
+        # neither an item index nor None
+        self._bound = [-1] * len(self._bound)
+        self._placed = None
+        self.window_.invalidate()
+
+    @property
+    def visible_rows(self) -> int:
+        if self.row_height is None:
+            self.row_height = self.measure_row_height()
+        return max(int(self.height // self.row_height), 0)
+
+    def measure_row_height(self) -> float:
+        row = self.rows[0] if self.rows else self.new_row()
+        if not isinstance(row, Label):
+            raise ValueError("Only the height of Label rows can be measured, pass a row_height")
+
+        font = pyglet.font.load(row.font_name, row.font_size, bold=row.bold, italic=row.italic, dpi=row.dpi)
+        return math.ceil(font.ascent - font.descent)
+
+    def new_row(self) -> Widget:
+        row = self.create_row(self.window_, self)
+        self.rows.append(row)
+        self._bound.append(None)
+        return row
+
+    def scroll_to(self, index: int):
+        """Shows the item ``index`` in the topmost row, as far as there are items after it."""
+        visible = self.visible_rows
+        self.source.fetch(index + visible, index)
+        first = max(min(index, len(self.source) - visible), self.source.start, 0)
+        if first != self.first:
+            self.first = first
+            self.window_.invalidate()
+
+    def scroll_by(self, rows: int):
+        self.scroll_to(self.first + rows)
+
+    def on_mouse_scroll(self, x, y, scroll_x, scroll_y):
+        if scroll_y:
+            self.scroll_by(-int(math.copysign(max(round(abs(scroll_y) * self.scroll_step), 1), scroll_y)))
+
+    def place_children(self):
+        state = (self.params, self.first)
+        if state == self._placed:
+            return
+        self._placed = state
+
+        visible = self.visible_rows
+        self.source.fetch(self.first + visible, self.first)
+        while len(self.rows) < visible:
+            self.new_row()
+
+        hidden = False
+        for i, row in enumerate(self.rows):
+            index = self.first + i
+            if i >= visible or index >= len(self.source):
+                index = None
+
+            if index is not None:
+                row.set_geometry(self.x, self.top_edge - (i + 1) * self.row_height, self.width, self.row_height)
+            elif self._bound[i] is not None or row.height:
+                # collapsed onto the top edge, the list's background shows where it was
+                row.set_geometry(self.x, self.top_edge, self.width, 0)
+                hidden = True
+
+            if index != self._bound[i]:
+                self._bound[i] = index
+                self.bind_row(row, None if index is None else self.source[index])
+                row.register_redraw()
+
+        if hidden and not self.window_.damage_tracking:
+            self.register_redraw()
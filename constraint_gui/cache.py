@@ -0,0 +1,108 @@
+import hashlib
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Iterable
+
+import sympy
+from sympy import Eq, Expr, Symbol, srepr
+
+
+def default_cache_directory() -> Path:
+    if "CONSTRAINT_GUI_CACHE" in os.environ:
+        return Path(os.environ["CONSTRAINT_GUI_CACHE"])
+
+    return Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "constraint_gui"
+
+
+def constraint_hash(constraints: Iterable[Eq], unknowns: Iterable[Symbol], *extra) -> str:
+    """A hash of the constraint system that doesn't depend on the order in which widgets or constraints were
+    created. Requires stable symbol names, see Widget.widget_id."""
+    canonical = "\n".join([
+        sympy.__version__,
+        *map(repr, extra),
+        "constraints:", *sorted(map(srepr, constraints)),
+        "unknowns:", *sorted(symbol.name for symbol in unknowns),
+    ])
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def template_hash(key: tuple) -> str:
+    """A hash of a template (see TemplateRequest.key) that is stable across runs, the symbols are placeholders
+    already."""
+    return hashlib.sha256("\n".join([sympy.__version__, "template:", repr(key)]).encode()).hexdigest()
+
+
+class LayoutCache:
+    """Stores solved layouts and templates on disk so that a warm start doesn't need to solve anything. The least recently used
+    entries are evicted once the cache grows beyond ``max_bytes``."""
+
+    def __init__(self, directory: str | Path | None = None, max_bytes: int = 64 * 1024 * 1024):
+        self.directory = Path(directory) if directory is not None else default_cache_directory()
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{key}.pickle"
+
+    def get(self, key: str) -> dict[Symbol, Expr] | None:
+        path = self.path(key)
+
+        try:
+            with path.open("rb") as file:
+                solutions = pickle.load(file)
+            # mark as recently used
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            # broken entry, e.g. from an interrupted write or another sympy version
+            path.unlink(missing_ok=True)
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return solutions
+
+    def put(self, key: str, solutions: dict[Symbol, Expr]):
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        # write to a temporary file first so readers never see half an entry
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                pickle.dump(solutions, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.path(key))
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+        self.evict()
+
+    def entries(self) -> list[os.DirEntry]:
+        try:
+            return [entry for entry in os.scandir(self.directory) if entry.name.endswith(".pickle")]
+        except FileNotFoundError:
+            return []
+
+    @property
+    def size(self) -> int:
+        return sum(entry.stat().st_size for entry in self.entries())
+
+    def evict(self):
+        entries = sorted(self.entries(), key=lambda entry: entry.stat().st_mtime)
+        size = sum(entry.stat().st_size for entry in entries)
+
+        for entry in entries:
+            if size <= self.max_bytes:
+                break
+            size -= entry.stat().st_size
+            Path(entry.path).unlink(missing_ok=True)
+
+    def clear(self):
+        for entry in self.entries():
+            Path(entry.path).unlink(missing_ok=True)
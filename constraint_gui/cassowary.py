@@ -0,0 +1,679 @@
+"""An incremental constraint solver based on the Cassowary algorithm, closely following the kiwi implementation
+(https://github.com/nucleic/kiwi), plus the glue that feeds it the sympy constraints of a Window."""
+from collections import defaultdict
+from itertools import count
+from typing import Iterable, Sequence
+
+from sympy import Dummy, Expr, Symbol, expand
+from sympy.logic.boolalg import BooleanFalse, BooleanTrue
+
+
+def create_strength(a: float, b: float, c: float, w: float = 1) -> float:
+    return min(max(a * w, 0), 1000) * 1_000_000 + min(max(b * w, 0), 1000) * 1000 + min(max(c * w, 0), 1000)
+
+
+REQUIRED = create_strength(1000, 1000, 1000)
+STRONG = create_strength(1, 0, 0)
+MEDIUM = create_strength(0, 1, 0)
+WEAK = create_strength(0, 0, 1)
+
+EPSILON = 1e-8
+
+
+def near_zero(value: float) -> bool:
+    return -EPSILON < value < EPSILON
+
+
+class SolverException(Exception): ...
+
+
+class UnsatisfiableConstraint(SolverException): ...
+
+
+class UnknownConstraint(SolverException): ...
+
+
+class DuplicateEditVariable(SolverException): ...
+
+
+class UnknownEditVariable(SolverException): ...
+
+
+class BadRequiredStrength(SolverException): ...
+
+
+class InternalSolverError(SolverException): ...
+
+
+class Variable:
+    def __init__(self, name=""):
+        self.name = name
+        self.value = 0.
+
+    def __repr__(self):
+        return f"Variable({self.name!r}, {self.value})"
+
+
+class Constraint:
+    def __init__(self, terms: dict[Variable, float], constant: float, op: str = "==", strength: float = REQUIRED):
+        """Represents ``sum(coefficient * variable) + constant <op> 0``.
+
+        :arg op one of "==", "<=", ">="
+        """
+        assert op in ("==", "<=", ">="), op
+
+        self.terms = terms
+        self.constant = constant
+        self.op = op
+        self.strength = min(max(strength, 0), REQUIRED)
+
+    def __repr__(self):
+        expr = " + ".join(f"{coefficient} * {variable.name}" for variable, coefficient in self.terms.items())
+        return f"Constraint({expr} + {self.constant} {self.op} 0)"
+
+
+# symbol kinds of the internal tableau
+EXTERNAL, SLACK, ERROR, DUMMY = range(4)
+
+
+class _Symbol:
+    __slots__ = "kind", "id"
+
+    _ids = count()
+
+    def __init__(self, kind: int):
+        self.kind = kind
+        self.id = next(self._ids)
+
+    def __repr__(self):
+        return f"{'XSED'[self.kind]}{self.id}"
+
+
+class _Row:
+    __slots__ = "constant", "cells"
+
+    def __init__(self, constant: float = 0.):
+        self.constant = constant
+        self.cells: dict[_Symbol, float] = {}
+
+    def copy(self):
+        row = _Row(self.constant)
+        row.cells = self.cells.copy()
+        return row
+
+    def add(self, value: float) -> float:
+        self.constant += value
+        return self.constant
+
+    def insert_symbol(self, symbol: _Symbol, coefficient: float = 1.):
+        coefficient += self.cells.get(symbol, 0.)
+        if near_zero(coefficient):
+            self.cells.pop(symbol, None)
+        else:
+            self.cells[symbol] = coefficient
+
+    def insert_row(self, row: "_Row", coefficient: float = 1.):
+        self.constant += row.constant * coefficient
+        for symbol, value in row.cells.items():
+            self.insert_symbol(symbol, value * coefficient)
+
+    def remove(self, symbol: _Symbol):
+        self.cells.pop(symbol, None)
+
+    def reverse_sign(self):
+        self.constant = -self.constant
+        self.cells = {symbol: -coefficient for symbol, coefficient in self.cells.items()}
+
+    def solve_for(self, symbol: _Symbol):
+        coefficient = -1. / self.cells.pop(symbol)
+        self.constant *= coefficient
+        self.cells = {symbol_: value * coefficient for symbol_, value in self.cells.items()}
+
+    def solve_for_ex(self, lhs: _Symbol, rhs: _Symbol):
+        self.insert_symbol(lhs, -1.)
+        self.solve_for(rhs)
+
+    def coefficient_for(self, symbol: _Symbol) -> float:
+        return self.cells.get(symbol, 0.)
+
+    def substitute(self, symbol: _Symbol, row: "_Row"):
+        coefficient = self.cells.pop(symbol, None)
+        if coefficient is not None:
+            self.insert_row(row, coefficient)
+
+
+class _Tag:
+    __slots__ = "marker", "other"
+
+    def __init__(self):
+        self.marker: _Symbol | None = None
+        self.other: _Symbol | None = None
+
+
+class _EditInfo:
+    __slots__ = "tag", "constraint", "constant"
+
+    def __init__(self, tag: _Tag, constraint: Constraint, constant: float):
+        self.tag = tag
+        self.constraint = constraint
+        self.constant = constant
+
+
+class Solver:
+    def __init__(self):
+        self._constraints: dict[Constraint, _Tag] = {}
+        self._rows: dict[_Symbol, _Row] = {}
+        self._vars: dict[Variable, _Symbol] = {}
+        self._edits: dict[Variable, _EditInfo] = {}
+        self._infeasible_rows: list[_Symbol] = []
+        self._objective = _Row()
+        self._artificial: _Row | None = None
+
+    def has_constraint(self, constraint: Constraint) -> bool:
+        return constraint in self._constraints
+
+    def add_constraint(self, constraint: Constraint):
+        if constraint in self._constraints:
+            raise SolverException(f"Duplicate constraint {constraint!r}")
+
+        tag = _Tag()
+        row = self._create_row(constraint, tag)
+        subject = self._choose_subject(row, tag)
+
+        if subject is None and all(symbol.kind == DUMMY for symbol in row.cells):
+            if not near_zero(row.constant):
+                raise UnsatisfiableConstraint(constraint)
+            subject = tag.marker
+
+        if subject is None:
+            if not self._add_with_artificial_variable(row):
+                raise UnsatisfiableConstraint(constraint)
+        else:
+            row.solve_for(subject)
+            self._substitute(subject, row)
+            self._rows[subject] = row
+
+        self._constraints[constraint] = tag
+
+        self._optimize(self._objective)
+
+    def remove_constraint(self, constraint: Constraint):
+        try:
+            tag = self._constraints.pop(constraint)
+        except KeyError as e:
+            raise UnknownConstraint(constraint) from e
+
+        self._remove_constraint_effects(constraint, tag)
+
+        if self._rows.pop(tag.marker, None) is None:
+            leaving = self._get_marker_leaving_symbol(tag.marker)
+            if leaving is None:
+                raise InternalSolverError("Failed to find leaving row")
+
+            row = self._rows.pop(leaving)
+            row.solve_for_ex(leaving, tag.marker)
+            self._substitute(tag.marker, row)
+
+        self._optimize(self._objective)
+
+    def has_edit_variable(self, variable: Variable) -> bool:
+        return variable in self._edits
+
+    def add_edit_variable(self, variable: Variable, strength: float = STRONG):
+        if variable in self._edits:
+            raise DuplicateEditVariable(variable)
+
+        strength = min(max(strength, 0), REQUIRED)
+        if strength == REQUIRED:
+            raise BadRequiredStrength("Edit variables can't have a required strength")
+
+        constraint = Constraint({variable: 1.}, 0., "==", strength)
+        self.add_constraint(constraint)
+        self._edits[variable] = _EditInfo(self._constraints[constraint], constraint, 0.)
+
+    def remove_edit_variable(self, variable: Variable):
+        try:
+            info = self._edits.pop(variable)
+        except KeyError as e:
+            raise UnknownEditVariable(variable) from e
+
+        self.remove_constraint(info.constraint)
+
+    def suggest_value(self, variable: Variable, value: float):
+        try:
+            info = self._edits[variable]
+        except KeyError as e:
+            raise UnknownEditVariable(variable) from e
+
+        delta = value - info.constant
+        info.constant = value
+
+        # check first if the positive error variable is basic
+        row = self._rows.get(info.tag.marker)
+        if row is not None:
+            if row.add(-delta) < 0:
+                self._infeasible_rows.append(info.tag.marker)
+            self._dual_optimize()
+            return
+
+        # check next if the negative error variable is basic
+        row = self._rows.get(info.tag.other)
+        if row is not None:
+            if row.add(delta) < 0:
+                self._infeasible_rows.append(info.tag.other)
+            self._dual_optimize()
+            return
+
+        # otherwise update each row where the error variables exist
+        for symbol, row in self._rows.items():
+            coefficient = row.coefficient_for(info.tag.marker)
+            if coefficient != 0 and row.add(delta * coefficient) < 0 and symbol.kind != EXTERNAL:
+                self._infeasible_rows.append(symbol)
+
+        self._dual_optimize()
+
+    def update_variables(self):
+        for variable, symbol in self._vars.items():
+            row = self._rows.get(symbol)
+            variable.value = 0. if row is None else row.constant
+
+    def _get_var_symbol(self, variable: Variable) -> _Symbol:
+        if variable not in self._vars:
+            self._vars[variable] = _Symbol(EXTERNAL)
+        return self._vars[variable]
+
+    def _create_row(self, constraint: Constraint, tag: _Tag) -> _Row:
+        row = _Row(constraint.constant)
+
+        # substitute the current basic variables into the row
+        for variable, coefficient in constraint.terms.items():
+            if near_zero(coefficient):
+                continue
+
+            symbol = self._get_var_symbol(variable)
+            if symbol in self._rows:
+                row.insert_row(self._rows[symbol], coefficient)
+            else:
+                row.insert_symbol(symbol, coefficient)
+
+        # add the necessary slack, error, and dummy variables
+        if constraint.op in ("<=", ">="):
+            coefficient = 1. if constraint.op == "<=" else -1.
+            slack = _Symbol(SLACK)
+            tag.marker = slack
+            row.insert_symbol(slack, coefficient)
+            if constraint.strength < REQUIRED:
+                error = _Symbol(ERROR)
+                tag.other = error
+                row.insert_symbol(error, -coefficient)
+                self._objective.insert_symbol(error, constraint.strength)
+        elif constraint.strength < REQUIRED:
+            error_plus = _Symbol(ERROR)
+            error_minus = _Symbol(ERROR)
+            tag.marker = error_plus
+            tag.other = error_minus
+            row.insert_symbol(error_plus, -1.)
+            row.insert_symbol(error_minus, 1.)
+            self._objective.insert_symbol(error_plus, constraint.strength)
+            self._objective.insert_symbol(error_minus, constraint.strength)
+        else:
+            dummy = _Symbol(DUMMY)
+            tag.marker = dummy
+            row.insert_symbol(dummy)
+
+        # ensure the row has a positive constant
+        if row.constant < 0:
+            row.reverse_sign()
+
+        return row
+
+    @staticmethod
+    def _choose_subject(row: _Row, tag: _Tag) -> _Symbol | None:
+        for symbol in row.cells:
+            if symbol.kind == EXTERNAL:
+                return symbol
+
+        for symbol in (tag.marker, tag.other):
+            if symbol is not None and symbol.kind in (SLACK, ERROR) and row.coefficient_for(symbol) < 0:
+                return symbol
+
+        return None
+
+    def _add_with_artificial_variable(self, row: _Row) -> bool:
+        # create and add the artificial variable to the tableau
+        art = _Symbol(SLACK)
+        self._rows[art] = row.copy()
+        self._artificial = row.copy()
+
+        # optimize the artificial objective, this is successful only if the artificial objective is optimized to zero
+        self._optimize(self._artificial)
+        success = near_zero(self._artificial.constant)
+        self._artificial = None
+
+        # if the artificial variable is basic, pivot the row so that it becomes non-basic
+        basic_row = self._rows.pop(art, None)
+        if basic_row is not None:
+            if not basic_row.cells:
+                return success
+
+            entering = self._any_pivotable_symbol(basic_row)
+            if entering is None:
+                return False
+
+            basic_row.solve_for_ex(art, entering)
+            self._substitute(entering, basic_row)
+            self._rows[entering] = basic_row
+
+        # remove the artificial variable from the tableau
+        for row_ in self._rows.values():
+            row_.remove(art)
+        self._objective.remove(art)
+
+        return success
+
+    def _substitute(self, symbol: _Symbol, row: _Row):
+        for symbol_, row_ in self._rows.items():
+            row_.substitute(symbol, row)
+            if symbol_.kind != EXTERNAL and row_.constant < 0:
+                self._infeasible_rows.append(symbol_)
+
+        self._objective.substitute(symbol, row)
+        if self._artificial is not None:
+            self._artificial.substitute(symbol, row)
+
+    def _optimize(self, objective: _Row):
+        while True:
+            entering = self._get_entering_symbol(objective)
+            if entering is None:
+                return
+
+            leaving = self._get_leaving_symbol(entering)
+            if leaving is None:
+                raise InternalSolverError("The objective is unbounded")
+
+            row = self._rows.pop(leaving)
+            row.solve_for_ex(leaving, entering)
+            self._substitute(entering, row)
+            self._rows[entering] = row
+
+    def _dual_optimize(self):
+        while self._infeasible_rows:
+            leaving = self._infeasible_rows.pop()
+            row = self._rows.get(leaving)
+            if row is None or near_zero(row.constant) or row.constant >= 0:
+                continue
+
+            entering = self._get_dual_entering_symbol(row)
+            if entering is None:
+                raise InternalSolverError("Dual optimize failed")
+
+            del self._rows[leaving]
+            row.solve_for_ex(leaving, entering)
+            self._substitute(entering, row)
+            self._rows[entering] = row
+
+    @staticmethod
+    def _get_entering_symbol(objective: _Row) -> _Symbol | None:
+        for symbol, coefficient in objective.cells.items():
+            if symbol.kind != DUMMY and coefficient < 0:
+                return symbol
+        return None
+
+    def _get_dual_entering_symbol(self, row: _Row) -> _Symbol | None:
+        entering = None
+        ratio = float("inf")
+        for symbol, coefficient in row.cells.items():
+            if coefficient > 0 and symbol.kind != DUMMY:
+                ratio_ = self._objective.coefficient_for(symbol) / coefficient
+                if ratio_ < ratio:
+                    ratio = ratio_
+                    entering = symbol
+        return entering
+
+    @staticmethod
+    def _any_pivotable_symbol(row: _Row) -> _Symbol | None:
+        for symbol in row.cells:
+            if symbol.kind in (SLACK, ERROR):
+                return symbol
+        return None
+
+    def _get_leaving_symbol(self, entering: _Symbol) -> _Symbol | None:
+        ratio = float("inf")
+        found = None
+        for symbol, row in self._rows.items():
+            if symbol.kind == EXTERNAL:
+                continue
+
+            coefficient = row.coefficient_for(entering)
+            if coefficient < 0:
+                ratio_ = -row.constant / coefficient
+                if ratio_ < ratio:
+                    ratio = ratio_
+                    found = symbol
+        return found
+
+    def _get_marker_leaving_symbol(self, marker: _Symbol) -> _Symbol | None:
+        ratio_1 = ratio_2 = float("inf")
+        first = second = third = None
+        for symbol, row in self._rows.items():
+            coefficient = row.coefficient_for(marker)
+            if coefficient == 0:
+                continue
+
+            if symbol.kind == EXTERNAL:
+                third = symbol
+            elif coefficient < 0:
+                ratio = -row.constant / coefficient
+                if ratio < ratio_1:
+                    ratio_1 = ratio
+                    first = symbol
+            else:
+                ratio = row.constant / coefficient
+                if ratio < ratio_2:
+                    ratio_2 = ratio
+                    second = symbol
+
+        return first or second or third
+
+    def _remove_constraint_effects(self, constraint: Constraint, tag: _Tag):
+        for marker in (tag.marker, tag.other):
+            if marker is not None and marker.kind == ERROR:
+                if marker in self._rows:
+                    self._objective.insert_row(self._rows[marker], -constraint.strength)
+                else:
+                    self._objective.insert_symbol(marker, -constraint.strength)
+
+
+class _Entry:
+    """One sympy constraint of a widget and the solver constraint it currently maps to."""
+    __slots__ = "relation", "strength", "bound", "constraint"
+
+    def __init__(self, relation, strength: float):
+        self.relation = relation
+        self.strength = strength
+        # parameters whose current value is baked into the solver constraint
+        self.bound: set[Symbol] = set()
+        self.constraint: Constraint | None = None
+
+
+class CassowaryLayout:
+    """Maintains a cassowary Solver for the constraints of a Window.
+
+    Widget symbols become solver variables. Every other symbol (window parameters, animated variables, ...) is a
+    parameter: if it only appears linearly, it becomes an edit variable that is updated by suggesting a new value.
+    Parameters that are multiplied with something else (e.g. ``width_percent(animated_var)``) can't be represented by
+    a linear solver, so their current value is substituted and only the affected constraints are replaced when it
+    changes."""
+
+    def __init__(self, edit_strength: float = STRONG):
+        self.solver = Solver()
+        self.edit_strength = edit_strength
+
+        self.unknowns: set[Symbol] = set()
+        self.variables: dict[Symbol, Variable] = {}
+        self.values: dict[Symbol, float] = {}
+
+        self.entries: dict[object, list[_Entry]] = {}
+        self.dependents: dict[Symbol, set[_Entry]] = defaultdict(set)
+        # the parameters that are renamed for the constraints of one owner only, see set_constraints
+        self.private: dict[object, dict[Symbol, Symbol]] = {}
+
+        self.changed = False
+
+    def add_unknowns(self, symbols: Iterable[Symbol]):
+        self.unknowns.update(symbols)
+
+    def remove_unknowns(self, symbols: Iterable[Symbol]):
+        """Forgets unknowns whose constraints were removed."""
+        for symbol in symbols:
+            self.unknowns.discard(symbol)
+            self.variables.pop(symbol, None)
+
+    def variable(self, symbol: Symbol) -> Variable:
+        if symbol not in self.variables:
+            self.variables[symbol] = Variable(symbol.name)
+
+            if symbol not in self.unknowns:
+                self.solver.add_edit_variable(self.variables[symbol], self.edit_strength)
+                self.solver.suggest_value(self.variables[symbol], self.values.get(symbol, 0.))
+        return self.variables[symbol]
+
+    def value(self, symbol: Symbol) -> float:
+        variable = self.variables.get(symbol)
+        return 0. if variable is None else variable.value
+
+    def set_constraints(self, owner, relations: Sequence, private: Iterable[Symbol] = ()):
+        """Replaces the constraints of ``owner``. Only these are removed from and added to the solver.
+
+        :arg private parameters that have their own value in the constraints of ``owner``, e.g. its animated
+        variables, see update
+        """
+        for entry in self.entries.pop(owner, ()):
+            self._remove(entry)
+
+        renamed = self.private.setdefault(owner, {})
+        for symbol in private:
+            if symbol not in renamed:
+                renamed[symbol] = Dummy(symbol.name)
+        if renamed:
+            relations = [relation.subs(renamed) for relation in relations]
+
+        entries = []
+        try:
+            for relation in relations:
+                entry = _Entry(*_unwrap(relation))
+                self._add(entry)
+                entries.append(entry)
+        except SolverException:
+            for entry in entries:
+                self._remove(entry)
+            raise
+
+        self.entries[owner] = entries
+
+    def remove(self, owner):
+        for entry in self.entries.pop(owner, ()):
+            self._remove(entry)
+
+        for symbol in self.private.pop(owner, {}).values():
+            variable = self.variables.pop(symbol, None)
+            if variable is not None and self.solver.has_edit_variable(variable):
+                self.solver.remove_edit_variable(variable)
+            self.values.pop(symbol, None)
+
+    def update(self, values: dict[Symbol, float], private: dict[object, dict[Symbol, float]] | None = None) -> bool:
+        """Feeds new parameter values into the solver. Returns whether any of them changed.
+
+        :arg private the values of the private parameters of each owner, see set_constraints
+        """
+        values = dict(values)
+        for owner, owner_values in (private or {}).items():
+            renamed = self.private.get(owner, {})
+            values.update((renamed[symbol], value) for symbol, value in owner_values.items() if symbol in renamed)
+
+        for symbol, value in values.items():
+            if self.values.get(symbol) == value:
+                continue
+
+            self.values[symbol] = value
+            self.changed = True
+
+            variable = self.variables.get(symbol)
+            if variable is not None and self.solver.has_edit_variable(variable):
+                self.solver.suggest_value(variable, value)
+
+            for entry in list(self.dependents.get(symbol, ())):
+                self._remove(entry)
+                self._add(entry)
+
+        changed = self.changed
+        if changed:
+            self.solver.update_variables()
+            self.changed = False
+        return changed
+
+    def _add(self, entry: _Entry):
+        relation = entry.relation
+
+        if isinstance(relation, BooleanTrue):
+            return
+        if isinstance(relation, BooleanFalse):
+            raise UnsatisfiableConstraint(relation)
+
+        op = {"==": "==", "<=": "<=", "<": "<=", ">=": ">=", ">": ">="}[relation.rel_op]
+
+        terms: dict[Variable, float] = {}
+        constant = 0.
+        for term, coefficient in expand(relation.lhs - relation.rhs).as_coefficients_dict().items():
+            unknowns = term.free_symbols & self.unknowns
+            parameters = term.free_symbols - self.unknowns
+
+            if len(unknowns) > 1 or not coefficient.is_Number:
+                raise UnsatisfiableConstraint(f"{relation} is not linear")
+
+            coefficient = float(coefficient)
+            if unknowns:
+                symbol, = unknowns
+                if (term / symbol).has(symbol):
+                    raise UnsatisfiableConstraint(f"{relation} is not linear")
+                if parameters:
+                    entry.bound |= parameters
+                    coefficient = float(coefficient * (term / symbol).subs(self._parameter_values(parameters)))
+                terms[self.variable(symbol)] = terms.get(self.variable(symbol), 0.) + coefficient
+            elif term.is_Symbol:
+                terms[self.variable(term)] = terms.get(self.variable(term), 0.) + coefficient
+            elif parameters:
+                entry.bound |= parameters
+                constant += float(coefficient * term.subs(self._parameter_values(parameters)))
+            else:
+                constant += coefficient
+
+        constraint = Constraint(terms, constant, op, entry.strength)
+        try:
+            self.solver.add_constraint(constraint)
+        except SolverException:
+            entry.bound = set()
+            raise
+
+        entry.constraint = constraint
+        for symbol in entry.bound:
+            self.dependents[symbol].add(entry)
+        self.changed = True
+
+    def _remove(self, entry: _Entry):
+        for symbol in entry.bound:
+            self.dependents[symbol].discard(entry)
+        entry.bound = set()
+
+        if entry.constraint is not None:
+            self.solver.remove_constraint(entry.constraint)
+            entry.constraint = None
+            self.changed = True
+
+    def _parameter_values(self, parameters: set[Symbol]) -> dict[Symbol, float]:
+        return {parameter: self.values.get(parameter, 0.) for parameter in parameters}
+
+
+def _unwrap(relation) -> tuple[Expr, float]:
+    strength = getattr(relation, "strength", REQUIRED)
+    return getattr(relation, "constraint", relation), strength
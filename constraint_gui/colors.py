@@ -1,4 +1,9 @@
+import functools
 import random
+import time
+from typing import Callable
+
+import numpy as np
 
 
 def color(name: str):
@@ -566,3 +571,183 @@ colors = {
 }
 
 color_values = list(colors.values())
+
+
+# Oklab (https://bottosson.github.io/posts/oklab/), colors are interpolated there so that fades don't pass through
+# muddy or too dark in-between colors like in sRGB
+LINEAR_TO_LMS = np.array([[0.4122214708, 0.5363325363, 0.0514459929],
+                          [0.2119034982, 0.6806995451, 0.1073969566],
+                          [0.0883024619, 0.2817188376, 0.6299787005]])
+LMS_TO_OKLAB = np.array([[0.2104542553, 0.7936177850, -0.0040720468],
+                         [1.9779984951, -2.4285922050, 0.4505937099],
+                         [0.0259040371, 0.7827717662, -0.8086757660]])
+OKLAB_TO_LMS = np.linalg.inv(LMS_TO_OKLAB)
+LMS_TO_LINEAR = np.linalg.inv(LINEAR_TO_LMS)
+
+EASINGS: dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    "linear": lambda t: t,
+    "ease_in": lambda t: t * t,
+    "ease_out": lambda t: 1 - (1 - t) ** 2,
+    "ease_in_out": lambda t: t * t * (3 - 2 * t),
+}
+
+
+def rgba(color_: str | tuple) -> tuple[int, int, int, int]:
+    color_ = color(color_) if isinstance(color_, str) else tuple(color_)
+    return color_ + (255,) if len(color_) == 3 else color_
+
+
+@functools.cache
+def to_oklab(color_: tuple[int, ...]) -> tuple[float, float, float]:
+    srgb = np.array(color_[:3]) / 255
+    linear = np.where(srgb <= 0.04045, srgb / 12.92, ((srgb + 0.055) / 1.055) ** 2.4)
+    return tuple(LMS_TO_OKLAB @ np.cbrt(LINEAR_TO_LMS @ linear))
+
+
+def from_oklab(lab: np.ndarray) -> np.ndarray:
+    """Converts rows of Oklab colors to 8 bit sRGB."""
+    linear = np.clip((OKLAB_TO_LMS @ lab.T).T ** 3 @ LMS_TO_LINEAR.T, 0, 1)
+    srgb = np.where(linear <= 0.0031308, linear * 12.92, 1.055 * linear ** (1 / 2.4) - 0.055)
+    return np.rint(srgb * 255).astype(np.uint8)
+
+
+@functools.lru_cache(maxsize=1024)
+def transition_table(start: tuple[int, int, int, int], end: tuple[int, int, int, int], easing="ease_in_out",
+                     steps=64) -> np.ndarray:
+    """The colors of a fade from ``start`` to ``end`` (RGBA) at ``steps + 1`` evenly spaced points in time."""
+    t = EASINGS[easing](np.linspace(0, 1, steps + 1))[:, None]
+
+    table = np.empty((steps + 1, 4), dtype=np.uint8)
+    table[:, :3] = from_oklab(np.array(to_oklab(start)) * (1 - t) + np.array(to_oklab(end)) * t)
+    table[:, 3] = np.rint(start[3] * (1 - t[:, 0]) + end[3] * t[:, 0])
+    table[0], table[-1] = start, end
+    table.flags.writeable = False
+    return table
+
+
+class ColorTweens:
+    """Fades color attributes of widgets. The colors of each fade are looked up in a precomputed transition_table, all
+    running fades are advanced together once per frame and only widgets whose color changed are returned."""
+
+    def __init__(self, steps=64):
+        self.steps = steps
+
+        # the tables of the running fades, concatenated
+        self.lut = np.zeros((0, 4), dtype=np.uint8)
+        self.lut_offsets: dict[tuple, int] = {}
+
+        # one entry per running fade
+        self.targets: list[tuple[object, str, int]] = []
+        self.rows: dict[tuple[int, str], int] = {}
+        self.start_times = np.zeros(0)
+        self.durations = np.zeros(0)
+        self.offsets = np.zeros(0, dtype=np.intp)
+        self.loop = np.zeros(0, dtype=bool)
+        self.last = np.zeros((0, 4), dtype=np.uint8)
+        self.ends = np.zeros((0, 4), dtype=np.uint8)
+
+    @property
+    def active(self) -> bool:
+        return bool(self.targets)
+
+    def is_active(self, target, attribute: str) -> bool:
+        return (id(target), attribute) in self.rows
+
+    def end(self, target, attribute: str) -> tuple | None:
+        """The color a running fade ends at, None if there is none."""
+        row = self.rows.get((id(target), attribute))
+        if row is None:
+            return None
+        return tuple(self.ends[row, :self.targets[row][2]].tolist())
+
+    def table_offset(self, start: tuple, end: tuple, easing: str) -> int:
+        key = (start, end, easing)
+        if key not in self.lut_offsets:
+            self.lut_offsets[key] = len(self.lut)
+            self.lut = np.concatenate((self.lut, transition_table(start, end, easing, self.steps)))
+        return self.lut_offsets[key]
+
+    def start(self, target, attribute: str, end: str | tuple, start: str | tuple | None = None, duration=.2,
+              easing="ease_in_out", loop=False, now: float | None = None):
+        """Fades ``target.attribute`` to ``end`` over ``duration`` seconds.
+
+        :arg start the color to start from, the current value of the attribute by default
+        :arg loop fade back and forth until stop() is called, e.g. for a pulse
+        """
+        # the attribute gets as many channels as ``end`` has
+        channels = len(color(end) if isinstance(end, str) else end)
+        start = rgba(getattr(target, attribute) if start is None else start)
+        end = rgba(end)
+        now = time.perf_counter() if now is None else now
+
+        self.stop(target, attribute)
+
+        self.rows[(id(target), attribute)] = len(self.targets)
+        self.targets.append((target, attribute, channels))
+        self.start_times = np.append(self.start_times, now)
+        self.durations = np.append(self.durations, max(duration, 1e-9))
+        self.offsets = np.append(self.offsets, self.table_offset(start, end, easing))
+        self.loop = np.append(self.loop, loop)
+        self.last = np.concatenate((self.last, [start]))
+        self.ends = np.concatenate((self.ends, [end]))
+        setattr(target, attribute, start[:channels])
+
+    def stop(self, target, attribute: str):
+        """Stops a fade where it is."""
+        row = self.rows.get((id(target), attribute))
+        if row is not None:
+            keep = np.ones(len(self.targets), dtype=bool)
+            keep[row] = False
+            self.remove(keep)
+
+    def stop_targets(self, targets: set):
+        """Stops all fades of ``targets``, e.g. of destroyed widgets."""
+        keep = np.array([target not in targets for target, _, _ in self.targets], dtype=bool)
+        if not keep.all():
+            self.remove(keep)
+
+    def remove(self, keep: np.ndarray):
+        self.targets = [target for target, kept in zip(self.targets, keep) if kept]
+        self.rows = {(id(target), attribute): row for row, (target, attribute, _) in enumerate(self.targets)}
+        self.start_times = self.start_times[keep]
+        self.durations = self.durations[keep]
+        self.offsets = self.offsets[keep]
+        self.loop = self.loop[keep]
+        self.last = self.last[keep]
+        self.ends = self.ends[keep]
+
+        if not self.targets:
+            # tables of finished fades would pile up otherwise
+            self.lut = self.lut[:0]
+            self.lut_offsets.clear()
+
+    def advance(self, now: float | None = None) -> list:
+        """Sets the attributes of all running fades to their color at ``now`` and returns the targets whose color
+        changed or whose fade finished, which may change what they show, e.g. Label.background."""
+        if not self.targets:
+            return []
+
+        now = time.perf_counter() if now is None else now
+        progress = (now - self.start_times) / self.durations
+        # back and forth for loops
+        bounced = progress % 2
+        bounced = np.where(bounced > 1, 2 - bounced, bounced)
+        progress = np.where(self.loop, bounced, np.clip(progress, 0, 1))
+
+        colors_ = self.lut[self.offsets + np.rint(progress * self.steps).astype(np.intp)]
+        differs = (colors_ != self.last).any(axis=1)
+        changed = np.flatnonzero(differs)
+        self.last[changed] = colors_[changed]
+
+        targets = []
+        for row in changed:
+            target, attribute, channels = self.targets[row]
+            setattr(target, attribute, tuple(colors_[row, :channels].tolist()))
+            targets.append(target)
+
+        finished = ~self.loop & (progress >= 1)
+        if finished.any():
+            targets.extend(self.targets[row][0] for row in np.flatnonzero(finished & ~differs))
+            self.remove(~finished)
+
+        return targets
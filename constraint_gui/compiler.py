@@ -0,0 +1,103 @@
+"""Compiles a layout ahead of time into a plain Python module, so that the app doesn't solve anything at startup.
+
+A layout module has a function that creates the widgets of a window::
+
+    def build(win):
+        pane = Label(win, win)
+        if win.solves_constraints:
+            from constraint_gui.constraints import left_inside, top_inside, bottom_inside, width_percent
+            pane.constraints = [left_inside(10), top_inside(10), bottom_inside(10), width_percent(.2)]
+
+``python -m constraint_gui.compiler app.layout app/layout_compiled.py`` runs it, solves the constraints and writes the
+solutions as straight-line arithmetic. The app then calls ``build(Window(precompiled="app.layout_compiled"))``. Checking
+``solves_constraints`` keeps sympy from being imported at all, the constraints would be ignored anyway. Set
+CONSTRAINT_GUI_HEADLESS=1 to compile on a machine without a display."""
+import argparse
+import contextlib
+import importlib
+import io
+from pathlib import Path
+
+from sympy import Symbol, cse, numbered_symbols
+from sympy.printing.pycode import pycode
+
+from . import Window, animated_solutions
+
+
+def compile_window(win: Window, source: str = "") -> str:
+    """The source of a layout module (see precompiled.py) with the solved layout of ``win``."""
+    if not win.wait_for_layout():
+        raise TimeoutError("The layout wasn't solved")
+
+    # placed widgets, e.g. the rows of a VirtualList, are positioned at runtime
+    widgets = sorted((widget for widget in win.widgets if not widget.placed), key=lambda widget: widget.widget_id)
+
+    # every widget gets its own animated values, like in Window.compile_layout
+    widget_expressions, animated = animated_solutions(widgets)
+    parameters = list(win.parameter_symbols) + list(animated.values())
+    arguments = [Symbol(f"p{i}") for i in range(len(parameters))]
+    substitutions = dict(zip(parameters, arguments))
+
+    expressions = [expr.xreplace(substitutions) for exprs in widget_expressions for expr in exprs]
+    replacements, reduced = cse(expressions, symbols=numbered_symbols("t"))
+
+    dependencies = []
+    for i in range(len(widgets)):
+        free_symbols = set().union(*(expressions[4 * i + j].free_symbols for j in range(4)))
+        dependencies.append(tuple(k for k, argument in enumerate(arguments) if argument in free_symbols))
+
+    lines = [
+        f'"""Layout of {source or "a window"}, generated by python -m constraint_gui.compiler. Don\'t edit it, compile '
+        f'it again instead."""',
+        "import math",
+        "",
+        "# the parameters of layout(): the window geometry and the layout parameters, then the animated variables by",
+        "# name and widget id",
+        f"PARAMETERS = {tuple(parameter.name for parameter in win.parameter_symbols)!r}",
+        f"ANIMATED = {tuple((getattr(var, 'name', var), widget.widget_id) for var, widget in animated)!r}",
+        "",
+        "# the widgets in the order layout() returns their x, y, width and height",
+        f"WIDGET_IDS = {tuple(widget.widget_id for widget in widgets)!r}",
+        "",
+        "# the indices of the parameters the geometry of each widget depends on",
+        f"DEPENDENCIES = {tuple(dependencies)!r}",
+        "",
+        "",
+        f"def layout({', '.join(map(str, arguments))}):",
+        *(f"    {symbol} = {pycode(expr)}" for symbol, expr in replacements),
+        "    return (",
+        *(f"        {', '.join(map(pycode, reduced[4 * i:4 * i + 4]))},  # {type(widget).__name__} {widget.widget_id}"
+          for i, widget in enumerate(widgets)),
+        "    )",
+        "",
+    ]
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m constraint_gui.compiler",
+                                     description="Solves a layout ahead of time and writes it as a Python module, "
+                                                 "see Window(precompiled=...).")
+    parser.add_argument("layout", help="module with a function that creates the widgets of a window")
+    parser.add_argument("output", help="where to write the compiled layout module")
+    parser.add_argument("--function", default="build", help="the function of the layout module, gets the Window")
+    args = parser.parse_args()
+
+    build = getattr(importlib.import_module(args.layout), args.function)
+
+    win = Window()
+    try:
+        build(win)
+
+        # solving prints the solutions of every widget
+        with contextlib.redirect_stdout(io.StringIO()):
+            source = compile_window(win, args.layout)
+    finally:
+        win.window.close()
+
+    Path(args.output).write_text(source)
+    print(f"Wrote the layout of {len(win.widgets)} widgets to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
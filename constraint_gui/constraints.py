@@ -1,8 +1,9 @@
-from sympy import Eq, Expr, Symbol
+from sympy import Eq, Ge, Le, Expr, Symbol
 
 from . import WIDGET_X, WIDGET_Y, WIDGET_WIDTH, WIDGET_HEIGHT, \
     RELATIVE_X, RELATIVE_Y, RELATIVE_WIDTH, RELATIVE_HEIGHT, \
     Widget
+from .cassowary import STRONG, MEDIUM, WEAK
 
 WIDGET_TOP_EDGE = WIDGET_Y + WIDGET_HEIGHT
 WIDGET_RIGHT_EDGE = WIDGET_X + WIDGET_WIDTH
@@ -51,6 +52,22 @@ def top_inside(pixels: float | Symbol = 10):
     return Eq(WIDGET_Y + WIDGET_HEIGHT, RELATIVE_Y + RELATIVE_HEIGHT - pixels)
 
 
+def min_width(pixels: float | Symbol):
+    return Ge(WIDGET_WIDTH, pixels)
+
+
+def max_width(pixels: float | Symbol):
+    return Le(WIDGET_WIDTH, pixels)
+
+
+def min_height(pixels: float | Symbol):
+    return Ge(WIDGET_HEIGHT, pixels)
+
+
+def max_height(pixels: float | Symbol):
+    return Le(WIDGET_HEIGHT, pixels)
+
+
 def over(widget: Widget, pixels: float | Symbol = 10):
     return Eq(WIDGET_Y, widget.top_edge + pixels)
 
@@ -79,3 +96,29 @@ def to(widget: Widget, constraint: Expr):
         RELATIVE_WIDTH: widget.width_expr,
         RELATIVE_HEIGHT: widget.height_expr
     })
+
+
+class Prioritized:
+    """A constraint that may be violated in favor of stronger ones. Only supported by the cassowary solver."""
+
+    def __init__(self, constraint: Expr, strength: float):
+        self.constraint = constraint
+        self.strength = strength
+
+    def subs(self, *args, **kwargs):
+        return Prioritized(self.constraint.subs(*args, **kwargs), self.strength)
+
+    def __repr__(self):
+        return f"Prioritized({self.constraint}, {self.strength})"
+
+
+def strong(constraint: Expr):
+    return Prioritized(constraint, STRONG)
+
+
+def medium(constraint: Expr):
+    return Prioritized(constraint, MEDIUM)
+
+
+def weak(constraint: Expr):
+    return Prioritized(constraint, WEAK)
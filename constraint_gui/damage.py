@@ -0,0 +1,57 @@
+import math
+
+import numpy as np
+
+from .store import WIDTH, HEIGHT
+
+# a region is (x0, y0, x1, y1) in whole pixels
+Region = tuple[int, int, int, int]
+
+
+def area(region: Region) -> int:
+    return (region[2] - region[0]) * (region[3] - region[1])
+
+
+def union(a: Region, b: Region) -> Region:
+    return min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])
+
+
+def touches(a: Region, b: Region) -> bool:
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+def insert(regions: list[Region], region: Region):
+    """Adds ``region`` to ``regions``, merging it with every region it touches."""
+    # merging can make the region touch others again
+    merged = True
+    while merged:
+        merged = False
+        for i, other in enumerate(regions):
+            if touches(region, other):
+                region = union(region, regions.pop(i))
+                merged = True
+                break
+
+    regions.append(region)
+
+
+def merge_damage(rectangles: np.ndarray, width: int, height: int, max_regions: int = 8, padding: int = 1) \
+        -> list[Region]:
+    """Merges damaged rectangles (rows of x, y, width, height) into at most ``max_regions`` regions that don't touch
+    each other, clipped to the window. Rectangles are padded by ``padding`` pixels for anti-aliased edges."""
+    regions: list[Region] = []
+
+    for x, y, w, h in rectangles[(rectangles[:, WIDTH] > 0) & (rectangles[:, HEIGHT] > 0)]:
+        region = (max(math.floor(x) - padding, 0), max(math.floor(y) - padding, 0),
+                  min(math.ceil(x + w) + padding, width), min(math.ceil(y + h) + padding, height))
+        if region[0] < region[2] and region[1] < region[3]:
+            insert(regions, region)
+
+    while len(regions) > max_regions:
+        # merge the pair that wastes the least area
+        _, i, j = min((area(union(a, b)) - area(a) - area(b), i, j)
+                      for i, a in enumerate(regions) for j, b in enumerate(regions) if i < j)
+        b = regions.pop(j)
+        insert(regions, union(regions.pop(i), b))
+
+    return regions
@@ -0,0 +1,188 @@
+"""Finds out why a constraint system has no unique solution without solving it.
+
+A maximum matching of equations to unknowns (see partition.py) gives the structure: unknowns that can't be matched,
+and all unknowns that could take their place, are underdetermined. An equation that can't be matched, together with
+the equations that determine its unknowns, is overdetermined. Whether such a set conflicts or is merely redundant is
+decided numerically if it is linear. Structurally sound blocks can still be numerically singular, e.g.
+x + w = 10 and 2x + 2w = 20, those are found with the rank of each block."""
+from collections import defaultdict
+from typing import Iterable, Sequence
+
+import numpy as np
+from sympy import Eq, Symbol
+
+from .linear import EPSILON, LinearSystem
+from .partition import incidence, maximum_matching, partition
+
+
+class Diagnosis:
+    def __init__(self):
+        # unknowns that the constraints leave free
+        self.underdetermined: list[Symbol] = []
+        # sets of constraints that contradict each other, each as small as the structure allows
+        self.conflicts: list[list[Eq]] = []
+        # constraints that follow from others, harmless
+        self.redundant: list[Eq] = []
+        # overdetermined sets that aren't linear, sympy has to decide those
+        self.undecided: list[list[Eq]] = []
+
+    def __bool__(self):
+        """Whether the system can't have a unique solution."""
+        return bool(self.underdetermined or self.conflicts)
+
+    def report(self, widgets: Iterable = (), names: dict[str, str] | None = None) -> str:
+        """Describes the problems, naming widgets by their id or, if they are given, by class and id.
+
+        :arg names the names of the widgets instead, see widget_names. For a solve that can't get the widgets
+        """
+        names = widget_names(widgets) if names is None else names
+
+        lines = []
+        if self.underdetermined:
+            by_widget = defaultdict(list)
+            for symbol in self.underdetermined:
+                by_widget[widget_of(symbol)].append(symbol)
+
+            lines.append(f"{len(self.underdetermined)} unknowns of {len(by_widget)} widgets are underdetermined, "
+                         f"they need more constraints:")
+            for widget_id, symbols in by_widget.items():
+                lines.append(f" {names.get(widget_id, f'widget {widget_id}')}: "
+                             f"{len(symbols)} degrees of freedom ({', '.join(map(str, symbols))})")
+
+        for conflict in self.conflicts:
+            lines.append(f"{len(conflict)} constraints conflict, remove or change one of them:")
+            lines += (f" {equation}" for equation in conflict)
+
+        return "\n".join(lines) if lines else "The constraints have a unique solution."
+
+
+def widget_names(widgets: Iterable) -> dict[str, str]:
+    """Names of widgets by widget id for Diagnosis.report, e.g. "Label 3"."""
+    return {str(widget.widget_id): f"{type(widget).__name__} {widget.widget_id}" for widget in widgets}
+
+
+def widget_of(symbol: Symbol) -> str:
+    # see Widget.expr_params
+    return symbol.name.split("_", 1)[-1]
+
+
+def diagnose(equations: Sequence[Eq], unknowns: Sequence[Symbol], numeric_blocks=True) -> Diagnosis:
+    """:arg numeric_blocks also check the rank of the structurally sound blocks, which is only needed if solving
+    them failed"""
+    diagnosis = Diagnosis()
+
+    graph = incidence(equations, unknowns)
+    matched_equation = maximum_matching(graph, len(unknowns))
+    matched_unknown = [-1] * len(equations)
+    for unknown, equation in enumerate(matched_equation):
+        if equation != -1:
+            matched_unknown[equation] = unknown
+
+    containing = [[] for _ in unknowns]
+    for equation, row in enumerate(graph):
+        for unknown in row:
+            containing[unknown].append(equation)
+
+    # alternating paths from unmatched unknowns: every unknown they reach could be left free instead
+    underdetermined = {unknown for unknown, equation in enumerate(matched_equation) if equation == -1}
+    stack = list(underdetermined)
+    while stack:
+        for equation in containing[stack.pop()]:
+            unknown = matched_unknown[equation]
+            if unknown != -1 and unknown not in underdetermined:
+                underdetermined.add(unknown)
+                stack.append(unknown)
+    diagnosis.underdetermined = [unknowns[unknown] for unknown in sorted(underdetermined)]
+
+    overdetermined = set()
+    for extra, unknown in enumerate(matched_unknown):
+        if unknown != -1:
+            continue
+
+        # the equations that determine the unknowns of the extra one
+        closure = set()
+        stack = [extra]
+        while stack:
+            for unknown_ in graph[stack.pop()]:
+                equation = matched_equation[unknown_]
+                if equation not in closure:
+                    closure.add(equation)
+                    stack.append(equation)
+
+        overdetermined |= closure
+        overdetermined.add(extra)
+        check_overdetermined(diagnosis, [equations[i] for i in sorted(closure)],
+                             [unknowns[matched_unknown[i]] for i in sorted(closure)], equations[extra])
+
+    if numeric_blocks:
+        # the structurally square rest
+        rest = [equation for equation in range(len(equations)) if equation not in overdetermined
+                and matched_unknown[equation] != -1 and matched_unknown[equation] not in underdetermined]
+        for block in partition([equations[i] for i in rest], [unknowns[matched_unknown[i]] for i in rest]) or ():
+            if len(block) > 1:
+                check_block(diagnosis, block.equations, block.unknowns)
+
+    return diagnosis
+
+
+def linear_system(equations: Sequence[Eq], unknowns: Sequence[Symbol]) -> LinearSystem | None:
+    system = LinearSystem(unknowns)
+    for equation in equations:
+        if not system.add_equation(equation):
+            return None
+    return system
+
+
+def coefficients(system: LinearSystem) -> tuple[np.ndarray, np.ndarray]:
+    a = np.zeros(system.shape)
+    np.add.at(a, (system.rows, system.cols), system.values)
+    return a, system.rhs_matrix()
+
+
+def check_overdetermined(diagnosis: Diagnosis, closure: list[Eq], unknowns: list[Symbol], extra: Eq):
+    """``closure`` determines ``unknowns``, ``extra`` is one equation too many."""
+    system = linear_system([*closure, extra], unknowns)
+    if system is None:
+        diagnosis.undecided.append([*closure, extra])
+        return
+
+    a, b = coefficients(system)
+    # the closure is square, the extra equation is consistent if it follows from the solution of the others
+    try:
+        x = np.linalg.solve(a[:-1], b[:-1])
+    except np.linalg.LinAlgError:
+        check_block(diagnosis, [*closure, extra], unknowns)
+        return
+
+    residual = a[-1] @ x - b[-1]
+    if np.abs(residual).max(initial=0) > EPSILON * max(1., np.abs(b).max(initial=0)):
+        # only the equations whose unknowns the extra one actually uses
+        diagnosis.conflicts.append([*minimal_conflict(a, closure), extra])
+    else:
+        diagnosis.redundant.append(extra)
+
+
+def minimal_conflict(a: np.ndarray, closure: list[Eq]) -> list[Eq]:
+    """The equations of the closure with a nonzero weight in the combination that contradicts the extra (last)
+    equation."""
+    # y @ a[:-1] = a[-1], the extra equation as a combination of the others
+    y = np.linalg.solve(a[:-1].T, a[-1])
+    return [equation for equation, weight in zip(closure, y) if abs(weight) > EPSILON]
+
+
+def check_block(diagnosis: Diagnosis, equations: list[Eq], unknowns: list[Symbol]):
+    """Rank check of a structurally sound but possibly numerically singular set of equations."""
+    system = linear_system(equations, unknowns)
+    if system is None:
+        return
+
+    a, b = coefficients(system)
+    rank = np.linalg.matrix_rank(a)
+    if np.linalg.matrix_rank(np.hstack((a, b))) > rank:
+        diagnosis.conflicts.append(list(equations))
+
+    if rank < len(unknowns):
+        # the unknowns that move along the null space are free
+        null_space = np.linalg.svd(a)[2][rank:]
+        diagnosis.underdetermined += [unknown for unknown, weights in zip(unknowns, np.abs(null_space).T)
+                                      if weights.max(initial=0) > EPSILON]
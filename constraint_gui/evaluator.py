@@ -0,0 +1,61 @@
+from typing import Sequence
+
+import numpy as np
+from sympy import Expr, S, Symbol, lambdify
+
+
+class LayoutEvaluator:
+    """Evaluates the solutions of all widgets of a window in one call.
+
+    Every solution is split into a sum of numeric coefficients times terms (``1``, ``Ww_window``,
+    ``Ww_window * w_animation``, ...). The distinct terms of all widgets are compiled into a single function with
+    common subexpression elimination, the coefficients form a sparse matrix, and the geometry of every widget is that
+    matrix times the evaluated terms."""
+
+    def __init__(self, expressions: Sequence[Sequence[Expr]], parameters: Sequence[Symbol]):
+        """
+        :arg expressions x, y, width and height of every widget, in terms of ``parameters``
+        """
+        self.parameters = tuple(parameters)
+        parameter_indices = {parameter: i for i, parameter in enumerate(self.parameters)}
+
+        terms: dict[Expr, int] = {}
+        term_parameters: list[list[int]] = []
+        rows, cols, coefficients = [], [], []
+
+        # dependencies[i, j] is set if the geometry of widget j depends on parameter i
+        self.dependencies = np.zeros((len(self.parameters), len(expressions)), dtype=bool)
+
+        for row, expr in enumerate(expr_ for widget_exprs in expressions for expr_ in widget_exprs):
+            for term, coefficient in S(expr).as_coefficients_dict().items():
+                if term not in terms:
+                    terms[term] = len(terms)
+                    term_parameters.append([parameter_indices[symbol] for symbol in term.free_symbols
+                                            if symbol in parameter_indices])
+
+                self.dependencies[term_parameters[terms[term]], row // 4] = True
+
+                rows.append(row)
+                cols.append(terms[term])
+                coefficients.append(float(coefficient))
+
+        self.terms = list(terms)
+        self.rows = np.array(rows, dtype=np.intp)
+        self.cols = np.array(cols, dtype=np.intp)
+        self.coefficients = np.array(coefficients)
+
+        self._terms = lambdify(self.parameters, self.terms, modules="math", cse=True)
+
+        self.geometry = np.zeros((len(expressions), 4))
+        self._flat = self.geometry.reshape(-1)
+
+    def __call__(self, *values: float) -> np.ndarray:
+        """Writes the geometry of all widgets into ``self.geometry`` (one row of x, y, width, height per widget, see
+        store.X, store.Y, ...)."""
+        terms = np.array(self._terms(*values), dtype=float)
+        self._flat[:] = np.bincount(self.rows, self.coefficients * terms[self.cols], minlength=self._flat.size)
+        return self.geometry
+
+    def affected(self, changed: np.ndarray) -> np.ndarray:
+        """Which widgets depend on the parameters in ``changed``, a boolean mask over the parameters."""
+        return self.dependencies[changed].any(axis=0)
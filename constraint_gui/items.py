@@ -0,0 +1,69 @@
+from collections import deque
+from typing import Any, Iterable
+
+
+class ItemSource:
+    """Random access to the items of a VirtualList. Sequence-like sources (anything with __len__ and __getitem__, e.g.
+    a list or a numpy array) are indexed directly. Other iterables are only advanced as far as the list has scrolled,
+    and only the last ``keep`` items pulled from them (or as many as are shown at once, if more) are kept. Items
+    before those are iterated again from the start if the iterable supports it, e.g. a dict view. A generator can't
+    go back, so the list doesn't scroll further up than the first item kept."""
+
+    def __init__(self, items: Iterable, keep: int = 1024):
+        if hasattr(items, "__len__") and hasattr(items, "__getitem__"):
+            self.items = items
+            self.iterable = self.iterator = None
+            self.restartable = False
+        else:
+            self.items = deque(maxlen=keep)
+            self.iterable = items
+            self.iterator = iter(items)
+            # iter() of an iterator, e.g. a generator, returns the iterator itself
+            self.restartable = self.iterator is not items
+        # the number of items pulled from the iterator since it was created
+        self.pulled = 0
+
+    @property
+    def exhausted(self) -> bool:
+        """Whether len() is the final number of items."""
+        return self.iterator is None
+
+    @property
+    def start(self) -> int:
+        """The index of the first item that is still available."""
+        return len(self) - len(self.items)
+
+    def fetch(self, count: int, start: int | None = None):
+        """Pulls items from the iterator until ``count`` are available or it is exhausted.
+
+        :arg start the first item that needs to stay available, None for only the last ``keep``
+        """
+        if self.iterable is None:
+            return
+
+        if start is not None:
+            if start < self.start and self.restartable:
+                self.items.clear()
+                self.iterator = iter(self.iterable)
+                self.pulled = 0
+
+            if count - start > self.items.maxlen:
+                self.items = deque(self.items, maxlen=count - start)
+
+        while self.iterator is not None and self.pulled < count:
+            try:
+                self.items.append(next(self.iterator))
+                self.pulled += 1
+            except StopIteration:
+                self.iterator = None
+
+    def __len__(self) -> int:
+        return len(self.items) if self.iterable is None else self.pulled
+
+    def __getitem__(self, index: int) -> Any:
+        if self.iterable is None:
+            return self.items[index]
+
+        if not self.start <= index < self.pulled:
+            raise IndexError(f"Item {index} isn't kept, only {self.start} to {self.pulled - 1}")
+        return self.items[index - self.start]
@@ -0,0 +1,37 @@
+"""Helpers to find out what keeps objects alive, e.g. destroyed widgets."""
+import gc
+import types
+from typing import Iterable
+
+
+def find_reference_path(root: object, targets: Iterable) -> list | None:
+    """A chain of references from ``root`` to one of ``targets``, None if there is none. Use it to check that a
+    window doesn't keep destroyed widgets alive, e.g. ``find_reference_path(win, widget.subtree())`` after
+    ``widget.destroy()``. Modules, classes and the globals of functions aren't followed, they lead to everything."""
+    targets = {id(target) for target in targets}
+    parents = {id(root): None}
+    objects = {id(root): root}
+    queue = [root]
+
+    for obj in queue:
+        if id(obj) in targets:
+            path = []
+            while obj is not None:
+                path.append(obj)
+                obj = objects.get(parents[id(obj)])
+            return path[::-1]
+
+        if isinstance(obj, (types.ModuleType, type)):
+            continue
+        if isinstance(obj, types.FunctionType):
+            referents = (*(obj.__closure__ or ()), *(obj.__defaults__ or ()))
+        else:
+            referents = gc.get_referents(obj)
+
+        for referent in referents:
+            if id(referent) not in parents:
+                parents[id(referent)] = id(obj)
+                objects[id(referent)] = referent
+                queue.append(referent)
+
+    return None
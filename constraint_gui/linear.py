@@ -0,0 +1,128 @@
+import warnings
+from typing import Iterable, Sequence
+
+import numpy as np
+from sympy import Eq, Expr, Float, S, Symbol, expand
+
+try:
+    from scipy.sparse import csc_matrix
+    from scipy.sparse.linalg import spsolve, MatrixRankWarning
+except ImportError:
+    csc_matrix = spsolve = MatrixRankWarning = None
+
+# coefficients smaller than this are rounding noise of the numeric solve
+EPSILON = 1e-9
+
+# below this many unknowns a dense solve is cheaper than setting up a sparse one
+SPARSE_THRESHOLD = 64
+
+
+class LinearSystem:
+    """A system of equations that is linear in the unknowns, stored as a sparse (COO) coefficient matrix. Everything
+    that doesn't contain an unknown (constants, window parameters, animated variables, ...) becomes a right-hand-side
+    column, so solving yields affine closed forms in those terms."""
+
+    def __init__(self, unknowns: Sequence[Symbol]):
+        self.unknowns = list(unknowns)
+        self.index = {unknown: i for i, unknown in enumerate(self.unknowns)}
+
+        self.rows: list[int] = []
+        self.cols: list[int] = []
+        self.values: list[float] = []
+
+        self.rhs_terms: list[Expr] = [S.One]
+        self.rhs_index: dict[Expr, int] = {S.One: 0}
+        self.rhs: list[dict[int, float]] = []
+
+    @property
+    def shape(self):
+        return len(self.rhs), len(self.unknowns)
+
+    def add_equation(self, equation: Eq) -> bool:
+        """Adds ``equation`` as a new row. Returns False if it isn't linear in the unknowns."""
+        if not isinstance(equation, Eq):
+            # sympy already evaluated it to true/false
+            return False
+
+        row = len(self.rhs)
+        rhs = {}
+
+        for term, coefficient in expand(equation.lhs - equation.rhs).as_coefficients_dict().items():
+            if not coefficient.is_Number:
+                return False
+
+            if term in self.index:
+                self.rows.append(row)
+                self.cols.append(self.index[term])
+                self.values.append(float(coefficient))
+            elif term.free_symbols & self.index.keys():
+                # product of an unknown with something else
+                return False
+            else:
+                if term not in self.rhs_index:
+                    self.rhs_index[term] = len(self.rhs_terms)
+                    self.rhs_terms.append(term)
+
+                column = self.rhs_index[term]
+                rhs[column] = rhs.get(column, 0.) - float(coefficient)
+
+        self.rhs.append(rhs)
+        return True
+
+    def rhs_matrix(self):
+        b = np.zeros((len(self.rhs), len(self.rhs_terms)))
+        for row, entries in enumerate(self.rhs):
+            for column, value in entries.items():
+                b[row, column] = value
+        return b
+
+    def solve(self) -> dict[Symbol, Expr] | None:
+        """Returns the unique solution as affine expressions in ``rhs_terms`` or None if there is none."""
+        n_rows, n_cols = self.shape
+        if n_rows != n_cols or not n_cols:
+            return None
+
+        b = self.rhs_matrix()
+
+        if spsolve is not None and n_cols >= SPARSE_THRESHOLD:
+            a = csc_matrix((self.values, (self.rows, self.cols)), shape=self.shape)
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", MatrixRankWarning)
+                x = spsolve(a, b)
+            x = np.asarray(x.toarray() if hasattr(x, "toarray") else x).reshape(n_cols, -1)
+            residual = a @ x - b
+        else:
+            a = np.zeros(self.shape)
+            np.add.at(a, (self.rows, self.cols), self.values)
+            try:
+                x = np.linalg.solve(a, b)
+            except np.linalg.LinAlgError:
+                return None
+            residual = a @ x - b
+
+        if not np.all(np.isfinite(x)) or np.abs(residual).max(initial=0) > EPSILON * max(1., np.abs(b).max()):
+            # singular or inconsistent
+            return None
+
+        return {unknown: self.to_expr(x[i]) for i, unknown in enumerate(self.unknowns)}
+
+    def to_expr(self, coefficients) -> Expr:
+        expr = S.Zero
+        for term, coefficient in zip(self.rhs_terms, coefficients):
+            if abs(coefficient) < EPSILON:
+                continue
+            coefficient = round(coefficient) if abs(coefficient - round(coefficient)) < EPSILON else coefficient
+            expr += Float(coefficient) * term if isinstance(coefficient, float) else coefficient * term
+        return expr
+
+
+def solve_linear(equations: Iterable[Eq], unknowns: Sequence[Symbol]) -> dict[Symbol, Expr] | None:
+    """Solves ``equations`` for ``unknowns`` numerically if they form a uniquely solvable linear system. Returns None
+    otherwise, so the caller can fall back to sympy."""
+    system = LinearSystem(unknowns)
+
+    for equation in equations:
+        if not system.add_equation(equation):
+            return None
+
+    return system.solve()
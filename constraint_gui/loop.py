@@ -0,0 +1,31 @@
+"""An event loop that only draws a Window when something changed, see Window(on_demand=True)."""
+import pyglet
+from pyglet.app import EventLoop
+
+
+class DemandEventLoop(EventLoop):
+    """Draws the registered Windows only if Window.needs_frame() and sleeps until the next event or scheduled
+    function otherwise. While a window keeps needing frames, e.g. for an active animation, it wakes up at
+    ``frame_rate``. Other pyglet windows are drawn when they are invalid, like with the default loop."""
+
+    def __init__(self, frame_rate: float = 60):
+        super().__init__()
+        self.frame_rate = frame_rate
+        self.windows = []
+
+    def idle(self):
+        dt = self.clock.update_time()
+        self.clock.call_scheduled_functions(dt)
+
+        demand = {win.window: win for win in self.windows}
+        for window in pyglet.app.windows:
+            win = demand.get(window)
+            if win.needs_frame() if win is not None else window.invalid:
+                window.switch_to()
+                window.dispatch_event("on_draw")
+                window.flip()
+
+        timeout = self.clock.get_sleep_time(True)
+        if any(win.needs_frame() for win in self.windows):
+            timeout = 1 / self.frame_rate if timeout is None else min(timeout, 1 / self.frame_rate)
+        return timeout
@@ -0,0 +1,224 @@
+"""Splits a system of equations into small blocks that can be solved one after another (block triangular form, as in
+the Dulmage-Mendelsohn decomposition)."""
+import time
+from typing import Callable, Sequence
+
+from sympy import Add, Eq, Expr, Symbol, expand
+
+
+class Block:
+    def __init__(self, equations: list[Eq], unknowns: list[Symbol], component: int):
+        self.equations = equations
+        self.unknowns = unknowns
+        # blocks with different components don't share any unknowns, directly or indirectly
+        self.component = component
+        self.solve_time: float | None = None
+
+    def __len__(self):
+        return len(self.unknowns)
+
+    def __repr__(self):
+        return f"Block(component={self.component}, unknowns={self.unknowns})"
+
+
+def incidence(equations: Sequence[Eq], unknowns: Sequence[Symbol]) -> list[list[int]]:
+    """Returns the indices of the unknowns that occur in each equation."""
+    index = {unknown: i for i, unknown in enumerate(unknowns)}
+    return [sorted(index[symbol] for symbol in equation.free_symbols if symbol in index) for equation in equations]
+
+
+def maximum_matching(graph: list[list[int]], n_unknowns: int) -> list[int]:
+    """Matches equations to unknowns with augmenting paths. Returns the matched equation of each unknown (or -1)."""
+    matched_equation = [-1] * n_unknowns
+    matched_unknown = [-1] * len(graph)
+
+    # cheap greedy start, most layout equations only have one unmatched unknown
+    for equation, unknowns in enumerate(graph):
+        for unknown in unknowns:
+            if matched_equation[unknown] == -1:
+                matched_equation[unknown] = equation
+                matched_unknown[equation] = unknown
+                break
+
+    for root, unknowns in enumerate(graph):
+        if matched_unknown[root] != -1:
+            continue
+
+        # iterative DFS for an augmenting path, parent maps an unknown to the equation it was reached from
+        parent = {}
+        stack = [(root, iter(graph[root]))]
+        while stack:
+            equation, candidates = stack[-1]
+            for unknown in candidates:
+                if unknown in parent:
+                    continue
+                parent[unknown] = equation
+
+                if matched_equation[unknown] == -1:
+                    # flip the path
+                    while unknown != -1:
+                        equation = parent[unknown]
+                        unknown, matched_unknown[equation] = matched_unknown[equation], unknown
+                        matched_equation[matched_unknown[equation]] = equation
+                    stack = []
+                    break
+
+                stack.append((matched_equation[unknown], iter(graph[matched_equation[unknown]])))
+                break
+            else:
+                stack.pop()
+
+    return matched_equation
+
+
+def strongly_connected_components(successors: list[list[int]]) -> list[list[int]]:
+    """Tarjan's algorithm (iterative). Components are returned in reverse topological order, i.e. every component
+    comes after all components it has edges to."""
+    index = [-1] * len(successors)
+    low = [0] * len(successors)
+    on_stack = [False] * len(successors)
+    stack = []
+    components = []
+    counter = 0
+
+    for root in range(len(successors)):
+        if index[root] != -1:
+            continue
+
+        work = [(root, 0)]
+        while work:
+            node, i = work.pop()
+            if i == 0:
+                index[node] = low[node] = counter
+                counter += 1
+                stack.append(node)
+                on_stack[node] = True
+
+            for j in range(i, len(successors[node])):
+                successor = successors[node][j]
+                if index[successor] == -1:
+                    work.append((node, j + 1))
+                    work.append((successor, 0))
+                    break
+                if on_stack[successor]:
+                    low[node] = min(low[node], index[successor])
+            else:
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+
+    return components
+
+
+def partition(equations: Sequence[Eq], unknowns: Sequence[Symbol]) -> list[Block] | None:
+    """Orders the system into blocks so that each block only depends on unknowns of earlier blocks. Returns None if
+    the system is structurally singular (under- or overdetermined), which has to be handled as a whole."""
+    if len(equations) != len(unknowns):
+        return None
+
+    graph = incidence(equations, unknowns)
+    matched_equation = maximum_matching(graph, len(unknowns))
+    if -1 in matched_equation:
+        return None
+
+    # equation i depends on equation j if it contains the unknown matched to j
+    successors = [[matched_equation[unknown] for unknown in row] for row in graph]
+
+    # union-find over equations for the connected components
+    roots = list(range(len(equations)))
+
+    def find(i):
+        while roots[i] != i:
+            roots[i] = roots[roots[i]]
+            i = roots[i]
+        return i
+
+    for equation, row in enumerate(successors):
+        for other in row:
+            roots[find(equation)] = find(other)
+
+    unknown_of = {matched: unknown for unknown, matched in enumerate(matched_equation)}
+
+    components: dict[int, int] = {}
+    blocks = []
+    for scc in strongly_connected_components(successors):
+        scc.sort()
+        component = components.setdefault(find(scc[0]), len(components))
+        blocks.append(Block([equations[i] for i in scc], [unknowns[unknown_of[i]] for i in scc], component))
+
+    return blocks
+
+
+def solve_single(equation: Eq, unknown: Symbol) -> Expr | None:
+    """Isolates ``unknown`` if ``equation`` is linear in it, which covers almost all blocks of a layout and is a lot
+    cheaper than a call to sympy.solve."""
+    if not isinstance(equation, Eq):
+        return None
+
+    expr = equation.lhs - equation.rhs
+    terms = expr.as_coefficients_dict()
+
+    if any(term != unknown and term.has(unknown) for term in terms):
+        # e.g. a product of sums, only expand if really needed since it is expensive
+        terms = expand(expr).as_coefficients_dict()
+        if any(term != unknown and term.has(unknown) for term in terms):
+            return None
+
+    coefficient = terms.pop(unknown, 0)
+    if coefficient == 0:
+        return None
+
+    return Add(*[-value / coefficient * term for term, value in terms.items()])
+
+
+def solve_blocks(blocks: Sequence[Block],
+                 solve_block: Callable[[list[Eq], list[Symbol]], dict[Symbol, Expr]]) -> dict[Symbol, Expr]:
+    """Solves the blocks in order and substitutes the solutions into the equations of later blocks."""
+    solutions: dict[Symbol, Expr] = {}
+
+    for block in blocks:
+        t = time.perf_counter()
+
+        equations = []
+        for equation in block.equations:
+            known = {symbol: solutions[symbol] for symbol in equation.free_symbols if symbol in solutions}
+            if known:
+                # substituting into Eq directly makes sympy try to decide the equality, which is very slow
+                equation = Eq((equation.lhs - equation.rhs).xreplace(known), 0, evaluate=False)
+            equations.append(equation)
+
+        solution = solve_single(equations[0], block.unknowns[0]) if len(block) == 1 else None
+        if solution is not None:
+            solutions[block.unknowns[0]] = solution
+        else:
+            solutions.update(solve_block(equations, block.unknowns))
+
+        block.solve_time = time.perf_counter() - t
+
+    return solutions
+
+
+def format_blocks(blocks: Sequence[Block]) -> str:
+    """A human-readable report of the block structure, largest blocks first."""
+    sizes = [len(block) for block in blocks]
+    lines = [f"{len(blocks)} blocks in {len({block.component for block in blocks})} independent components, "
+             f"largest block: {max(sizes, default=0)} unknowns"]
+
+    for block in sorted(blocks, key=len, reverse=True):
+        if len(block) == 1 and len(lines) > 1:
+            break
+        solve_time = "" if block.solve_time is None else f" solved in {block.solve_time * 1000:.2f} ms"
+        lines.append(f" component {block.component}: {len(block)} unknowns{solve_time}: "
+                     f"{', '.join(map(str, block.unknowns))}")
+
+    return "\n".join(lines)
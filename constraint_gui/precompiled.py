@@ -0,0 +1,27 @@
+from types import ModuleType
+
+import numpy as np
+
+
+class PrecompiledLayout:
+    """Evaluates a layout module written by ``python -m constraint_gui.compiler``. The counterpart of LayoutEvaluator
+    that needs neither sympy nor a solve."""
+
+    def __init__(self, module: ModuleType):
+        self.module = module
+        self.parameters = tuple(module.PARAMETERS) + tuple(module.ANIMATED)
+
+        # dependencies[i, j] is set if the geometry of widget j depends on parameter i
+        self.dependencies = np.zeros((len(self.parameters), len(module.WIDGET_IDS)), dtype=bool)
+        for widget, parameters in enumerate(module.DEPENDENCIES):
+            self.dependencies[list(parameters), widget] = True
+
+        self.geometry = np.zeros((len(module.WIDGET_IDS), 4))
+        self._flat = self.geometry.reshape(-1)
+
+    def __call__(self, *values: float) -> np.ndarray:
+        self._flat[:] = self.module.layout(*values)
+        return self.geometry
+
+    def affected(self, changed: np.ndarray) -> np.ndarray:
+        return self.dependencies[changed].any(axis=0)
@@ -0,0 +1,204 @@
+import json
+import time
+import tracemalloc
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+
+
+class Event(NamedTuple):
+    frame: int
+    name: str
+    start: float
+    duration: float
+    # net change of traced memory in bytes, 0 unless the profiler tracks memory
+    memory: int
+    # how many calls were summed up into this event, see FrameProfiler.accumulate
+    calls: int
+
+
+class Phase:
+    """Context manager that records the time spent inside it. Reused for every occurrence of the phase."""
+    __slots__ = "profiler", "name"
+
+    def __init__(self, profiler: "FrameProfiler", name: int):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler.stack.append((time.perf_counter(), self.profiler.traced_memory()))
+
+    def __exit__(self, *exc_info):
+        start, memory = self.profiler.stack.pop()
+        self.profiler.record(self.name, start, time.perf_counter() - start, self.profiler.traced_memory() - memory)
+
+
+class FramePhase(Phase):
+    __slots__ = ()
+
+    def __exit__(self, *exc_info):
+        self.profiler.flush_accumulated()
+        super().__exit__(*exc_info)
+        self.profiler.frame += 1
+
+
+class FrameProfiler:
+    """Records how long each phase of a frame took into a ring buffer of the last ``capacity`` events.
+
+    Pass it to ``Window(profiler=...)``. The window records the phases "frame", "solve", "compile", "update", "colors",
+    "draw", "batch.draw" and "events" and sums up the draw_self calls of each widget class per frame
+    ("draw_self Label", ...).
+    Use summary() or report() for percentiles, slowest_frames() and breakdown() to find out where a slow frame went,
+    and export_chrome_trace() to look at it in chrome://tracing or Perfetto."""
+
+    def __init__(self, capacity: int = 65536, track_memory: bool = False):
+        """
+        :arg track_memory also record the net memory allocated in each phase, using tracemalloc. Slows everything
+        down considerably.
+        """
+        self.capacity = capacity
+        self.track_memory = track_memory
+        if track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+        self.names: list[str] = []
+        self.phases: dict[str, Phase] = {}
+
+        self.frames = np.zeros(capacity, dtype=np.int64)
+        self.name_ids = np.zeros(capacity, dtype=np.int32)
+        self.starts = np.zeros(capacity)
+        self.durations = np.zeros(capacity)
+        self.memory = np.zeros(capacity, dtype=np.int64)
+        self.calls = np.zeros(capacity, dtype=np.int64)
+
+        # number of events recorded so far, the ring buffer keeps the last capacity of them
+        self.count = 0
+        self.frame = 0
+
+        self.stack: list[tuple[float, int]] = []
+        # name -> [first start, total duration, calls] of the current frame
+        self.accumulated: dict[str, list] = {}
+
+    def name_id(self, name: str) -> int:
+        if name not in self.phases:
+            self.phases[name] = (FramePhase if name == "frame" else Phase)(self, len(self.names))
+            self.names.append(name)
+        return self.phases[name].name
+
+    def phase(self, name: str) -> Phase:
+        """``with profiler.phase("layout"): ...`` records the time spent in the block. The phase "frame" also closes
+        the current frame."""
+        self.name_id(name)
+        return self.phases[name]
+
+    def traced_memory(self) -> int:
+        return tracemalloc.get_traced_memory()[0] if self.track_memory else 0
+
+    def record(self, name: int, start: float, duration: float, memory: int = 0, calls: int = 1):
+        i = self.count % self.capacity
+        self.frames[i] = self.frame
+        self.name_ids[i] = name
+        self.starts[i] = start
+        self.durations[i] = duration
+        self.memory[i] = memory
+        self.calls[i] = calls
+        self.count += 1
+
+    def accumulate(self, name: str, start: float):
+        """Adds the time since ``start`` to the total of ``name`` in the current frame. For things that happen too
+        often to be recorded one by one."""
+        duration = time.perf_counter() - start
+        entry = self.accumulated.get(name)
+        if entry is None:
+            self.accumulated[name] = [start, duration, 1]
+        else:
+            entry[1] += duration
+            entry[2] += 1
+
+    def flush_accumulated(self):
+        for name, (start, duration, calls) in self.accumulated.items():
+            self.record(self.name_id(name), start, duration, calls=calls)
+        self.accumulated.clear()
+
+    def order(self) -> np.ndarray:
+        """Ring buffer positions of the recorded events, oldest first."""
+        return np.arange(max(self.count - self.capacity, 0), self.count) % self.capacity
+
+    def events(self) -> list[Event]:
+        return [Event(int(self.frames[i]), self.names[self.name_ids[i]], float(self.starts[i]),
+                      float(self.durations[i]), int(self.memory[i]), int(self.calls[i])) for i in self.order()]
+
+    def summary(self, percentiles: tuple[float, ...] = (50, 90, 99)) -> dict[str, dict[str, float]]:
+        """Statistics of the duration (in seconds) of each phase over the recorded events."""
+        order = self.order()
+        name_ids = self.name_ids[order]
+
+        summary = {}
+        for name_id in np.unique(name_ids):
+            selected = order[name_ids == name_id]
+            durations = self.durations[selected]
+
+            stats = {"count": len(durations), "mean": float(durations.mean()), "max": float(durations.max())}
+            stats.update({f"p{p:g}": float(value) for p, value in zip(percentiles,
+                                                                      np.percentile(durations, percentiles))})
+            if self.track_memory:
+                stats["memory"] = float(self.memory[selected].mean())
+            summary[self.names[name_id]] = stats
+
+        return summary
+
+    def report(self, percentiles: tuple[float, ...] = (50, 90, 99)) -> str:
+        summary = self.summary(percentiles)
+        columns = ["count", "mean", *(f"p{p:g}" for p in percentiles), "max"]
+        width = max(map(len, summary), default=0)
+
+        lines = [f"{'phase':<{width}} " + " ".join(f"{column:>10}" for column in columns)
+                 + (" memory (B)" if self.track_memory else "")]
+        for name, stats in sorted(summary.items(), key=lambda item: -item[1]["mean"] * item[1]["count"]):
+            line = f"{name:<{width}} {stats['count']:>10}" + "".join(f" {stats[column] * 1000:>7.3f} ms"
+                                                                    for column in columns[1:])
+            if self.track_memory:
+                line += f" {stats['memory']:>10.0f}"
+            lines.append(line)
+
+        return "\n".join(lines)
+
+    def slowest_frames(self, count: int = 5) -> list[tuple[int, float]]:
+        """Frame numbers and durations of the slowest recorded frames."""
+        order = self.order()
+        frames = order[self.name_ids[order] == self.name_id("frame")]
+        frames = frames[np.argsort(-self.durations[frames])[:count]]
+        return [(int(self.frames[i]), float(self.durations[i])) for i in frames]
+
+    def breakdown(self, frame: int) -> dict[str, float]:
+        """Total duration of each phase in ``frame``."""
+        breakdown: dict[str, float] = {}
+        for event in self.events():
+            if event.frame == frame:
+                breakdown[event.name] = breakdown.get(event.name, 0.) + event.duration
+        return breakdown
+
+    def chrome_trace(self) -> dict:
+        """The recorded events in the Chrome trace event format. Accumulated events start at their first call and
+        last as long as all calls together."""
+        return {
+            "displayTimeUnit": "ms",
+            "traceEvents": [{
+                "name": event.name,
+                "ph": "X",
+                "ts": event.start * 1e6,
+                "dur": event.duration * 1e6,
+                "pid": 0,
+                "tid": 0,
+                "args": {"frame": event.frame, "calls": event.calls, "memory": event.memory},
+            } for event in self.events()],
+        }
+
+    def export_chrome_trace(self, path: str | Path):
+        with open(path, "w") as file:
+            json.dump(self.chrome_trace(), file)
+
+    def clear(self):
+        self.count = 0
+        self.accumulated.clear()
@@ -0,0 +1,93 @@
+import numpy as np
+
+from .store import X, Y, WIDTH, HEIGHT
+
+
+class GridIndex:
+    """Uniform grid over widget rectangles for hit testing.
+
+    Every rectangle is registered in all cells it overlaps. Cells are stored as a sorted array of cell keys, so a lookup
+    is a binary search plus a check of the few rectangles in that cell. Rectangles that would cover more than
+    ``max_cells`` cells (backgrounds, containers) are kept in a separate list that is checked on every lookup instead,
+    which keeps rebuilding cheap."""
+
+    def __init__(self, cell_size: float = 64., max_cells: int = 64):
+        self.cell_size = cell_size
+        self.max_cells = max_cells
+
+        self.ids = np.zeros(0, dtype=np.intp)
+        self.geometry = np.zeros((0, 4))
+        self.priority = np.zeros(0, dtype=np.int64)
+
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.entries = np.zeros(0, dtype=np.intp)
+        self.large = np.zeros(0, dtype=np.intp)
+
+    def cell_key(self, cx, cy):
+        # cell coordinates are signed, shift them into 32 bits each
+        return (np.asarray(cy, dtype=np.int64) + 2 ** 31) << 32 | (np.asarray(cx, dtype=np.int64) + 2 ** 31)
+
+    def rebuild(self, ids: np.ndarray, geometry: np.ndarray, priority: np.ndarray):
+        """
+        :arg ids what query returns for each rectangle, e.g. store indices
+        :arg geometry x, y, width, height of each rectangle
+        :arg priority of overlapping rectangles, the one with the highest priority is hit
+        """
+        self.ids = ids
+        self.geometry = geometry
+        self.priority = priority
+
+        x0 = np.floor(geometry[:, X] / self.cell_size).astype(np.int64)
+        y0 = np.floor(geometry[:, Y] / self.cell_size).astype(np.int64)
+        columns = np.floor((geometry[:, X] + geometry[:, WIDTH]) / self.cell_size).astype(np.int64) - x0 + 1
+        rows = np.floor((geometry[:, Y] + geometry[:, HEIGHT]) / self.cell_size).astype(np.int64) - y0 + 1
+
+        # rectangles with a negative size can't be hit
+        counts = np.where((geometry[:, WIDTH] > 0) & (geometry[:, HEIGHT] > 0), columns * rows, 0)
+
+        large = counts > self.max_cells
+        self.large = np.flatnonzero(large)
+        counts[large] = 0
+
+        entries = np.repeat(np.arange(len(ids)), counts)
+        # position of each entry among the cells of its rectangle
+        offsets = np.arange(len(entries)) - np.repeat(np.cumsum(counts) - counts, counts)
+        keys = self.cell_key(x0[entries] + offsets % columns[entries], y0[entries] + offsets // columns[entries])
+
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.entries = entries[order]
+
+    def query(self, x: float, y: float) -> int | None:
+        """The id of the rectangle with the highest priority that contains (x, y), borders excluded."""
+        key = self.cell_key(int(np.floor(x / self.cell_size)), int(np.floor(y / self.cell_size)))
+        start, stop = np.searchsorted(self.keys, [key, key + 1])
+
+        candidates = np.concatenate((self.entries[start:stop], self.large))
+        geometry = self.geometry[candidates]
+        inside = ((geometry[:, X] < x) & (x < geometry[:, X] + geometry[:, WIDTH])
+                  & (geometry[:, Y] < y) & (y < geometry[:, Y] + geometry[:, HEIGHT]))
+
+        candidates = candidates[inside]
+        if not len(candidates):
+            return None
+
+        return int(self.ids[candidates[np.argmax(self.priority[candidates])]])
+
+    def overlapping(self, x0: float, y0: float, x1: float, y1: float) -> np.ndarray:
+        """The ids of all rectangles that overlap the region from (x0, y0) to (x1, y1)."""
+        cx0, cx1 = int(np.floor(x0 / self.cell_size)), int(np.floor(x1 / self.cell_size))
+        cy0, cy1 = int(np.floor(y0 / self.cell_size)), int(np.floor(y1 / self.cell_size))
+
+        # the cells of a row have consecutive keys
+        cy = np.arange(cy0, cy1 + 1)
+        starts = np.searchsorted(self.keys, self.cell_key(cx0, cy))
+        stops = np.searchsorted(self.keys, self.cell_key(cx1, cy), side="right")
+
+        candidates = np.unique(np.concatenate([self.entries[start:stop] for start, stop in zip(starts, stops)]
+                                              + [self.large]))
+        geometry = self.geometry[candidates]
+        overlaps = ((geometry[:, X] < x1) & (x0 < geometry[:, X] + geometry[:, WIDTH])
+                    & (geometry[:, Y] < y1) & (y0 < geometry[:, Y] + geometry[:, HEIGHT]))
+
+        return self.ids[candidates[overlaps]]
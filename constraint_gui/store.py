@@ -0,0 +1,131 @@
+import gc
+import tracemalloc
+from typing import Callable
+
+import numpy as np
+
+# the columns of GeometryStore.geometry
+X, Y, WIDTH, HEIGHT = range(4)
+
+
+class BitSet:
+    """A growable set of flags packed into a bytearray, eight per byte."""
+    __slots__ = "bits", "size"
+
+    def __init__(self, size: int = 0):
+        self.bits = bytearray((size + 7) // 8)
+        self.size = size
+
+    def resize(self, size: int):
+        self.bits.extend(bytes((size + 7) // 8 - len(self.bits)))
+        self.size = size
+
+    def __getitem__(self, index: int) -> bool:
+        return bool(self.bits[index >> 3] & (1 << (index & 7)))
+
+    def __setitem__(self, index: int, value: bool):
+        if value:
+            self.bits[index >> 3] |= 1 << (index & 7)
+        else:
+            self.bits[index >> 3] &= ~(1 << (index & 7)) & 0xFF
+
+    def any(self) -> bool:
+        return any(self.bits)
+
+    def clear(self):
+        self.bits[:] = bytes(len(self.bits))
+
+    def mask(self) -> np.ndarray:
+        return np.unpackbits(np.frombuffer(self.bits, dtype=np.uint8), bitorder="little")[:self.size].view(bool)
+
+    def indices(self) -> np.ndarray:
+        return np.flatnonzero(self.mask())
+
+    def set_many(self, indices: np.ndarray):
+        mask = np.zeros(len(self.bits) * 8, dtype=bool)
+        mask[:self.size] = self.mask()
+        mask[indices] = True
+        self.bits[:] = np.packbits(mask, bitorder="little").tobytes()
+
+
+class GeometryStore:
+    """Struct-of-arrays storage for the geometry and flags of all widgets of a window. Each widget owns one row
+    (Widget.index); Widget.x, Widget.needs_update, ... are views into it."""
+
+    def __init__(self, capacity: int = 64):
+        self.geometry = np.zeros((capacity, 4))
+        # memoryview indexing returns python floats and is faster than indexing the array
+        self.view = memoryview(self.geometry)
+        # where each widget was drawn last, to know which part of the screen it covered
+        self.drawn = np.zeros((capacity, 4))
+
+        self.needs_update = BitSet(capacity)
+        self.needs_redraw = BitSet(capacity)
+        self.hover = BitSet(capacity)
+
+        self.count = 0
+        self.free: list[int] = []
+
+    @property
+    def capacity(self) -> int:
+        return len(self.geometry)
+
+    def allocate(self) -> int:
+        if self.free:
+            index = self.free.pop()
+        else:
+            if self.count == self.capacity:
+                self.grow(2 * self.capacity)
+            index = self.count
+            self.count += 1
+
+        self.geometry[index] = 0
+        self.drawn[index] = 0
+        self.needs_update[index] = True
+        self.needs_redraw[index] = True
+        self.hover[index] = False
+        return index
+
+    def release(self, index: int):
+        self.needs_update[index] = False
+        self.needs_redraw[index] = False
+        self.hover[index] = False
+        self.free.append(index)
+
+    def grow(self, capacity: int):
+        self.view.release()
+
+        geometry = np.zeros((capacity, 4))
+        geometry[:len(self.geometry)] = self.geometry
+        self.geometry = geometry
+        self.view = memoryview(self.geometry)
+
+        drawn = np.zeros((capacity, 4))
+        drawn[:len(self.drawn)] = self.drawn
+        self.drawn = drawn
+
+        for flags in (self.needs_update, self.needs_redraw, self.hover):
+            flags.resize(capacity)
+
+
+def measure_memory_per_widget(create: Callable[[], object], count: int = 1000) -> float:
+    """Calls ``create`` ``count`` times and returns the average number of bytes that stay allocated per call. Use it
+    to keep track of how large widgets are, e.g. ``measure_memory_per_widget(lambda: Label(win, win))``."""
+    gc.collect()
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+
+    try:
+        before = tracemalloc.take_snapshot()
+        objects = [create() for _ in range(count)]
+        gc.collect()
+        after = tracemalloc.take_snapshot()
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    # don't count the list that keeps the objects alive
+    allocated -= objects.__sizeof__()
+    return allocated / count
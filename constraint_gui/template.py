@@ -0,0 +1,167 @@
+"""Solves the internal constraints of composite widgets once per shape instead of once per instance.
+
+The children of a composite (e.g. the box and the text of a CheckBox) are constrained relative to the composite and
+to each other. Renaming the symbols of the composite and its children to positional placeholders gives every
+instance of the same composite the same constraints, the template. It is solved once with the composite's geometry
+as parameters, and every instance only renames the placeholders back."""
+# the annotations are not evaluated, LayoutCache is only imported when a template is solved with one
+from __future__ import annotations
+
+from typing import Callable, Hashable, Sequence
+
+from sympy import Basic, Eq, Expr, Symbol
+
+TEMPLATE_PARENT = tuple(Symbol(f"T{name}_parent") for name in "xywh")
+
+
+def template_symbols(index: int) -> tuple[Symbol, ...]:
+    return tuple(Symbol(f"T{name}_{index}") for name in "xywh")
+
+
+class TemplateRequest:
+    """The template of one composite, see TemplateCache.request. Only holds sympy objects, so it can be solved on
+    another thread or process."""
+
+    def __init__(self, key: tuple, placeholders: dict[Symbol, Symbol], constraints: Sequence[Sequence[Eq]]):
+        self.key = key
+        self.placeholders = placeholders
+        self.constraints = constraints
+
+    def solve(self, solve: Callable[[list[Eq], list[Symbol]], dict[Symbol, Expr]],
+              layout_cache: LayoutCache | None = None) -> dict[Symbol, Expr] | None:
+        """Solves the template in terms of the placeholders, the value that TemplateCache stores for the key.
+
+        :arg layout_cache loads the template from there instead of solving it if it was solved in an earlier run, and
+        stores it otherwise
+        """
+        cache_key = None
+        if layout_cache is not None:
+            from .cache import template_hash
+
+            cache_key = template_hash(self.key)
+            template = layout_cache.get(cache_key)
+            if template is not None:
+                return template
+
+        template = solve_template([[constraint.xreplace(self.placeholders) for constraint in constraints_]
+                                   for constraints_ in self.constraints], len(self.constraints), solve)
+        if cache_key is not None and template is not None:
+            layout_cache.put(cache_key, template)
+        return template
+
+    def rename(self, template: dict[Symbol, Expr] | None) -> dict[Symbol, Expr] | None:
+        """The solutions of the composite's children from the solved template."""
+        if template is None:
+            return None
+
+        # only the unknowns are renamed, the solutions are substituted once the parent's are known
+        names = {placeholder: symbol for symbol, placeholder in self.placeholders.items()}
+        return {names[symbol]: expr for symbol, expr in template.items()}
+
+
+class TemplateCache:
+    """Solved templates by their constraints, None for templates that can't be solved on their own."""
+
+    def __init__(self):
+        self.templates: dict[tuple, dict[Symbol, Expr] | None] = {}
+
+        self.hits = 0
+        self.misses = 0
+
+    def request(self, parent: Sequence[Symbol], children: Sequence[Sequence[Symbol]],
+                constraints: Sequence[Sequence[Eq]]) -> TemplateRequest:
+        """Looks up the template of a composite without solving it, see TemplateCache.solve for the arguments."""
+        placeholders = dict(zip(parent, TEMPLATE_PARENT))
+        for i, symbols in enumerate(children):
+            placeholders.update(zip(symbols, template_symbols(i)))
+
+        # rebuilding the equations with xreplace would evaluate them again, which costs more than the lookup saves
+        key = tuple(tuple(structure(constraint, placeholders) for constraint in constraints_)
+                    for constraints_ in constraints)
+        return TemplateRequest(key, placeholders, constraints)
+
+    def solve(self, parent: Sequence[Symbol], children: Sequence[Sequence[Symbol]],
+              constraints: Sequence[Sequence[Eq]],
+              solve: Callable[[list[Eq], list[Symbol]], dict[Symbol, Expr]],
+              layout_cache: LayoutCache | None = None) -> dict[Symbol, Expr] | None:
+        """The solutions of the ``children`` symbols in terms of TEMPLATE_PARENT, which stands for the ``parent``
+        symbols. None if the children depend on anything else or aren't fully determined.
+
+        :arg constraints the constraints of each child
+        :arg solve solves a system for the given unknowns, e.g. constraint_gui.solve_system
+        :arg layout_cache persists the templates across runs, see TemplateRequest.solve
+        """
+        return self.solve_request(self.request(parent, children, constraints), solve, layout_cache)
+
+    def solve_request(self, request: TemplateRequest, solve: Callable[[list[Eq], list[Symbol]], dict[Symbol, Expr]],
+                      layout_cache: LayoutCache | None = None) -> dict[Symbol, Expr] | None:
+        if request.key in self.templates:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self.templates[request.key] = request.solve(solve, layout_cache)
+
+        return request.rename(self.templates[request.key])
+
+    def clear(self):
+        self.templates.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+def drop_referenced(templates: dict[Hashable, dict[Symbol, Expr]], children: dict[Hashable, Sequence[Hashable]],
+                    constraints: dict[Hashable, Sequence[Eq]]) -> dict[Hashable, dict[Symbol, Expr]]:
+    """Removes the templates of composites whose children are referred to by constraints outside of the templates,
+    they are left to the window's system.
+
+    :arg templates the solutions of the children by composite
+    :arg children the children of each composite
+    :arg constraints the constraints of every widget
+    """
+    while templates:
+        templated = {child for composite in templates for child in children[composite]}
+        free_symbols = set().union(*(constraint.free_symbols for widget, constraints_ in constraints.items()
+                                     if widget not in templated for constraint in constraints_))
+
+        referenced = [composite for composite, solutions in templates.items()
+                      if not free_symbols.isdisjoint(solutions)]
+        if not referenced:
+            break
+
+        for composite in referenced:
+            del templates[composite]
+
+    return templates
+
+
+def structure(expr: Basic, placeholders: dict[Symbol, Symbol]) -> tuple | Basic:
+    """``expr`` with the symbols replaced as nested tuples, hashable and equal for equal expressions."""
+    if not expr.args:
+        return placeholders.get(expr, expr)
+    return (expr.func, *(structure(arg, placeholders) for arg in expr.args))
+
+
+def solve_template(constraints: Sequence[Sequence[Eq]], count: int,
+                   solve: Callable[[list[Eq], list[Symbol]], dict[Symbol, Expr]]) -> dict[Symbol, Expr] | None:
+    unknowns = [symbol for i in range(count) for symbol in template_symbols(i)]
+    all_constraints = [constraint for constraints_ in constraints for constraint in constraints_]
+
+    allowed = set(unknowns) | set(TEMPLATE_PARENT)
+    if any(not constraint.free_symbols <= allowed for constraint in all_constraints):
+        # depends on widgets outside of the composite or on animated variables
+        return None
+
+    try:
+        solutions = solve(all_constraints, unknowns)
+    except Exception:
+        # the global solve reports the problem properly
+        return None
+
+    if any(unknown not in solutions or not solutions[unknown].free_symbols <= set(TEMPLATE_PARENT)
+           for unknown in unknowns):
+        return None
+
+    return {unknown: solutions[unknown] for unknown in unknowns}
+
+
+template_cache = TemplateCache()
@@ -0,0 +1,76 @@
+from collections import OrderedDict
+
+import pyglet
+
+
+class TextLayoutCache:
+    """LRU cache of laid out lines (glyph lookup, shaping and line wrapping) shared by all CachedLabels."""
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self.entries: OrderedDict[tuple, tuple[list, int, int]] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple) -> tuple[list, int, int] | None:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: tuple, entry: tuple[list, int, int]):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / (self.hits + self.misses) if self.hits + self.misses else 0.
+
+    def __len__(self):
+        return len(self.entries)
+
+
+text_layout_cache = TextLayoutCache()
+
+
+class CachedLabel(pyglet.text.Label):
+    """A pyglet Label that takes its lines from text_layout_cache. Lines only depend on the text, the font, the
+    wrapping width and the alignment, so labels with the same content only differ in where their vertices are."""
+
+    def __init__(self, *args, **kwargs):
+        # pyglet lays the text out before it applies the styles and again after, only the second one is needed
+        self.begin_update()
+        super().__init__(*args, **kwargs)
+        self.end_update()
+
+    def layout_key(self) -> tuple:
+        document = self.document
+        return (document.text,
+                *(document.get_style(name) for name in ("font_name", "font_size", "bold", "italic", "underline",
+                                                        "align")),
+                self._width, self._multiline, self._wrap_lines, self._dpi)
+
+    def _get_lines(self):
+        key = self.layout_key()
+
+        entry = text_layout_cache.get(key)
+        if entry is None:
+            # _get_lines also sets content_width and content_height
+            entry = super()._get_lines(), self.content_width, self.content_height
+            text_layout_cache.put(key, entry)
+
+        lines, self.content_width, self.content_height = entry
+        return lines
@@ -0,0 +1,139 @@
+"""Caches a static widget subtree in a texture, see Widget.cache_subtree."""
+import math
+from ctypes import byref
+
+import pyglet
+from pyglet import gl
+
+
+class SubtreeTexture:
+    """Renders a widget and all of its descendants into an offscreen framebuffer texture once, which is drawn as a
+    single quad afterwards. It is rendered again only when the geometry or the appearance (see Widget.appearance) of
+    one of the widgets changed, which includes resizing the root.
+
+    The texture is copied over the root's box without blending, so the root needs an opaque background, like a Label,
+    and descendants outside of its box are cut off. Blending the texture instead would be off at the edges of text,
+    whose alpha is blended into the transparent texture as well."""
+
+    def __init__(self, root):
+        self.root = root
+
+        # the shapes of the subtree, updated in place like in a retained Window
+        self.batch = pyglet.graphics.Batch()
+        self.framebuffer: gl.GLuint | None = None
+        self.texture: pyglet.image.Texture | None = None
+        self.sprite: pyglet.sprite.Sprite | None = None
+        self._sprite_batch: pyglet.graphics.Batch | None = None
+
+        # the geometry and appearance of the subtree when it was last rendered
+        self.key: tuple | None = None
+        self.renders = 0
+
+    def bounds(self) -> tuple[int, int, int, int]:
+        """The framebuffer pixels whose centers the root covers, the same ones that its background fills."""
+        root = self.root
+        scale_x, scale_y = self.scale
+        x0, y0 = math.ceil(root.x * scale_x - .5), math.ceil(root.y * scale_y - .5)
+        return (x0, y0, max(math.ceil(root.right_edge * scale_x - .5) - x0, 1),
+                max(math.ceil(root.top_edge * scale_y - .5) - y0, 1))
+
+    @property
+    def scale(self) -> tuple[float, float]:
+        # the framebuffer can be larger than the window on high dpi screens
+        window = self.root.window_.window
+        width, height = window.get_framebuffer_size()
+        return width / window.width, height / window.height
+
+    def draw(self, batch: pyglet.graphics.Batch):
+        """Adds the cached subtree to ``batch``, rendering it first if it changed."""
+        members = self.root.subtree()
+        key = (self.root.store.geometry[[member.index for member in members]].tobytes(),
+               tuple(member.appearance() for member in members))
+
+        if key != self.key and (self.texture is None or not self.root.window_.resizing):
+            self.key = key
+            self.render(members)
+
+        # while the window is being resized, the last texture is stretched over the root instead of rendered again
+        scale_x, scale_y = self.scale
+        x, y, width, height = self.bounds()
+        x, y = x / scale_x, y / scale_y
+        scale_x *= self.texture.width / width
+        scale_y *= self.texture.height / height
+        if self._sprite_batch is not batch:
+            if self.sprite is not None:
+                self.sprite.delete()
+
+            self._sprite_batch = batch
+            self.sprite = pyglet.sprite.Sprite(self.texture, x, y, blend_src=gl.GL_ONE, blend_dest=gl.GL_ZERO,
+                                               batch=batch, group=pyglet.graphics.OrderedGroup(self.root.z))
+        else:
+            if self.sprite.image is not self.texture:
+                self.sprite.image = self.texture
+            if self.sprite.position != (x, y):
+                self.sprite.position = x, y
+
+        if (self.sprite.scale_x, self.sprite.scale_y) != (1 / scale_x, 1 / scale_y):
+            self.sprite.update(scale_x=1 / scale_x, scale_y=1 / scale_y)
+
+    def render(self, members: list):
+        x, y, width, height = self.bounds()
+        scale_x, scale_y = self.scale
+
+        if self.texture is None or (self.texture.width, self.texture.height) != (width, height):
+            self.texture = pyglet.image.Texture.create(width, height)
+
+        if self.framebuffer is None:
+            self.framebuffer = gl.GLuint()
+            gl.glGenFramebuffers(1, byref(self.framebuffer))
+
+        for member in members:
+            member.draw(self.batch)
+
+        viewport = (gl.GLint * 4)()
+        gl.glGetIntegerv(gl.GL_VIEWPORT, viewport)
+        clear_color = (gl.GLfloat * 4)()
+        gl.glGetFloatv(gl.GL_COLOR_CLEAR_VALUE, clear_color)
+
+        gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, self.framebuffer)
+        try:
+            gl.glFramebufferTexture2D(gl.GL_FRAMEBUFFER, gl.GL_COLOR_ATTACHMENT0, self.texture.target,
+                                      self.texture.id, 0)
+            if gl.glCheckFramebufferStatus(gl.GL_FRAMEBUFFER) != gl.GL_FRAMEBUFFER_COMPLETE:
+                from . import RenderException
+                raise RenderException(f"Can't render {self.root!r} into a texture")
+
+            gl.glViewport(0, 0, width, height)
+            gl.glMatrixMode(gl.GL_PROJECTION)
+            gl.glPushMatrix()
+            gl.glLoadIdentity()
+            # the window coordinates of the root's pixels onto the whole texture
+            gl.glOrtho(x / scale_x, (x + width) / scale_x, y / scale_y, (y + height) / scale_y, -1, 1)
+            gl.glMatrixMode(gl.GL_MODELVIEW)
+            gl.glPushMatrix()
+            gl.glLoadIdentity()
+
+            gl.glClearColor(0, 0, 0, 0)
+            gl.glClear(gl.GL_COLOR_BUFFER_BIT)
+            self.batch.draw()
+
+            gl.glPopMatrix()
+            gl.glMatrixMode(gl.GL_PROJECTION)
+            gl.glPopMatrix()
+            gl.glMatrixMode(gl.GL_MODELVIEW)
+        finally:
+            gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, 0)
+            gl.glViewport(*viewport)
+            gl.glClearColor(*clear_color)
+
+        self.renders += 1
+
+    def delete(self):
+        """Frees the texture and the framebuffer. The shapes of the members are released by Widget.cache_subtree."""
+        if self.sprite is not None:
+            self.sprite.delete()
+        if self.framebuffer is not None:
+            gl.glDeleteFramebuffers(1, byref(self.framebuffer))
+
+        self.sprite = self._sprite_batch = self.texture = self.framebuffer = None
+        self.key = None
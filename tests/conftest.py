@@ -0,0 +1,30 @@
+import os
+
+import pytest
+
+# has to be set before constraint_gui imports pyglet.window
+os.environ.setdefault("CONSTRAINT_GUI_HEADLESS", "1")
+
+
+@pytest.fixture
+def make_window():
+    """Creates 800x450 windows with the given options and closes them after the test."""
+    from constraint_gui import Window
+
+    windows = []
+
+    def make_window_(**options) -> Window:
+        win = Window(**options)
+        win.width, win.height = 800, 450
+        windows.append(win)
+        return win
+
+    yield make_window_
+
+    for win in windows:
+        win.window.close()
+
+
+@pytest.fixture
+def win(make_window):
+    return make_window()
@@ -0,0 +1,130 @@
+import functools
+import gc
+import weakref
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+
+import pytest
+
+from constraint_gui import CheckBox, Label
+from constraint_gui.constraints import *
+from constraint_gui.template import template_cache
+
+
+@pytest.fixture
+def win(make_window):
+    with ThreadPoolExecutor(1) as executor:
+        yield make_window(background_solve=executor)
+
+
+def column(win, count):
+    labels = []
+    for i in range(count):
+        label = Label(win, win, text=str(i))
+        label.constraints = [
+            left_inside(10),
+            width_percent(1 / 2),
+            under(labels[-1], 5) if labels else top_inside(10),
+            Eq(WIDGET_HEIGHT, 20)
+        ]
+        labels.append(label)
+    return labels
+
+
+def test_wait_for_layout(win):
+    labels = column(win, 20)
+    layouts = []
+    win.on_layout(lambda: layouts.append(len(win.widgets)))
+
+    # the first frame only submits the solve and draws without the unsolved widgets
+    win.draw_()
+    assert win.layout_pending
+    assert win.wait_for_layout(timeout=30)
+    assert not win.layout_pending
+    assert layouts == [len(win.widgets)]
+
+    win.draw_()
+    assert [(label.x, label.y, label.width) for label in labels[:2]] == [(10, 420, 400), (10, 395, 400)]
+
+
+def test_changes_while_solving_are_coalesced(win):
+    labels = column(win, 20)
+    win.draw_()
+    assert win.solve_future is not None
+
+    # makes the running solve outdated
+    labels[0].constraints = [left_inside(10), width_percent(1 / 2), top_inside(50), Eq(WIDGET_HEIGHT, 20)]
+    assert win.wait_for_layout(timeout=30)
+
+    win.draw_()
+    assert labels[0].y == 380
+    assert labels[1].y == 355
+
+
+class DeferredExecutor(Executor):
+    """Runs the submitted jobs only when asked to, so a test can see what happens before."""
+
+    def __init__(self):
+        self.jobs = []
+
+    def submit(self, fn, /, *args, **kwargs):
+        future = Future()
+        self.jobs.append((future, functools.partial(fn, *args, **kwargs)))
+        return future
+
+    def run(self):
+        for future, job in self.jobs:
+            future.set_result(job())
+        self.jobs.clear()
+
+
+def test_templates_are_solved_in_the_job(make_window):
+    template_cache.clear()
+    executor = DeferredExecutor()
+    win = make_window(background_solve=executor)
+
+    checkboxes = []
+    for i in range(3):
+        checkbox = CheckBox(win, win, text=f"Option {i}")
+        checkbox.constraints = [
+            left_inside(10),
+            right_inside(10),
+            under(checkboxes[-1], 5) if checkboxes else top_inside(10),
+            Eq(WIDGET_HEIGHT, 20)
+        ]
+        checkboxes.append(checkbox)
+
+    win.draw_()
+    assert not template_cache.templates
+    assert len(executor.jobs) == 1
+
+    executor.run()
+    assert win.wait_for_layout(timeout=30)
+    assert win.solve_widgets is None
+    assert len(template_cache.templates) == 1
+    assert set(win.templates) == set(checkboxes)
+
+    win.draw_()
+    for checkbox in checkboxes:
+        box = checkbox.checkbox_label
+        assert (box.y, box.height) == (checkbox.y, checkbox.height)
+        assert checkbox.text_label.x >= box.right_edge
+
+
+def test_outdated_job_releases_destroyed_widgets(make_window):
+    template_cache.clear()
+    executor = DeferredExecutor()
+    win = make_window(background_solve=executor)
+
+    checkbox = CheckBox(win, win, text="Option")
+    checkbox.constraints = [left_inside(10), right_inside(10), top_inside(10), Eq(WIDGET_HEIGHT, 20)]
+    win.draw_()
+
+    # destroyed while its solve is running
+    destroyed = weakref.ref(checkbox)
+    checkbox.destroy()
+    del checkbox
+
+    executor.run()
+    assert win.wait_for_layout(timeout=30)
+    gc.collect()
+    assert destroyed() is None
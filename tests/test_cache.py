@@ -0,0 +1,99 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from sympy import Eq, Symbol
+
+from constraint_gui import CheckBox
+from constraint_gui import template
+from constraint_gui.cache import LayoutCache, constraint_hash
+from constraint_gui.constraints import *
+from constraint_gui.template import template_cache
+
+x, y, width = Symbol("Wx_0"), Symbol("Wy_0"), Symbol("Ww_window")
+SYSTEM = [Eq(x, width / 2), Eq(y, x + 10)], [x, y]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return LayoutCache(tmp_path)
+
+
+def test_hit_and_miss(cache):
+    key = constraint_hash(*SYSTEM)
+    assert cache.get(key) is None
+
+    cache.put(key, {x: width / 2})
+    assert cache.get(key) == {x: width / 2}
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_broken_entries_are_removed(cache):
+    cache.put("broken", {x: 1})
+    cache.path("broken").write_bytes(b"not a pickle")
+
+    assert cache.get("broken") is None
+    assert not cache.path("broken").exists()
+
+
+def test_hash_ignores_the_order():
+    constraints, unknowns = SYSTEM
+    assert constraint_hash(constraints, unknowns) == constraint_hash(constraints[::-1], unknowns[::-1])
+    assert constraint_hash(constraints, unknowns) != constraint_hash(constraints[:1], unknowns)
+    assert constraint_hash(constraints, unknowns, "linear") != constraint_hash(constraints, unknowns, "sympy")
+
+
+def test_hash_is_stable_across_runs():
+    script = ("from sympy import Eq, Symbol\n"
+              "from constraint_gui.cache import constraint_hash\n"
+              "x, y, width = Symbol('Wx_0'), Symbol('Wy_0'), Symbol('Ww_window')\n"
+              "print(constraint_hash([Eq(x, width / 2), Eq(y, x + 10)], [x, y]))")
+    hashes = {subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True,
+                             env={**os.environ, "PYTHONHASHSEED": seed}).stdout.strip() for seed in ("1", "2")}
+    assert hashes == {constraint_hash(*SYSTEM)}
+
+
+def test_least_recently_used_entries_are_evicted(cache):
+    for i, key in enumerate("abc"):
+        cache.put(key, {x: i})
+        os.utime(cache.path(key), (1000 + i, 1000 + i))
+
+    # used last now
+    assert cache.get("a") is not None
+
+    cache.max_bytes = cache.size - 1
+    cache.evict()
+    assert [cache.path(key).exists() for key in "abc"] == [True, False, True]
+
+
+def checkboxes(win, count=3):
+    previous = None
+    for i in range(count):
+        checkbox = CheckBox(win, win, text=f"Option {i}")
+        checkbox.constraints = [left_inside(10), right_inside(10), under(previous, 5) if previous else top_inside(10),
+                                Eq(WIDGET_HEIGHT, 20)]
+        previous = checkbox
+    return previous
+
+
+def test_warm_start_solves_nothing(make_window, cache, monkeypatch):
+    template_cache.clear()
+    win = make_window(layout_cache=cache)
+    cold = checkboxes(win)
+    win.draw_()
+    assert cache.misses == 2
+
+    def fail(*args):
+        raise AssertionError("solved again")
+
+    # a new run with an empty template cache
+    template_cache.clear()
+    monkeypatch.setattr(template, "solve_template", fail)
+    monkeypatch.setattr("constraint_gui.solve_layout", fail)
+    win = make_window(layout_cache=cache)
+    warm = checkboxes(win)
+    win.draw_()
+
+    assert cache.hits == 2
+    assert (warm.checkbox_label.x, warm.checkbox_label.y) == (cold.checkbox_label.x, cold.checkbox_label.y)
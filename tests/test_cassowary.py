@@ -0,0 +1,148 @@
+import pytest
+from sympy import Eq, Ge, Le, Symbol
+
+from constraint_gui import Label
+from constraint_gui.cassowary import REQUIRED, STRONG, WEAK, BadRequiredStrength, CassowaryLayout, Constraint, \
+    DuplicateEditVariable, Solver, UnknownConstraint, UnknownEditVariable, UnsatisfiableConstraint, Variable
+from constraint_gui.constraints import *
+
+
+def solved(solver: Solver, *constraints: Constraint) -> Solver:
+    for constraint in constraints:
+        solver.add_constraint(constraint)
+    solver.update_variables()
+    return solver
+
+
+def test_required_equalities():
+    x, y = Variable("x"), Variable("y")
+    # x = 10, x + y = 30
+    solved(Solver(), Constraint({x: 1}, -10), Constraint({x: 1, y: 1}, -30))
+    assert (x.value, y.value) == pytest.approx((10, 20))
+
+
+def test_inequalities():
+    x = Variable("x")
+    solver = solved(Solver(), Constraint({x: 1}, -100, "<="), Constraint({x: 1}, -50, ">="),
+                    Constraint({x: 1}, -200, strength=WEAK))
+    assert x.value == pytest.approx(100)
+
+    solver.add_constraint(Constraint({x: 1}, -75, "<="))
+    solver.update_variables()
+    assert x.value == pytest.approx(75)
+
+
+def test_stronger_constraints_win():
+    x = Variable("x")
+    weak = Constraint({x: 1}, -20, strength=WEAK)
+    strong = Constraint({x: 1}, -10, strength=STRONG)
+    solver = solved(Solver(), weak, strong)
+    assert x.value == pytest.approx(10)
+
+    solver.remove_constraint(strong)
+    solver.update_variables()
+    assert x.value == pytest.approx(20)
+
+    solved(solver, Constraint({x: 1}, -30))
+    assert x.value == pytest.approx(30)
+
+
+def test_conflicting_required_constraints():
+    x = Variable("x")
+    solver = solved(Solver(), Constraint({x: 1}, -10))
+    with pytest.raises(UnsatisfiableConstraint):
+        solver.add_constraint(Constraint({x: 1}, -20))
+
+    with pytest.raises(UnknownConstraint):
+        solver.remove_constraint(Constraint({x: 1}, -10))
+
+
+def test_edit_variables():
+    x, width = Variable("x"), Variable("width")
+    solver = Solver()
+    solver.add_edit_variable(width, STRONG)
+    # x = width / 2, but at least 100
+    solved(solver, Constraint({x: 1, width: -.5}, 0, strength=STRONG), Constraint({x: 1}, -100, ">="))
+
+    for value, expected in ((800, 400), (300, 150), (100, 100)):
+        solver.suggest_value(width, value)
+        solver.update_variables()
+        assert x.value == pytest.approx(expected)
+
+    with pytest.raises(DuplicateEditVariable):
+        solver.add_edit_variable(width)
+    with pytest.raises(BadRequiredStrength):
+        solver.add_edit_variable(Variable("other"), REQUIRED)
+
+    solver.remove_edit_variable(width)
+    with pytest.raises(UnknownEditVariable):
+        solver.suggest_value(width, 10)
+
+
+def test_layout_parameters_and_owners():
+    x, y, width, ratio = Symbol("x"), Symbol("y"), Symbol("width"), Symbol("ratio")
+    layout = CassowaryLayout()
+    layout.add_unknowns([x, y])
+
+    layout.set_constraints("a", [Eq(x, width / 2), Ge(x, 10)])
+    # a product of parameters is substituted instead of edited
+    layout.set_constraints("b", [Eq(y, x * 0 + ratio * width), Le(y, 500)])
+    assert layout.update({width: 800, ratio: .25})
+    assert (layout.value(x), layout.value(y)) == pytest.approx((400, 200))
+
+    assert layout.update({width: 10, ratio: .25})
+    assert (layout.value(x), layout.value(y)) == pytest.approx((10, 2.5))
+    assert not layout.update({width: 10, ratio: .25})
+
+    layout.set_constraints("a", [Eq(x, 42)])
+    layout.update({})
+    assert layout.value(x) == pytest.approx(42)
+
+    layout.remove("b")
+    layout.set_constraints("b", [Eq(y, x + 1)])
+    layout.update({})
+    assert layout.value(y) == pytest.approx(43)
+
+
+def test_private_parameters():
+    x, y, offset = Symbol("x"), Symbol("y"), Symbol("offset")
+    layout = CassowaryLayout()
+    layout.add_unknowns([x, y])
+    layout.set_constraints("a", [Eq(x, offset)], private=[offset])
+    layout.set_constraints("b", [Eq(y, offset)], private=[offset])
+
+    layout.update({}, {"a": {offset: 1}, "b": {offset: 2}})
+    assert (layout.value(x), layout.value(y)) == pytest.approx((1, 2))
+
+    layout.remove("b")
+    assert len(layout.solver._edits) == 1
+
+
+@pytest.mark.parametrize("solver", ["cassowary", "linear"])
+def test_animated_variables_are_per_widget(make_window, solver):
+    win = make_window(solver=solver, vectorized=False)
+    share = Symbol("share")
+
+    labels = []
+    for value in (.25, .75):
+        label = Label(win, win)
+        label.animate(share, lambda value_=value: value_)
+        label.constraints = [left_inside(0), width_percent(share), top_inside(0), Eq(WIDGET_HEIGHT, 20)]
+        labels.append(label)
+
+    win.draw_()
+    assert [label.width for label in labels] == [200, 600]
+
+
+def test_strengths_in_a_window(make_window):
+    win = make_window(solver="cassowary")
+    label = Label(win, win)
+    label.constraints = [left_inside(10), top_inside(10), Eq(WIDGET_HEIGHT, 20),
+                         weak(Eq(WIDGET_WIDTH, 1000)), strong(Le(WIDGET_WIDTH, RELATIVE_WIDTH - 20))]
+
+    win.draw_()
+    assert label.width == 780
+
+    win.width = 2000
+    win.draw_()
+    assert label.width == 1000
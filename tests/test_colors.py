@@ -0,0 +1,110 @@
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from constraint_gui import Label
+from constraint_gui.colors import ColorTweens, color, from_oklab, to_oklab, transition_table
+
+HOVER = (200, 0, 0)
+BG = (0, 0, 200)
+
+
+def test_finished_fade_is_returned():
+    tweens = ColorTweens()
+    target = SimpleNamespace(color=BG)
+    tweens.start(target, "color", BG, start=BG, duration=1, now=0)
+
+    assert tweens.end(target, "color") == BG
+    assert tweens.advance(now=.5) == []
+    assert tweens.advance(now=1) == [target]
+    assert not tweens.active and tweens.end(target, "color") is None
+
+
+@pytest.fixture
+def label(win):
+    return Label(win, win, bg=BG, bg_on_hover=HOVER, transition=1)
+
+
+def test_leaving_during_the_fade(label):
+    tweens = label.window_.color_tweens
+    now = time.perf_counter()
+
+    label.is_mouse_inside = True
+    tweens.advance(now + .5)
+    assert label.background not in (BG, HOVER)
+
+    label.is_mouse_inside = False
+    assert tweens.end(label, "faded_bg") == BG
+
+    assert label in tweens.advance(now + 3)
+    assert not tweens.active
+    assert label.background == BG
+
+
+def test_entering_again_during_the_fade(label):
+    tweens = label.window_.color_tweens
+
+    label.is_mouse_inside = True
+    label.is_mouse_inside = False
+    label.is_mouse_inside = True
+    assert tweens.end(label, "faded_bg") == HOVER
+
+    tweens.advance(time.perf_counter() + 3)
+    assert label.background == HOVER
+
+
+@pytest.mark.parametrize("rgb", [(0, 0, 0), (255, 255, 255), (200, 0, 0), (12, 34, 56), (250, 128, 114)])
+def test_oklab_round_trip(rgb):
+    assert tuple(from_oklab(np.array([to_oklab(rgb)]))[0]) == rgb
+
+
+def test_transition_table():
+    table = transition_table((0, 0, 0, 255), (255, 255, 255, 0), "linear", 8)
+    assert table.shape == (9, 4) and not table.flags.writeable
+    assert tuple(table[0]) == (0, 0, 0, 255) and tuple(table[-1]) == (255, 255, 255, 0)
+    assert (np.diff(table[:, 0].astype(int)) > 0).all()
+    assert (np.diff(table[:, 3].astype(int)) < 0).all()
+    assert transition_table((0, 0, 0, 255), (255, 255, 255, 0), "linear", 8) is table
+
+
+def test_fades_are_advanced_together():
+    tweens = ColorTweens(steps=4)
+    fast, slow, idle = (SimpleNamespace(color=BG) for _ in range(3))
+    tweens.start(fast, "color", "red", duration=1, now=0)
+    tweens.start(slow, "color", (0, 200, 0, 128), duration=2, now=0)
+    tweens.start(idle, "color", BG, duration=2, now=0)
+
+    # the attribute keeps as many channels as the end color has
+    assert tweens.advance(now=.5) == [fast, slow]
+    assert len(fast.color) == 3 and len(slow.color) == 4
+
+    assert tweens.advance(now=1) == [fast, slow]
+    assert fast.color == color("red") and tweens.end(fast, "color") is None
+
+    assert tweens.advance(now=2) == [slow, idle]
+    assert slow.color == (0, 200, 0, 128) and idle.color == BG
+    assert not tweens.active and not len(tweens.lut)
+
+
+class Target:
+    def __init__(self, color_):
+        self.color = color_
+
+
+def test_loops_until_stopped():
+    tweens = ColorTweens(steps=4)
+    target = Target(BG)
+    tweens.start(target, "color", HOVER, duration=1, loop=True, now=0)
+
+    tweens.advance(now=1)
+    assert target.color == HOVER
+    tweens.advance(now=2)
+    assert target.color == BG and tweens.active
+
+    tweens.advance(now=2.5)
+    shown = target.color
+    tweens.stop_targets({target})
+    assert not tweens.active
+    assert tweens.advance(now=3) == [] and target.color == shown
@@ -0,0 +1,97 @@
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from constraint_gui.compiler import compile_window
+
+LAYOUT = '''
+from constraint_gui import Label
+
+
+def build(win):
+    spacing = win.parameter("spacing", 8)
+    sidebar, content = Label(win, win), Label(win, win)
+    sidebar.animate("grow", lambda: .5)
+
+    if win.solves_constraints:
+        from sympy import Eq, Symbol
+        from constraint_gui.constraints import (left_inside, right_inside, top_inside, bottom_inside, right_to,
+                                                width_percent, WIDGET_HEIGHT)
+        sidebar.constraints = [left_inside(spacing), top_inside(spacing), bottom_inside(spacing),
+                               width_percent(.2 + Symbol("grow") / 10)]
+        content.constraints = [right_to(sidebar, spacing), right_inside(spacing), top_inside(spacing),
+                               Eq(WIDGET_HEIGHT, 100)]
+    return sidebar, content
+'''
+
+# builds the precompiled layout, prints the geometry before and after changing the parameter and whether sympy was
+# imported
+RUN = '''
+import json, sys
+import layout_app
+from constraint_gui import Window
+
+win = Window(precompiled="layout_app_compiled")
+win.width, win.height = 800, 450
+widgets = layout_app.build(win)
+geometry = []
+for spacing in (8, 20):
+    win.set_parameter("spacing", spacing)
+    win.draw_()
+    geometry.append([value for widget in widgets for value in (widget.x, widget.y, widget.width, widget.height)])
+win.window.close()
+print(json.dumps({"geometry": geometry, "sympy": "sympy" in sys.modules}))
+'''
+
+
+@pytest.fixture
+def layout_app(tmp_path, monkeypatch):
+    (tmp_path / "layout_app.py").write_text(LAYOUT)
+    monkeypatch.syspath_prepend(tmp_path)
+    import layout_app
+    yield layout_app
+    del sys.modules["layout_app"]
+
+
+def solved_geometry(make_window, layout_app, spacing):
+    win = make_window()
+    widgets = layout_app.build(win)
+    win.set_parameter("spacing", spacing)
+    win.draw_()
+    return [value for widget in widgets for value in (widget.x, widget.y, widget.width, widget.height)]
+
+
+def test_round_trip_without_sympy(make_window, layout_app, tmp_path):
+    win = make_window()
+    layout_app.build(win)
+    (tmp_path / "layout_app_compiled.py").write_text(compile_window(win, "layout_app"))
+
+    result = subprocess.run([sys.executable, "-c", textwrap.dedent(RUN)], capture_output=True, text=True, check=True,
+                            cwd=tmp_path, env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)})
+    result = json.loads(result.stdout.splitlines()[-1])
+
+    assert not result["sympy"]
+    for geometry, spacing in zip(result["geometry"], (8, 20)):
+        assert geometry == pytest.approx(solved_geometry(make_window, layout_app, spacing))
+
+
+def test_set_parameter(make_window, layout_app, monkeypatch):
+    win = make_window()
+    sidebar, content = layout_app.build(win)
+    win.draw_()
+    assert (sidebar.x, content.x, content.width) == (8, 8 + 200 + 8, 800 - 216 - 8)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("solved again")
+
+    monkeypatch.setattr("constraint_gui.solve_layout", fail)
+    win.set_parameter("spacing", 20)
+    win.draw_()
+    assert (sidebar.x, content.x, content.width) == (20, 20 + 200 + 20, 800 - 240 - 20)
+
+    with pytest.raises(KeyError):
+        win.set_parameter("gap", 1)
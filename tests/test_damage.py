@@ -0,0 +1,71 @@
+import numpy as np
+from sympy import Eq
+
+from constraint_gui import Label
+from constraint_gui.constraints import *
+from constraint_gui.damage import merge_damage, touches
+
+
+def merge(*rectangles, **kwargs):
+    return sorted(merge_damage(np.array(rectangles, dtype=float).reshape(-1, 4), 800, 450, padding=0, **kwargs))
+
+
+def test_overlapping_rectangles_are_merged():
+    assert merge((10, 10, 20, 20), (20, 20, 20, 20)) == [(10, 10, 40, 40)]
+
+
+def test_adjacent_rectangles_are_merged():
+    assert merge((10, 10, 20, 20), (30, 10, 20, 20)) == [(10, 10, 50, 30)]
+
+
+def test_separate_rectangles_are_kept():
+    assert merge((10, 10, 20, 20), (100, 100, 20, 20)) == [(10, 10, 30, 30), (100, 100, 120, 120)]
+
+
+def test_contained_rectangles_disappear():
+    assert merge((0, 0, 100, 100), (10, 10, 5, 5)) == [(0, 0, 100, 100)]
+
+
+def test_empty_rectangles_are_ignored():
+    assert merge() == []
+    assert merge((10, 10, 0, 20), (10, 10, 20, -5), (900, 500, 10, 10)) == []
+
+
+def test_regions_are_padded_and_clipped():
+    assert merge_damage(np.array([[-10., 10.5, 20, 19], [790, 440, 20, 20]]), 800, 450) == \
+        [(0, 9, 11, 31), (789, 439, 800, 450)]
+
+
+def test_merging_a_region_can_touch_others():
+    # the last rectangle joins the first two, which then cover the third
+    assert merge((0, 0, 10, 10), (20, 0, 10, 10), (5, 20, 20, 10), (0, 5, 30, 20)) == [(0, 0, 30, 30)]
+
+
+def test_at_most_max_regions():
+    rectangles = [(x, y, 10, 10) for x in range(0, 800, 40) for y in range(0, 450, 40)]
+    regions = merge(*rectangles, max_regions=4)
+
+    assert len(regions) <= 4
+    assert not any(touches(a, b) for i, a in enumerate(regions) for b in regions[i + 1:])
+    for x, y, width, height in rectangles:
+        assert any(x0 <= x and y0 <= y and x + width <= x1 and y + height <= y1 for x0, y0, x1, y1 in regions)
+
+
+def test_window_damage(make_window):
+    win = make_window(damage_tracking=True)
+    label = Label(win, win)
+    label.constraints = [left_inside(10), top_inside(10), Eq(WIDGET_WIDTH, 100), Eq(WIDGET_HEIGHT, 50)]
+    win.draw_()
+
+    label.bg = (1, 2, 3)
+    label.register_redraw()
+    win.draw_()
+    assert win.damaged_regions == [(label.x - 1, label.y - 1, label.x + 101, label.y + 51)]
+
+    win.draw_()
+    assert win.damaged_regions == []
+
+    # a change of the whole window falls back to a full redraw
+    win.register_redraw()
+    win.draw_()
+    assert win.damaged_regions == [(0, 0, 800, 450)]
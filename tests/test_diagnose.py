@@ -0,0 +1,81 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sympy import Eq, symbols
+
+from constraint_gui import ConstraintResolutionException, Label
+from constraint_gui.constraints import *
+from constraint_gui.diagnose import diagnose
+
+x, y, w, h = symbols("Wx_0 Wy_0 Ww_0 Wh_0")
+
+
+def test_underdetermined():
+    diagnosis = diagnose([Eq(x, 10), Eq(y, 10)], [x, y, w, h])
+    assert diagnosis
+    assert set(diagnosis.underdetermined) == {w, h}
+    assert "widget 0: 2 degrees of freedom (Ww_0, Wh_0)" in diagnosis.report()
+
+
+def test_numerically_underdetermined():
+    diagnosis = diagnose([Eq(x + w, 10), Eq(2 * x + 2 * w, 20)], [x, w])
+    assert set(diagnosis.underdetermined) == {x, w}
+    assert not diagnosis.conflicts
+
+
+def test_conflicting():
+    constraints = [Eq(x, 10), Eq(w, 20), Eq(x + w, 40), Eq(y, 0), Eq(h, 10)]
+    diagnosis = diagnose(constraints, [x, y, w, h])
+    assert diagnosis
+    assert [set(conflict) for conflict in diagnosis.conflicts] == [{Eq(x, 10), Eq(w, 20), Eq(x + w, 40)}]
+    assert not diagnosis.underdetermined
+
+
+def test_redundant():
+    diagnosis = diagnose([Eq(x, 10), Eq(w, 20), Eq(x + w, 30), Eq(y, 0), Eq(h, 10)], [x, y, w, h])
+    assert not diagnosis
+    assert diagnosis.redundant == [Eq(x + w, 30)]
+    assert diagnosis.report() == "The constraints have a unique solution."
+
+
+@pytest.fixture(params=[False, True], ids=["solve", "background_solve"])
+def solve(request, make_window):
+    """Creates a window, lets ``build`` add widgets to it and solves them."""
+    with ThreadPoolExecutor(1) as executor:
+        def solve_(build):
+            win = make_window(background_solve=executor if request.param else None)
+            build(win)
+            win.draw_()
+            assert win.wait_for_layout(timeout=30)
+            # a background solve is applied now, evaluated in the next frame
+            win.draw_()
+            return win
+        yield solve_
+
+
+def test_solve_names_underdetermined_widgets(solve):
+    def build(win):
+        Label(win, win).constraints = [left_inside(10), top_inside(10), Eq(WIDGET_WIDTH, 100), Eq(WIDGET_HEIGHT, 20)]
+        Label(win, win).constraints = [left_inside(10), top_inside(40)]
+
+    with pytest.raises(ConstraintResolutionException, match=r"Label 1: 3 degrees of freedom \(Wy_1, Ww_1, Wh_1\)"):
+        solve(build)
+
+
+def test_solve_names_conflicts(solve):
+    def build(win):
+        Label(win, win).constraints = [left_inside(10), left_inside(20), top_inside(10), Eq(WIDGET_WIDTH, 100),
+                                       Eq(WIDGET_HEIGHT, 20)]
+
+    with pytest.raises(ConstraintResolutionException, match="constraints conflict"):
+        solve(build)
+
+
+def test_solve_accepts_redundant_constraints(solve):
+    def build(win):
+        label = Label(win, win)
+        label.constraints = [left_inside(10), right_inside(10), Eq(WIDGET_WIDTH, win.width_expr - 20), top_inside(10),
+                             Eq(WIDGET_HEIGHT, 20)]
+
+    label, = solve(build).widgets
+    assert (label.x, label.width) == (10, 780)
@@ -0,0 +1,56 @@
+import pytest
+from sympy import Eq, Symbol
+
+from constraint_gui import Label
+from constraint_gui.constraints import *
+
+share = Symbol("share")
+
+
+def build(win, values=(.25, .75), dependent=True):
+    labels = []
+    for value in values:
+        label = Label(win, win)
+        label.animate(share, lambda value_=value: value_)
+        label.constraints = [left_inside(0), width_percent(share), top_inside(0), Eq(WIDGET_HEIGHT, 20)]
+        labels.append(label)
+    if not dependent:
+        return labels
+
+    # depends on share only through the first label
+    below = Label(win, win)
+    below.constraints = [left_inside(0), under(labels[0], 0), Eq(WIDGET_WIDTH, labels[0].width_expr * 2),
+                         Eq(WIDGET_HEIGHT, 20)]
+    return [*labels, below]
+
+
+def geometry(widgets):
+    return [(widget.x, widget.y, widget.width, widget.height) for widget in widgets]
+
+
+def test_animated_variables_are_per_widget(make_window):
+    win = make_window()
+    widgets = build(win)
+    win.draw_()
+    assert [widget.width for widget in widgets] == [200, 600, 400]
+
+
+def test_vectorized_matches_per_widget(make_window):
+    per_widget = make_window(vectorized=False)
+    vectorized = make_window()
+    # the per-widget functions only get the widget's own animated variables
+    expected, widgets = build(per_widget, dependent=False), build(vectorized, dependent=False)
+    per_widget.draw_()
+    vectorized.draw_()
+    assert geometry(widgets) == pytest.approx(geometry(expected))
+
+
+def test_destroyed_animators_keep_their_last_value(make_window):
+    win = make_window()
+    first, second, below = build(win)
+    win.draw_()
+
+    second.destroy()
+    win.width = 400
+    win.draw_()
+    assert (first.width, below.width) == (100, 200)
@@ -0,0 +1,87 @@
+import pytest
+from sympy import Eq
+
+from constraint_gui import Label
+from constraint_gui.constraints import *
+
+
+class RecordingLabel(Label):
+    """Records the mouse events it gets in ``events``, shared by all of them."""
+    __slots__ = ("name", "events")
+
+    def __init__(self, window, master, name, events):
+        super().__init__(window, master)
+        self.name = name
+        self.events = events
+
+    def on_mouse_motion(self, x, y, dx, dy):
+        self.events.append(("motion", self.name, x, y, dx, dy))
+
+    def on_mouse_press(self, x, y, button, modifiers):
+        self.events.append(("press", self.name, x, y))
+
+    def on_mouse_enter(self):
+        self.events.append(("enter", self.name))
+
+    def on_mouse_leave(self):
+        self.events.append(("leave", self.name))
+
+
+@pytest.fixture
+def widgets(win):
+    """Two panels side by side with a button in each, at (0, 0, 200, 200) and (200, 0, 200, 200) from the top left."""
+    events = []
+    created = {}
+    for i, side in enumerate("lr"):
+        panel = RecordingLabel(win, win, f"{side}panel", events)
+        panel.constraints = [left_inside(200 * i), top_inside(0), Eq(WIDGET_WIDTH, 200), Eq(WIDGET_HEIGHT, 200)]
+        button = RecordingLabel(win, panel, f"{side}button", events)
+        button.constraints = [left_inside(50), top_inside(50), Eq(WIDGET_WIDTH, 100), Eq(WIDGET_HEIGHT, 100)]
+        created[panel.name], created[button.name] = panel, button
+    win.draw_()
+    return events
+
+
+def at(win, x, y):
+    """Window coordinates of a point given from the top left."""
+    return x, win.height - y
+
+
+def test_motion_is_coalesced(win, widgets, monkeypatch):
+    hit_tests = []
+    get_affected_widget = win.get_affected_widget
+    monkeypatch.setattr(win, "get_affected_widget", lambda x, y: hit_tests.append((x, y)) or get_affected_widget(x, y))
+
+    for x in range(60, 100, 10):
+        win._on_mouse_motion(*at(win, x, 100), 10, 0)
+    assert widgets == [] and hit_tests == []
+
+    win.process_motion()
+    assert len(hit_tests) == 1
+    assert widgets[-1] == ("motion", "lbutton", *at(win, 90, 100), 40, 0)
+
+    # nothing queued anymore
+    win.process_motion()
+    assert len(hit_tests) == 1
+
+
+def test_press_comes_after_the_queued_motion(win, widgets):
+    win._on_mouse_motion(*at(win, 100, 100), 1, 0)
+    win._on_mouse_press(*at(win, 100, 100), 1, 0)
+    assert [event[:2] for event in widgets] == [("enter", "lpanel"), ("enter", "lbutton"), ("motion", "lbutton"),
+                                                ("press", "lbutton")]
+
+
+def test_hover_paths_are_diffed(win, widgets):
+    def move(x, y):
+        widgets.clear()
+        win.mouse_motion(*at(win, x, y), 0, 0)
+        return [event[:2] for event in widgets if event[0] != "motion"]
+
+    assert move(10, 10) == [("enter", "lpanel")]
+    assert move(100, 100) == [("enter", "lbutton")]
+    assert move(110, 100) == []
+    # innermost first when leaving, outermost first when entering
+    assert move(300, 100) == [("leave", "lbutton"), ("leave", "lpanel"), ("enter", "rpanel"), ("enter", "rbutton")]
+    assert move(210, 10) == [("leave", "rbutton")]
+    assert move(10, 300) == [("leave", "rpanel")]
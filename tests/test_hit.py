@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+from sympy import Eq
+
+from constraint_gui import Label, Widget
+from constraint_gui.constraints import *
+from constraint_gui.spatial import GridIndex
+
+
+class MouseTest(Label):
+    __slots__ = ()
+
+    def on_mouse_motion(self, x, y, dx, dy):
+        self.bg = (self.bg[0] + 1,) * 3
+
+
+@pytest.mark.parametrize("options", [{}, {"retained": True}, {"damage_tracking": True}])
+def test_motion_redraws_the_widget_under_the_mouse(make_window, options):
+    win = make_window(**options)
+    label = MouseTest(win, win, bg=(0, 0, 0))
+    label.constraints = [left_inside(0), top_inside(0), Eq(WIDGET_WIDTH, 100), Eq(WIDGET_HEIGHT, 100)]
+    win.draw_()
+
+    x, y = 50, win.height - 50
+    for i in range(1, 4):
+        # moving inside the same widget doesn't change the hovered one
+        win.mouse_motion(x + i, y, 1, 0)
+        win.draw_()
+        assert tuple(label.bg_rect.color[:3]) == (i,) * 3
+
+
+def brute_force_query(geometry, priority, x, y):
+    inside = [i for i, (x0, y0, width, height) in enumerate(geometry) if x0 < x < x0 + width and y0 < y < y0 + height]
+    return max(inside, key=lambda i: priority[i], default=None)
+
+
+def random_geometry(rng, count):
+    # mostly small rectangles, some covering more than max_cells cells and some of no size
+    geometry = np.column_stack([rng.uniform(-100, 800, count), rng.uniform(-100, 450, count),
+                                rng.uniform(0, 150, count), rng.uniform(0, 150, count)])
+    geometry[rng.random(count) < .1, 2:] *= 10
+    geometry[rng.random(count) < .05, 2] = 0
+    return geometry
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_grid_index_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    count = 200
+    geometry = random_geometry(rng, count)
+    priority = rng.permutation(count)
+    ids = np.arange(count)
+    index = GridIndex(cell_size=32)
+
+    for _ in range(3):
+        index.rebuild(ids, geometry, priority[ids])
+        for x, y in rng.uniform(-150, 900, (300, 2)):
+            expected = brute_force_query(geometry, priority[ids], x, y)
+            assert index.query(x, y) == (None if expected is None else ids[expected])
+
+        x0, y0 = rng.uniform(0, 600, 2)
+        x1, y1 = x0 + rng.uniform(0, 300), y0 + rng.uniform(0, 300)
+        overlapping = {ids[i] for i, (x, y, width, height) in enumerate(geometry)
+                       if width > 0 and height > 0 and x < x1 and x0 < x + width and y < y1 and y0 < y + height}
+        assert set(index.overlapping(x0, y0, x1, y1)) == overlapping
+
+        # move some rectangles and drop others
+        moved = rng.random(len(ids)) < .2
+        geometry = geometry.copy()
+        geometry[moved] = random_geometry(rng, moved.sum())
+        kept = rng.random(len(ids)) > .1
+        ids, geometry = ids[kept], geometry[kept]
+
+
+def test_window_hit_testing_matches_brute_force(win):
+    rng = np.random.default_rng(0)
+
+    widgets = []
+    for _ in range(60):
+        # nested widgets are on top of their masters
+        master = widgets[rng.integers(len(widgets))] if widgets and rng.random() < .3 else win
+        widgets.append(Widget(win, master))
+
+    def expected(x, y):
+        inside = [widget for widget in win.widgets
+                  if widget.x < x < widget.x + widget.width and widget.y < y < widget.y + widget.height]
+        return max(inside, key=lambda widget: (widget.z, widget.widget_id), default=win)
+
+    def check():
+        for x, y in rng.uniform(-50, 850, (300, 2)):
+            assert win.get_affected_widget(x, y) is expected(x, y)
+
+    for widget, geometry in zip(widgets, random_geometry(rng, len(widgets))):
+        widget.set_geometry(*geometry)
+    check()
+
+    for widget in rng.choice(widgets, 15, replace=False):
+        widget.set_geometry(*random_geometry(rng, 1)[0])
+    check()
+
+    for widget in rng.choice(widgets, 10, replace=False):
+        if not widget.is_destroyed:
+            widget.destroy()
+    check()
@@ -0,0 +1,82 @@
+import itertools
+
+import pytest
+
+from constraint_gui import VirtualList
+from constraint_gui.constraints import *
+from constraint_gui.items import ItemSource
+
+
+def test_sequence():
+    source = ItemSource(range(100))
+    assert source.exhausted and len(source) == 100 and source[42] == 42
+
+
+def test_generator_keeps_a_bounded_window():
+    source = ItemSource(itertools.count(), keep=10)
+    source.fetch(10 ** 6, 10 ** 6 - 5)
+
+    assert len(source) == 10 ** 6
+    assert len(source.items) == 10
+    assert source.start == 10 ** 6 - 10
+    assert source[10 ** 6 - 1] == 10 ** 6 - 1
+    with pytest.raises(IndexError):
+        source[0]
+
+    # a generator can't go back
+    source.fetch(20, 0)
+    assert source.start == 10 ** 6 - 10
+
+
+def test_iterable_is_iterated_again():
+    items = dict.fromkeys(range(1000)).keys()
+    source = ItemSource(items, keep=10)
+    source.fetch(500, 490)
+    source.fetch(30, 10)
+
+    assert source.start <= 10
+    assert [source[i] for i in range(10, 30)] == list(range(10, 30))
+
+
+def test_window_grows_to_the_visible_rows():
+    source = ItemSource(iter(range(1000)), keep=10)
+    source.fetch(150, 100)
+
+    assert [source[i] for i in range(100, 150)] == list(range(100, 150))
+
+
+def test_virtual_list_scrolls_a_generator(win):
+    items = VirtualList(win, win, items=(f"item {i}" for i in itertools.count()), row_height=20)
+    items.constraints = [left_inside(0), right_inside(0), top_inside(0), bottom_inside(0)]
+    win.draw_()
+
+    items.scroll_to(10 ** 6)
+    win.draw_()
+    assert items.rows[0].text == f"item {10 ** 6}"
+    assert len(items.source.items) <= 1024
+
+    # back to the oldest kept item at most
+    items.scroll_to(0)
+    win.draw_()
+    assert items.first == items.source.start
+    assert items.rows[0].text == f"item {items.first}"
+
+
+def test_scrolling_requests_a_frame(make_window):
+    win = make_window(on_demand=True)
+
+    items = VirtualList(win, win, items=[f"item {i}" for i in range(1000)], row_height=20)
+    items.constraints = [left_inside(0), right_inside(0), top_inside(0), bottom_inside(0)]
+    for _ in range(10):
+        if not win.needs_frame():
+            break
+        win.frame_requested = False
+        win.draw_()
+    assert not win.needs_frame()
+
+    win._on_mouse_scroll(400, 225, 0, -1)
+    assert items.first == items.scroll_step
+    assert win.needs_frame()
+
+    win.draw_()
+    assert items.rows[0].text == f"item {items.scroll_step}"
@@ -0,0 +1,80 @@
+import gc
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from constraint_gui import CheckBox, Label
+from constraint_gui.constraints import *
+from constraint_gui.leaks import find_reference_path
+from constraint_gui.template import template_cache
+
+
+@pytest.fixture(params=[{}, {"retained": True}, {"background_solve": True}],
+                ids=["immediate", "retained", "background_solve"])
+def options(request):
+    if not request.param.get("background_solve"):
+        yield request.param
+        return
+
+    # the CheckBox template is solved in the job as well
+    template_cache.clear()
+    with ThreadPoolExecutor(1) as executor:
+        yield {**request.param, "background_solve": executor}
+
+
+def build(win):
+    panel = Label(win, win, bg_on_hover=(255, 0, 0), transition=1)
+    panel.constraints = [left_inside(10), right_inside(10), top_inside(10), Eq(WIDGET_HEIGHT, 100)]
+    checkbox = CheckBox(win, panel, text="Option")
+    checkbox.constraints = [left_inside(10), right_inside(10), top_inside(10), Eq(WIDGET_HEIGHT, 20)]
+    checkbox.animate("offset", lambda: 0)
+
+    other = Label(win, win, text="stays")
+    other.constraints = [left_inside(10), right_inside(10), bottom_inside(10), Eq(WIDGET_HEIGHT, 20)]
+    return panel, other
+
+
+def test_destroyed_widgets_are_released(make_window, options):
+    win = make_window(**options)
+    panel, other = build(win)
+
+    win.draw_()
+    assert win.wait_for_layout(timeout=30)
+    win.draw_()
+    panel.is_mouse_inside = True
+    win.draw_()
+
+    destroyed = panel.subtree()
+    assert len(destroyed) == 4
+    panel.destroy()
+    gc.collect()
+
+    assert find_reference_path(win, destroyed) is None
+
+    win.draw_()
+    assert win.wait_for_layout(timeout=30)
+    win.draw_()
+    assert (other.y, other.height) == (10, 20)
+
+
+def test_destroyed_while_solving(make_window):
+    template_cache.clear()
+    with ThreadPoolExecutor(1) as executor:
+        win = make_window(background_solve=executor)
+        panel, other = build(win)
+        win.draw_()
+
+        destroyed = panel.subtree()
+        panel.destroy()
+        assert win.wait_for_layout(timeout=30)
+        win.draw_()
+        gc.collect()
+
+        assert find_reference_path(win, destroyed) is None
+        assert (other.y, other.height) == (10, 20)
+
+
+def test_finds_a_path(win):
+    label = Label(win, win)
+    path = find_reference_path(win, [label])
+    assert path[0] is win and path[-1] is label
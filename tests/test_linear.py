@@ -0,0 +1,53 @@
+import pytest
+from sympy import Eq, Symbol, solve, sympify
+
+from constraint_gui.linear import SPARSE_THRESHOLD, LinearSystem, solve_linear
+
+x, y, z, w = (Symbol(name) for name in "xyzw")
+width, ratio = Symbol("Ww_window"), Symbol("ratio")
+
+
+def assert_same(solutions, expected):
+    assert solutions.keys() == expected.keys()
+    for unknown, expr in expected.items():
+        assert sympify(solutions[unknown] - expr).simplify() == 0, unknown
+
+
+@pytest.mark.parametrize("equations, unknowns", [
+    ([Eq(x, 10), Eq(y, x + 5)], [x, y]),
+    ([Eq(x + y, 10), Eq(x - y, 2)], [x, y]),
+    # window parameters stay symbolic
+    ([Eq(x, width / 2), Eq(y + x, width), Eq(z, y - 10)], [x, y, z]),
+    ([Eq(x, ratio * width), Eq(y, x + ratio)], [x, y]),
+])
+def test_matches_sympy(equations, unknowns):
+    assert_same(solve_linear(equations, unknowns), solve(equations, unknowns, dict=True)[0])
+
+
+def test_sparse_matches_sympy():
+    # a chain long enough for the sparse solve
+    unknowns = [Symbol(f"x{i}") for i in range(SPARSE_THRESHOLD + 4)]
+    equations = [Eq(unknowns[0], width / 4)] + [Eq(b, a + 3) for a, b in zip(unknowns, unknowns[1:])]
+    assert_same(solve_linear(equations, unknowns), solve(equations, unknowns, dict=True)[0])
+
+
+@pytest.mark.parametrize("equations, unknowns", [
+    # not square
+    ([Eq(x, 1)], [x, y]),
+    ([Eq(x, 1), Eq(y, 2), Eq(x + y, 3)], [x, y]),
+    # nonlinear in the unknowns
+    ([Eq(x * y, 1), Eq(y, 2)], [x, y]),
+    ([Eq(x ** 2, 4), Eq(y, x)], [x, y]),
+    # singular
+    ([Eq(x + y, 10), Eq(2 * x + 2 * y, 20)], [x, y]),
+    ([Eq(x + y, 10), Eq(x + y, 20)], [x, y]),
+    ([], []),
+])
+def test_falls_back(equations, unknowns):
+    assert solve_linear(equations, unknowns) is None
+
+
+def test_add_equation_rejects_products_with_unknowns():
+    system = LinearSystem([x])
+    assert system.add_equation(Eq(x, width))
+    assert not system.add_equation(Eq(ratio * x, 1))
@@ -0,0 +1,49 @@
+from sympy import Eq, Symbol, solve
+
+from constraint_gui.partition import partition, solve_blocks, solve_single
+
+x, y, z, w, v = (Symbol(name) for name in "xyzwv")
+width = Symbol("Ww_window")
+
+
+def solve_with_sympy(equations, unknowns):
+    return solve(equations, unknowns, dict=True)[0]
+
+
+def test_blocks_are_ordered():
+    equations = [Eq(z, x + y), Eq(x + y, width), Eq(x - y, 10), Eq(w, z / 2)]
+    blocks = partition(equations, [x, y, z, w])
+
+    assert [set(block.unknowns) for block in blocks] == [{x, y}, {z}, {w}]
+    assert len({block.component for block in blocks}) == 1
+
+
+def test_independent_components():
+    blocks = partition([Eq(x, 1), Eq(y, x), Eq(z, 2)], [x, y, z])
+    components = {block.unknowns[0]: block.component for block in blocks}
+
+    assert components[x] == components[y] != components[z]
+
+
+def test_solve_blocks_matches_sympy():
+    equations = [Eq(z, x + y), Eq(x + y, width), Eq(x - y, 10), Eq(w, z / 2), Eq(v * 2, w + x)]
+    unknowns = [x, y, z, w, v]
+    solutions = solve_blocks(partition(equations, unknowns), solve_with_sympy)
+    expected = solve(equations, unknowns, dict=True)[0]
+
+    assert solutions.keys() == expected.keys()
+    assert all((solutions[unknown] - expected[unknown]).simplify() == 0 for unknown in unknowns)
+
+
+def test_structurally_singular():
+    # not square
+    assert partition([Eq(x, 1)], [x, y]) is None
+    # square, but y occurs nowhere and two equations only constrain x
+    assert partition([Eq(x, 1), Eq(x, width)], [x, y]) is None
+    assert partition([Eq(x + z, 1), Eq(z, 2), Eq(x, z)], [x, y, z]) is None
+
+
+def test_solve_single():
+    assert solve_single(Eq(2 * x + width, 10), x) == 5 - width / 2
+    assert solve_single(Eq(x * (x + 1), 10), x) is None
+    assert solve_single(Eq(y, 10), x) is None
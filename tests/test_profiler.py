@@ -0,0 +1,81 @@
+import json
+
+import pytest
+from sympy import Eq
+
+from constraint_gui import Label
+from constraint_gui.constraints import *
+from constraint_gui.profiler import FrameProfiler
+
+
+@pytest.fixture
+def profiled(make_window):
+    profiler = FrameProfiler()
+    win = make_window(profiler=profiler)
+    label = Label(win, win)
+    label.constraints = [left_inside(10), top_inside(10), Eq(WIDGET_WIDTH, 100), Eq(WIDGET_HEIGHT, 20)]
+    return win, label, profiler
+
+
+def test_phase_names(profiled):
+    win, label, profiler = profiled
+    win.loopiter()
+    win._on_mouse_motion(50, 430, 1, 0)
+    win.loopiter()
+
+    assert {event.name for event in profiler.events()} == {
+        "frame", "solve", "compile", "update", "draw", "draw_self Label", "batch.draw", "events"}
+    assert [event.frame for event in profiler.events() if event.name == "frame"] == [0, 1]
+    assert set(profiler.breakdown(1)) == {"frame", "update", "draw", "draw_self Label", "batch.draw", "events"}
+
+
+def test_phases_are_inside_their_frame(profiled):
+    win, label, profiler = profiled
+    for _ in range(3):
+        label.register_redraw()
+        win.loopiter()
+
+    frames = {event.frame: event for event in profiler.events() if event.name == "frame"}
+    for event in profiler.events():
+        frame = frames[event.frame]
+        assert frame.start <= event.start and event.start + event.duration <= frame.start + frame.duration
+    assert [frame for frame, _ in profiler.slowest_frames(3)] == sorted(frames, key=lambda i: -frames[i].duration)
+
+
+def test_chrome_trace(profiled, tmp_path):
+    win, label, profiler = profiled
+    win.loopiter()
+    win.loopiter()
+
+    path = tmp_path / "trace.json"
+    profiler.export_chrome_trace(path)
+    trace = json.loads(path.read_text())
+
+    assert trace["displayTimeUnit"] == "ms"
+    assert len(trace["traceEvents"]) == len(profiler.events())
+    for event, recorded in zip(trace["traceEvents"], profiler.events()):
+        assert set(event) == {"name", "ph", "ts", "dur", "pid", "tid", "args"}
+        assert (event["name"], event["ph"], event["pid"], event["tid"]) == (recorded.name, "X", 0, 0)
+        assert event["ts"] == pytest.approx(recorded.start * 1e6) and event["dur"] >= 0
+        assert event["args"] == {"frame": recorded.frame, "calls": recorded.calls, "memory": 0}
+
+
+def test_ring_buffer_keeps_the_last_events():
+    profiler = FrameProfiler(capacity=4)
+    for frame in range(10):
+        with profiler.phase("frame"):
+            pass
+
+    assert [event.frame for event in profiler.events()] == [6, 7, 8, 9]
+    assert profiler.summary()["frame"]["count"] == 4
+
+
+def test_accumulated_calls():
+    profiler = FrameProfiler()
+    with profiler.phase("frame"):
+        for _ in range(3):
+            profiler.accumulate("draw_self Label", 0.)
+
+    (accumulated, frame) = profiler.events()
+    assert (accumulated.name, accumulated.calls, accumulated.frame) == ("draw_self Label", 3, 0)
+    assert frame.name == "frame"
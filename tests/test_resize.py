@@ -0,0 +1,83 @@
+import time
+
+import pytest
+from sympy import Eq
+
+from constraint_gui import Label
+from constraint_gui.constraints import *
+from constraint_gui.text import text_layout_cache
+
+
+def stretched(win):
+    panel = Label(win, win, bg=(40, 40, 40))
+    panel.constraints = [left_inside(10), right_inside(10), top_inside(10), Eq(WIDGET_HEIGHT, 200)]
+    label = Label(win, panel, text="a text that gets wrapped again", font_size=12)
+    label.constraints = [left_inside(10), right_inside(10), top_inside(10), Eq(WIDGET_HEIGHT, 100)]
+    return panel, label
+
+
+def settle(win):
+    """Pretends that the last resize event was long ago."""
+    win.resize_time = time.perf_counter() - 60
+    win.draw_()
+
+
+@pytest.mark.parametrize("retained", [False, True])
+def test_text_is_wrapped_once_the_size_settles(make_window, retained):
+    win = make_window(live_resize=10, retained=retained)
+    panel, label = stretched(win)
+    panel.cache_subtree()
+    win.draw_()
+    text_layout_cache.clear()
+
+    for width in range(700, 500, -50):
+        win.on_resize(width, 450)
+        win.draw_()
+        # the geometry follows every event
+        assert label.width == width - 40
+        assert label.text_label.width == 760 and win.resizing and win.needs_frame()
+    assert text_layout_cache.misses == 0
+    assert panel.subtree_cache.renders == 1
+
+    settle(win)
+    assert not win.resizing
+    assert label.text_label.width == 510
+    assert text_layout_cache.misses == 1
+    assert panel.subtree_cache.renders == 2
+
+
+def test_aligned_text_moves_along(make_window):
+    win = make_window(live_resize=10, retained=True)
+    panel, label = stretched(win)
+    win.draw_()
+    center = label.text_label.x + label.text_label.width / 2
+
+    win.on_resize(700, 450)
+    win.draw_()
+    # centered text stays in the middle of the label
+    assert label.text_label.x + label.text_label.width / 2 == pytest.approx(center - 50)
+
+
+def test_hover_waits_for_the_size(make_window):
+    win = make_window(live_resize=10)
+    panel, label = stretched(win)
+    win.draw_()
+    win.mouse_motion(700, 400, 0, 0)
+    assert win.hovered is label
+
+    # the label moves away from under the mouse
+    win.on_resize(600, 450)
+    win.draw_()
+    assert win.hovered is label
+
+    settle(win)
+    assert win.hovered is win
+
+
+def test_without_live_resize(win):
+    panel, label = stretched(win)
+    win.draw_()
+
+    win.on_resize(600, 450)
+    win.draw_()
+    assert not win.resizing and label.text_label.width == 560
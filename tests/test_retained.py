@@ -0,0 +1,66 @@
+from sympy import Eq
+
+from constraint_gui import Label
+from constraint_gui.constraints import *
+
+
+def label_at(win, left, **kwargs):
+    label = Label(win, win, text="retained", font_size=12, **kwargs)
+    label.constraints = [left_inside(left), top_inside(10), Eq(WIDGET_WIDTH, 200), Eq(WIDGET_HEIGHT, 40)]
+    return label
+
+
+def test_shapes_are_updated_in_place(make_window):
+    win = make_window(retained=True)
+    label = label_at(win, 10)
+    win.draw_()
+    shapes = label.bg_rect, label.text_label
+
+    label.bg = (1, 2, 3)
+    label.fg = (4, 5, 6)
+    label.text = "changed"
+    label.register_redraw()
+    win.draw_()
+    assert (label.bg_rect, label.text_label) == shapes
+    assert tuple(label.bg_rect.color[:3]) == (1, 2, 3)
+    assert (label.text_label.text, tuple(label.text_label.color)) == ("changed", (4, 5, 6, 255))
+
+    label.constraints = [left_inside(50), top_inside(10), Eq(WIDGET_WIDTH, 300), Eq(WIDGET_HEIGHT, 40)]
+    win.draw_()
+    assert (label.bg_rect, label.text_label) == shapes
+    assert (label.bg_rect.x, label.bg_rect.width, label.text_label.width) == (50, 300, 300)
+
+
+def test_one_batch_for_all_frames(make_window):
+    win = make_window(retained=True)
+    label = label_at(win, 10)
+    win.draw_()
+    batch = win.batch
+
+    for _ in range(3):
+        win.register_redraw()
+        win.draw_()
+    assert win.batch is batch and label._batch is batch
+
+
+def test_immediate_mode_creates_new_shapes(win):
+    label = label_at(win, 10)
+    win.draw_()
+    rect = label.bg_rect
+
+    label.register_redraw()
+    win.draw_()
+    assert label.bg_rect is not rect and rect.x == label.bg_rect.x
+
+
+def test_destroyed_shapes_leave_the_batch(make_window):
+    win = make_window(retained=True)
+    label, other = label_at(win, 10), label_at(win, 300)
+    win.draw_()
+    allocator = label.bg_rect._vertex_list.domain.allocator
+    assert sum(allocator.sizes) == 12
+
+    label.destroy()
+    win.draw_()
+    assert label.bg_rect is None and sum(allocator.sizes) == 6
+    assert other.bg_rect is not None
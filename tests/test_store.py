@@ -0,0 +1,35 @@
+import weakref
+
+from constraint_gui import Label, Widget
+from constraint_gui.store import measure_memory_per_widget
+
+# about twice of what they take now, a widget with an allocated __dict__ or its own geometry arrays goes beyond that
+WIDGET_BYTES = 1600
+LABEL_BYTES = 2500
+
+
+def test_widget_memory(win):
+    assert measure_memory_per_widget(lambda: Widget(win, win)) < WIDGET_BYTES
+
+
+def test_label_memory(win):
+    assert measure_memory_per_widget(lambda: Label(win, win)) < LABEL_BYTES
+
+
+def test_geometry_in_store(win):
+    widget = Widget(win, win)
+
+    widget.x, widget.width = 3, 40
+    assert list(win.store.geometry[widget.index]) == [3, 0, 40, 0]
+
+
+def test_app_attributes(win):
+    label = Label(win, win)
+    assert not label.__dict__
+
+    pressed = []
+    label.on_mouse_press = lambda *args: pressed.append(args)
+    label.my_data = 1
+    label.on_mouse_press(1, 2, 1, 0)
+    assert pressed == [(1, 2, 1, 0)] and label.my_data == 1
+    assert weakref.ref(label)() is label
@@ -0,0 +1,70 @@
+from sympy import Eq
+
+from constraint_gui import Label
+from constraint_gui.constraints import *
+from constraint_gui.text import TextLayoutCache, text_layout_cache
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = TextLayoutCache(max_entries=2)
+    cache.put("a", ([], 1, 1))
+    cache.put("b", ([], 2, 2))
+    assert cache.get("a") == ([], 1, 1)
+
+    cache.put("c", ([], 3, 3))
+    assert list(cache.entries) == ["a", "c"]
+    assert cache.get("b") is None
+    assert (cache.hits, cache.misses, cache.hit_rate) == (1, 1, .5)
+
+    cache.clear()
+    assert (len(cache), cache.hits, cache.misses) == (0, 0, 0)
+
+
+def labels(win, texts, width=200):
+    created = []
+    for i, text in enumerate(texts):
+        label = Label(win, win, text=text, font_size=12)
+        label.constraints = [left_inside(10), top_inside(10 + 30 * i), Eq(WIDGET_WIDTH, width), Eq(WIDGET_HEIGHT, 20)]
+        created.append(label)
+    return created
+
+
+def test_labels_share_laid_out_lines(win):
+    text_layout_cache.clear()
+    first, second, other = labels(win, ["same", "same", "other"])
+    win.draw_()
+
+    assert len(text_layout_cache) == 2
+    assert first.text_label._get_lines() is second.text_label._get_lines()
+    assert first.text_label.content_width == second.text_label.content_width
+
+
+def test_redrawing_reuses_the_layout(win):
+    text_layout_cache.clear()
+    label, = labels(win, ["redrawn"])
+    win.draw_()
+    assert text_layout_cache.misses == 1
+
+    # a new pyglet Label every frame, with the same lines
+    label.register_redraw()
+    win.draw_()
+    assert (text_layout_cache.hits, text_layout_cache.misses) == (1, 1)
+
+
+def test_moving_a_label_doesnt_lay_it_out_again(make_window):
+    win = make_window(retained=True)
+    text_layout_cache.clear()
+    label, = labels(win, ["moves"])
+    win.draw_()
+    text_label = label.text_label
+    lookups = text_layout_cache.hits + text_layout_cache.misses
+
+    label.constraints = [left_inside(50), top_inside(50), Eq(WIDGET_WIDTH, 200), Eq(WIDGET_HEIGHT, 20)]
+    win.draw_()
+    assert label.text_label is text_label and text_label.x == 50
+    assert text_layout_cache.hits + text_layout_cache.misses == lookups
+
+    # a new wrapping width is a new layout
+    label.constraints = [left_inside(50), top_inside(50), Eq(WIDGET_WIDTH, 300), Eq(WIDGET_HEIGHT, 20)]
+    win.draw_()
+    assert text_layout_cache.misses == 2 and len(text_layout_cache) == 2
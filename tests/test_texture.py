@@ -0,0 +1,69 @@
+import pytest
+from sympy import Eq
+
+from constraint_gui import Label
+from constraint_gui.constraints import *
+
+
+def panel(win):
+    """A panel with two labels inside."""
+    root = Label(win, win, bg=(40, 40, 40))
+    root.constraints = [left_inside(10), top_inside(10), Eq(WIDGET_WIDTH, 300), Eq(WIDGET_HEIGHT, 200)]
+
+    children = []
+    for i, bg in enumerate([(200, 0, 0), (0, 0, 200)]):
+        child = Label(win, root, bg=bg, text=str(i))
+        child.constraints = [left_inside(10), top_inside(10 + 60 * i), Eq(WIDGET_WIDTH, 100), Eq(WIDGET_HEIGHT, 50)]
+        children.append(child)
+    return root, children
+
+
+@pytest.fixture(params=[False, True], ids=["immediate", "retained"])
+def cached(request, make_window):
+    win = make_window(retained=request.param, damage_tracking=False)
+    root, children = panel(win)
+    root.cache_subtree()
+    return win, root, children
+
+
+def test_renders_only_when_changed(cached):
+    win, root, (first, second) = cached
+    for _ in range(3):
+        win.draw_()
+        win.register_redraw()
+    assert root.subtree_cache.renders == 1
+
+    first.bg = (0, 200, 0)
+    first.register_redraw()
+    win.draw_()
+    assert root.subtree_cache.renders == 2
+
+    second.text = "changed"
+    second.register_redraw()
+    win.draw_()
+    assert root.subtree_cache.renders == 3
+
+    # the panel is anchored at the left, a narrower window doesn't move it
+    win.width = 700
+    win.draw_()
+    win.draw_()
+    assert root.subtree_cache.renders == 3
+
+    root.constraints = [left_inside(20), top_inside(10), Eq(WIDGET_WIDTH, 300), Eq(WIDGET_HEIGHT, 200)]
+    win.draw_()
+    assert root.subtree_cache.renders == 4
+
+
+@pytest.mark.parametrize("release", ["destroy", "disable"])
+def test_releases_the_framebuffer(cached, release):
+    win, root, children = cached
+    win.draw_()
+    cache = root.subtree_cache
+    assert cache.framebuffer is not None and cache.texture is not None
+
+    if release == "destroy":
+        root.destroy()
+    else:
+        root.cache_subtree(False)
+    assert root.subtree_cache is None
+    assert (cache.framebuffer, cache.texture, cache.sprite) == (None, None, None)
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+from sympy import Eq, Symbol
+
+from constraint_gui import Label
+from constraint_gui.constraints import *
+
+
+class CountingLabel(Label):
+    __slots__ = ("updates",)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.updates = 0
+
+    def update_self(self):
+        self.updates += 1
+        super().update_self()
+
+
+def build(win, cls=Label):
+    # only depends on the window's height
+    fixed = cls(win, win)
+    fixed.constraints = [left_inside(10), top_inside(10), Eq(WIDGET_WIDTH, 100), Eq(WIDGET_HEIGHT, 20)]
+    # depends on its width as well
+    stretched = cls(win, win)
+    stretched.constraints = [left_inside(10), right_inside(10), top_inside(40), Eq(WIDGET_HEIGHT, 20)]
+    # follows an animated variable
+    animated = cls(win, win)
+    animated.animate("grow", lambda: 50)
+    animated.constraints = [left_inside(10), top_inside(70), Eq(WIDGET_WIDTH, Symbol("grow")), Eq(WIDGET_HEIGHT, 20)]
+    return fixed, stretched, animated
+
+
+def test_dependencies(win):
+    fixed, stretched, animated = build(win)
+    win.draw_()
+
+    assert win.width_expr not in fixed.dependencies and win.height_expr in fixed.dependencies
+    assert {win.width_expr, win.height_expr} <= stretched.dependencies
+    assert Symbol("grow") in animated.dependencies and win.width_expr not in animated.dependencies
+
+
+def test_evaluator_only_affects_dependent_widgets(win):
+    widgets = build(win)
+    win.draw_()
+
+    changed = np.array([parameter == win.width_expr for parameter in win.evaluator.parameters])
+    affected = win.evaluator.affected(changed)
+    order = {widget.index: widget for widget in widgets}
+    assert {order[index] for index in win.evaluated_indices[affected]} == {widgets[1]}
+
+
+def test_resizing_updates_dependent_widgets(make_window):
+    win = make_window(vectorized=False)
+    fixed, stretched, animated = build(win, CountingLabel)
+    win.draw_()
+    before = [widget.updates for widget in (fixed, stretched, animated)]
+
+    win.on_resize(600, 450)
+    win.draw_()
+    updates = [widget.updates - count for widget, count in zip((fixed, stretched, animated), before)]
+    # the animated widget is updated every frame anyway
+    assert updates == [0, 1, 1]
+    assert stretched.width == 580
+
+
+@pytest.mark.parametrize("vectorized", [False, True])
+def test_animation_only_redraws_the_animated_widget(make_window, vectorized):
+    win = make_window(vectorized=vectorized, damage_tracking=True)
+    grow = [50]
+    fixed, stretched, animated = build(win)
+    animated.animate("grow", lambda: grow[0])
+    win.draw_()
+    win.draw_()
+    assert win.damaged_regions == []
+
+    grow[0] = 80
+    win.draw_()
+    assert animated.width == 80
+    assert win.damaged_regions == [(9, animated.y - 1, 91, animated.top_edge + 1)]